@@ -0,0 +1,187 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+
+import requests
+from sqlalchemy import text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from brevo_client import get_client_brevo, jamais_parti, BREVO_CONCURRENCE
+from models.avis import DemandeAvis
+
+# =========================================================
+# DEMANDES D'AVIS J+1 (CRON)
+# =========================================================
+# - chaque commande payée planifie une demande (planifier_demande_avis)
+# - /cron-avis réclame toutes les demandes dues en une requête
+#   (UPDATE ... FOR UPDATE SKIP LOCKED) : deux runs simultanés ne prennent
+#   jamais les mêmes destinataires
+# - envoi par l'API batch de Brevo : un POST /smtp/email avec jusqu'à
+#   AVIS_LOT_TAILLE messageVersions (un destinataire par version, prénom
+#   personnalisé), plusieurs lots en parallèle
+# - statut par destinataire ; un lot refusé (400) pour adresse invalide est
+#   coupé en deux jusqu'à isoler les adresses fautives ; tout autre 400
+#   (template, sender, payload) échoue le lot entier en une seule requête ;
+#   un lot sans réponse (timeout) passe en "incertain" et n'est jamais
+#   renvoyé automatiquement (pas de doublon)
+# - une réclamation est horodatée (reclame_a) : un run interrompu laisse ses
+#   demandes en_cours ; au run suivant, celles réclamées depuis plus de
+#   AVIS_RECLAMATION_EXPIREE_SECONDES passent en "incertain" (le lot a pu
+#   partir avant l'interruption)
+
+AVIS_DELAI_HEURES = float(os.getenv("AVIS_DELAI_HEURES", "24"))
+AVIS_TEMPLATE_ID = int(os.getenv("BREVO_TEMPLATE_AVIS", "3"))
+AVIS_LOT_TAILLE = int(os.getenv("AVIS_LOT_TAILLE", "1000"))  # maximum Brevo par requête
+AVIS_MAX_PAR_RUN = int(os.getenv("AVIS_MAX_PAR_RUN", "50000"))
+AVIS_MAX_TENTATIVES = int(os.getenv("AVIS_MAX_TENTATIVES", "3"))
+AVIS_LOTS_PARALLELES = int(os.getenv("AVIS_LOTS_PARALLELES", str(BREVO_CONCURRENCE)))
+# bien au-delà de la durée d'un run (le workflow coupe à 600 s)
+AVIS_RECLAMATION_EXPIREE_SECONDES = int(os.getenv("AVIS_RECLAMATION_EXPIREE_SECONDES", "3600"))
+
+A_ENVOYER = "a_envoyer"
+EN_COURS = "en_cours"
+ENVOYE = "envoye"
+INCERTAIN = "incertain"
+ECHEC = "echec"
+
+
+def planifier_demande_avis(db: Session, email: str, prenom: str, simulation_id: int = None):
+    """Ajoute la demande à la transaction de l'appelant ; ignorée si l'email en a déjà une."""
+    db.execute(
+        pg_insert(DemandeAvis)
+        .values(
+            email=email,
+            prenom=prenom,
+            simulation_id=simulation_id,
+            statut=A_ENVOYER,
+            tentatives=0,
+            envoyer_a=datetime.now(timezone.utc) + timedelta(hours=AVIS_DELAI_HEURES),
+        )
+        .on_conflict_do_nothing(index_elements=[DemandeAvis.email])
+    )
+
+
+SQL_RECLAMER = text("""
+    UPDATE demandes_avis SET statut = 'en_cours', tentatives = tentatives + 1, reclame_a = now()
+    WHERE id IN (
+        SELECT id FROM demandes_avis
+        WHERE statut = 'a_envoyer' AND envoyer_a <= now()
+        ORDER BY envoyer_a, id
+        LIMIT :limite
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING id, email, prenom, tentatives
+""")
+
+# en_cours depuis trop longtemps : run interrompu, envoi possible -> incertain
+SQL_EXPIRER = text("""
+    UPDATE demandes_avis
+    SET statut = 'incertain', derniere_erreur = 'réclamation expirée (run interrompu)'
+    WHERE statut = 'en_cours'
+      AND (reclame_a IS NULL OR reclame_a < now() - make_interval(secs => :expiration))
+""")
+
+# restées en_cours après le run : run concurrent (ou run précédent encore récent)
+SQL_BLOQUEES = text("SELECT count(*) FROM demandes_avis WHERE statut = 'en_cours'")
+
+
+def _envoyer_lot(lot: list, template_id: int, sender: dict) -> list:
+    """
+    Envoie un lot, retourne les mises à jour [{id, statut, ...}] par
+    destinataire. Exécuté dans un thread : aucun accès DB ici.
+    """
+    payload = {
+        "sender": sender,
+        "templateId": template_id,
+        "messageVersions": [
+            {"to": [{"email": d["email"]}], "params": {"prenom": d["prenom"] or ""}}
+            for d in lot
+        ],
+    }
+    maintenant = datetime.now(timezone.utc)
+
+    try:
+        resp = get_client_brevo().envoyer(payload)
+    except requests.RequestException as e:
+        erreur = repr(e)[:1000]
+        if jamais_parti(e):
+            return [{"id": d["id"], "statut": _statut_refus(d), "derniere_erreur": erreur} for d in lot]
+        return [{"id": d["id"], "statut": INCERTAIN, "derniere_erreur": erreur} for d in lot]
+
+    if resp.status_code < 300:
+        try:
+            ids = resp.json().get("messageIds") or []
+        except ValueError:
+            ids = []
+        if len(ids) != len(lot):
+            ids = [None] * len(lot)
+        return [
+            {"id": d["id"], "statut": ENVOYE, "message_id": message_id, "envoye_a": maintenant, "derniere_erreur": None}
+            for d, message_id in zip(lot, ids)
+        ]
+
+    if resp.status_code == 400 and len(lot) > 1 and _refus_destinataire(resp):
+        # une adresse invalide fait refuser tout le lot : on coupe en deux
+        milieu = len(lot) // 2
+        return _envoyer_lot(lot[:milieu], template_id, sender) + _envoyer_lot(lot[milieu:], template_id, sender)
+
+    erreur = f"{resp.status_code} {resp.text[:500]}"
+    return [{"id": d["id"], "statut": _statut_refus(d), "derniere_erreur": erreur} for d in lot]
+
+
+def _refus_destinataire(resp: requests.Response) -> bool:
+    """400 dû à une adresse invalide (ex: "email is not valid in to"), pas au template ou au sender."""
+    try:
+        message = str(resp.json().get("message", ""))
+    except (ValueError, AttributeError):
+        message = resp.text
+    message = message.lower()
+    return "email" in message and ("invalid" in message or "not valid" in message)
+
+
+def _statut_refus(demande: dict) -> str:
+    return ECHEC if demande["tentatives"] >= AVIS_MAX_TENTATIVES else A_ENVOYER
+
+
+def envoyer_demandes_avis(db: Session, sender: dict, template_id: int = AVIS_TEMPLATE_ID,
+                          lot_taille: int = AVIS_LOT_TAILLE, max_par_run: int = AVIS_MAX_PAR_RUN) -> dict:
+    """Un run du cron : réclame les demandes dues, les envoie par lots, enregistre les statuts."""
+    debut = time.perf_counter()
+
+    expirees = db.execute(SQL_EXPIRER, {"expiration": AVIS_RECLAMATION_EXPIREE_SECONDES}).rowcount
+    db.commit()
+
+    dues = [dict(ligne) for ligne in db.execute(SQL_RECLAMER, {"limite": max_par_run}).mappings()]
+    db.commit()
+
+    lots = [dues[i:i + lot_taille] for i in range(0, len(dues), lot_taille)]
+    compteurs = {ENVOYE: 0, A_ENVOYER: 0, INCERTAIN: 0, ECHEC: 0}
+
+    with ThreadPoolExecutor(max(1, AVIS_LOTS_PARALLELES)) as pool:
+        futures = [pool.submit(_envoyer_lot, lot, template_id, sender) for lot in lots]
+        for future in as_completed(futures):
+            mises_a_jour = future.result()
+            # enregistré lot par lot : un crash en cours de run ne perd que les lots en vol
+            db.execute(update(DemandeAvis), mises_a_jour)
+            db.commit()
+            for m in mises_a_jour:
+                compteurs[m["statut"]] += 1
+
+    bloquees = db.execute(SQL_BLOQUEES).scalar()
+    duree = time.perf_counter() - debut
+
+    resultat = {
+        "dues": len(dues),
+        "lots": len(lots),
+        "envoyees": compteurs[ENVOYE],
+        "a_reessayer": compteurs[A_ENVOYER],
+        "incertaines": compteurs[INCERTAIN],
+        "echecs": compteurs[ECHEC],
+        "expirees": expirees,
+        "bloquees": bloquees,
+        "duree_secondes": round(duree, 2),
+    }
+    print(f"⭐ Cron avis : {resultat}")
+    return resultat
@@ -0,0 +1,79 @@
+"""
+Benchmark — envoi Brevo : requests.post (connexion neuve) vs client poolé
+
+Contre fake_brevo en local (HTTP en clair) : le gain mesuré ici est la
+connexion TCP seule ; en production s'y ajoute la poignée de main TLS
+(~1 aller-retour de plus) économisée par le keep-alive.
+
+Usage :
+    python benchmarks/brevo_client.py -n 500 --latence-ms 5 --threads 8
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import requests
+
+from brevo_client import ClientBrevo
+from fake_brevo import demarrer_fake_brevo
+
+PAYLOAD = {
+    "templateId": 1,
+    "to": [{"email": "anne@example.com"}],
+    "params": {"prenom": "Anne"},
+    "sender": {"email": "contact@example.com"},
+}
+
+
+def mesurer(envoyer, n, threads):
+    durees = []
+
+    def un(_):
+        t0 = time.perf_counter()
+        envoyer()
+        durees.append(time.perf_counter() - t0)
+
+    debut = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(un, range(n)))
+    total = time.perf_counter() - debut
+    durees.sort()
+    return n / total, statistics.median(durees), durees[int(0.99 * (len(durees) - 1))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--envois", type=int, default=500)
+    parser.add_argument("--latence-ms", type=float, default=5)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    serveur, url = demarrer_fake_brevo(latence=args.latence_ms / 1000)
+    headers = {"accept": "application/json", "api-key": "bench", "content-type": "application/json"}
+    client = ClientBrevo(url=url, api_key="bench", concurrence=args.threads, max_connexions=args.threads)
+
+    configs = [
+        ("requests.post", lambda: requests.post(url, json=PAYLOAD, headers=headers, timeout=10)),
+        ("client poolé", lambda: client.envoyer(PAYLOAD)),
+    ]
+
+    print(f"📈 {args.envois} envois, {args.threads} thread(s), latence serveur {args.latence_ms:.0f} ms")
+    for nom, envoyer in configs:
+        connexions_avant = serveur.connexions
+        debit, p50, p99 = mesurer(envoyer, args.envois, args.threads)
+        print(
+            f"{nom:14s} {debit:7.0f} envois/s  p50={p50 * 1000:6.1f} ms  p99={p99 * 1000:6.1f} ms  "
+            f"connexions={serveur.connexions - connexions_avant}"
+        )
+
+    serveur.arreter()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Test de charge /submit — latences p50 / p99
+
+Envoie des /submit en rafale (N requêtes, C en parallèle) et, en même temps,
+des /ping à intervalle régulier. Si /submit bloque la boucle d'événements,
+la latence de /ping explose : c'est ce qu'on compare avant / après.
+
+Usage (serveur lancé avec une vraie DB) :
+    uvicorn main:app --port 8000
+    python benchmarks/charge_submit.py --url http://127.0.0.1:8000 -n 500 -c 50
+
+Comparer : lancer le même script sur un serveur à l'ancien commit puis au
+nouveau, avec les mêmes paramètres.
+"""
+
+import argparse
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+ORIGIN = "https://maretraitesuisse.ch"
+
+
+def payload_submit(i: int) -> dict:
+    return {
+        "prenom": "Charge",
+        "nom": "Test",
+        "email": f"charge+{i}@example.com",
+        "telephone": None,
+        "statut_civil": random.choice(["celibataire", "marie"]),
+        "statut_pro": "salarie",
+        "age_actuel": random.randint(25, 60),
+        "age_retraite": 65,
+        "salaire_actuel": random.randint(30000, 160000),
+        "salaire_moyen": random.randint(30000, 120000),
+        "annees_cotisees": random.randint(5, 40),
+        "annees_cotisees_lpp": random.randint(0, 35),
+        "annees_be": 0,
+        "annees_ba": 0,
+        "capital_lpp": random.randint(0, 400000),
+        "rente_conjoint": 0,
+        "has_3eme_pilier": False,
+        "type_3eme_pilier": None,
+    }
+
+
+def percentile(valeurs, p):
+    if not valeurs:
+        return float("nan")
+    valeurs = sorted(valeurs)
+    k = min(len(valeurs) - 1, int(round(p / 100 * (len(valeurs) - 1))))
+    return valeurs[k]
+
+
+def resume(nom, latences, erreurs):
+    ms = [x * 1000 for x in latences]
+    print(
+        f"{nom:8s} n={len(ms):5d}  erreurs={erreurs:4d}  "
+        f"p50={percentile(ms, 50):8.1f} ms  p99={percentile(ms, 99):8.1f} ms  "
+        f"moy={statistics.mean(ms) if ms else float('nan'):8.1f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("-n", "--requetes", type=int, default=500)
+    parser.add_argument("-c", "--concurrence", type=int, default=50)
+    parser.add_argument("--ping-intervalle", type=float, default=0.02)
+    args = parser.parse_args()
+
+    local = threading.local()
+
+    def session():
+        if not hasattr(local, "s"):
+            local.s = requests.Session()
+        return local.s
+
+    def un_submit(i):
+        # IP différente par requête : sinon le rate limit (10/min/IP) répond 429
+        headers = {"Origin": ORIGIN, "X-Forwarded-For": f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}"}
+        t0 = time.perf_counter()
+        try:
+            r = session().post(f"{args.url}/submit", json=payload_submit(i), headers=headers, timeout=60)
+        except requests.RequestException:
+            return time.perf_counter() - t0, None
+        return time.perf_counter() - t0, r.status_code
+
+    ping_latences = []
+    ping_erreurs = 0
+    fin = threading.Event()
+
+    def boucle_ping():
+        nonlocal ping_erreurs
+        s = requests.Session()
+        while not fin.is_set():
+            t0 = time.perf_counter()
+            try:
+                s.get(f"{args.url}/ping", timeout=30).raise_for_status()
+                ping_latences.append(time.perf_counter() - t0)
+            except Exception:
+                ping_erreurs += 1
+            time.sleep(args.ping_intervalle)
+
+    pinger = threading.Thread(target=boucle_ping, daemon=True)
+    pinger.start()
+
+    t_debut = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrence) as pool:
+        resultats = list(pool.map(un_submit, range(args.requetes)))
+    duree = time.perf_counter() - t_debut
+
+    fin.set()
+    pinger.join()
+
+    submit_latences = [t for t, code in resultats if code == 200]
+    submit_erreurs = sum(1 for _, code in resultats if code != 200)
+
+    print(f"\n📈 {args.requetes} /submit, concurrence {args.concurrence}, {duree:.1f} s "
+          f"({args.requetes / duree:.1f} req/s)")
+    resume("/submit", submit_latences, submit_erreurs)
+    resume("/ping", ping_latences, ping_erreurs)
+
+
+if __name__ == "__main__":
+    main()
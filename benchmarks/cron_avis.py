@@ -0,0 +1,81 @@
+"""
+Benchmark — cron des demandes d'avis : API batch Brevo vs un envoi par email
+
+Insère N demandes dues (domaine bench.invalid) dans la base DATABASE_URL,
+lance envoyer_demandes_avis contre fake_brevo, puis un second run
+(idempotence : 0 envoi). Le mode « un par un » est mesuré sur --echantillon
+envois séquentiels et extrapolé à N. Les lignes de test sont supprimées.
+
+Usage :
+    DATABASE_URL=... python benchmarks/cron_avis.py -n 20000 --latence-ms 150
+"""
+
+import argparse
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import brevo_client
+from brevo_client import ClientBrevo
+from database import SessionLocal, engine
+from fake_brevo import demarrer_fake_brevo
+from models.avis import DemandeAvis
+from avis_cron import envoyer_demandes_avis
+
+SENDER = {"email": "bench@example.com", "name": "Bench"}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--destinataires", type=int, default=20000)
+    parser.add_argument("--latence-ms", type=float, default=150)
+    parser.add_argument("--echantillon", type=int, default=50)
+    args = parser.parse_args()
+
+    DemandeAvis.__table__.create(engine, checkfirst=True)
+    serveur, url = demarrer_fake_brevo(latence=args.latence_ms / 1000)
+    brevo_client._client = ClientBrevo(url=url, api_key="bench")
+
+    run = uuid.uuid4().hex[:8]
+    db = SessionLocal()
+    try:
+        passe = datetime.now(timezone.utc) - timedelta(hours=1)
+        db.execute(DemandeAvis.__table__.insert(), [
+            {"email": f"{run}-{i}@bench.invalid", "prenom": "Anne", "statut": "a_envoyer",
+             "tentatives": 0, "envoyer_a": passe}
+            for i in range(args.destinataires)
+        ])
+        db.commit()
+
+        print(f"📈 {args.destinataires} destinataires, latence Brevo simulée {args.latence_ms:.0f} ms/requête")
+
+        # un par un (ancien chemin), extrapolé
+        t0 = time.perf_counter()
+        for i in range(args.echantillon):
+            brevo_client._client.envoyer({"templateId": 3, "to": [{"email": f"x{i}@bench.invalid"}]})
+        par_email = (time.perf_counter() - t0) / args.echantillon
+        print(f"un par un   ~{par_email * args.destinataires:8.1f} s   ({1 / par_email:7.0f} emails/s, extrapolé)")
+
+        serveur.recus.clear()
+        resultat = envoyer_demandes_avis(db, SENDER)
+        debit = resultat["envoyees"] / resultat["duree_secondes"]
+        print(f"batch        {resultat['duree_secondes']:8.1f} s   ({debit:7.0f} emails/s, {resultat['lots']} lots)")
+        assert resultat["envoyees"] == args.destinataires, resultat
+        assert serveur.destinataires() == args.destinataires
+
+        second = envoyer_demandes_avis(db, SENDER)
+        assert second["dues"] == 0 and serveur.destinataires() == args.destinataires, second
+        print("✅ second run : 0 envoi (idempotent)")
+    finally:
+        db.execute(DemandeAvis.__table__.delete().where(DemandeAvis.email.like(f"{run}-%")))
+        db.commit()
+        db.close()
+        serveur.arreter()
+
+
+if __name__ == "__main__":
+    main()
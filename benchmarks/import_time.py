@@ -0,0 +1,99 @@
+"""
+Coût d'import au démarrage (python -X importtime)
+
+Pour chaque module, lance un interpréteur neuf avec -X importtime, garde
+le meilleur des --repetitions essais, et affiche :
+- le temps cumulé d'import du module
+- les N sous-imports les plus lourds
+- si les dépendances lourdes (matplotlib, reportlab, numpy) sont chargées
+
+Garde-fou : code de sortie 1 si `import main` charge la pile PDF
+(matplotlib / reportlab / pdf_generator) — elle doit rester paresseuse.
+
+Usage :
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py -m main pdf_generator --top 15
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+RACINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+MODULES_DEFAUT = ["main", "worker", "pdf_service", "pdf_generator", "simulateur_avs_lpp", "calculateur_batch"]
+LOURDS = ["matplotlib", "reportlab", "numpy", "PIL", "pdf_generator"]
+INTERDITS_MAIN = ["matplotlib", "reportlab", "pdf_generator"]
+
+
+def importtime(module: str) -> list:
+    """Retourne [(cumul_us, propre_us, nom, profondeur)] pour un import à froid."""
+    env = dict(os.environ)
+    # database.py exige DATABASE_URL ; create_engine ne se connecte pas
+    env.setdefault("DATABASE_URL", "postgresql+psycopg2://bench@localhost/bench?sslmode=disable")
+
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=RACINE, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} a échoué :\n{proc.stderr[-2000:]}")
+
+    lignes = []
+    for ligne in proc.stderr.splitlines():
+        if not ligne.startswith("import time:") or "self [us]" in ligne:
+            continue
+        propre, cumul, nom = ligne[len("import time:"):].split("|")
+        profondeur = (len(nom) - len(nom.lstrip()) - 1) // 2
+        lignes.append((int(cumul), int(propre), nom.strip(), profondeur))
+    return lignes
+
+
+def enfants_directs(lignes, module):
+    """Imports de premier niveau du module (listés avant lui dans la sortie)."""
+    i = next(i for i, l in enumerate(lignes) if l[2] == module and l[3] == 0)
+    enfants = []
+    for ligne in reversed(lignes[:i]):
+        if ligne[3] == 0:
+            break
+        if ligne[3] == 1:
+            enfants.append(ligne)
+    return enfants
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-m", "--modules", nargs="+", default=MODULES_DEFAUT)
+    parser.add_argument("-r", "--repetitions", type=int, default=3)
+    parser.add_argument("--top", type=int, default=8)
+    args = parser.parse_args()
+
+    echec = False
+    print(f"📈 Import à froid, meilleur de {args.repetitions} essais\n")
+
+    for module in args.modules:
+        essais = [importtime(module) for _ in range(args.repetitions)]
+        meilleur = min(essais, key=lambda l: next(c for c, _, n, _ in l if n == module))
+        total = next(c for c, _, n, _ in meilleur if n == module)
+        charges = {n for _, _, n, _ in meilleur}
+
+        lourds = [x for x in LOURDS if x in charges and x != module]
+        print(f"{module:20s} {total / 1000:8.1f} ms   lourds : {', '.join(lourds) or '—'}")
+
+        premiers = sorted(enfants_directs(meilleur, module), reverse=True)[:args.top]
+        for cumul, _, nom, _ in premiers:
+            print(f"    {cumul / 1000:8.1f} ms  {nom}")
+        print()
+
+        if module == "main":
+            fuites = [x for x in INTERDITS_MAIN if x in charges]
+            if fuites:
+                print(f"❌ import main charge la pile PDF : {', '.join(fuites)}\n")
+                echec = True
+
+    sys.exit(1 if echec else 0)
+
+
+if __name__ == "__main__":
+    main()
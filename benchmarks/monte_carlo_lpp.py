@@ -0,0 +1,57 @@
+"""
+Benchmark — projection LPP Monte Carlo (calculateur_monte_carlo)
+
+Mesure le temps de projeter_lpp_monte_carlo pour plusieurs nombres de
+chemins et durées, et le pic mémoire Python (tracemalloc) : avec la
+génération par blocs, seule la matrice float32 chemins × années croît
+avec le nombre de chemins.
+
+Usage :
+    python benchmarks/monte_carlo_lpp.py --chemins 1000 10000 100000 --repetitions 5
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from calculateur_monte_carlo import projeter_lpp_monte_carlo, MC_BLOC
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chemins", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--durees", type=int, nargs="+", default=[20, 40])
+    parser.add_argument("--repetitions", type=int, default=5)
+    parser.add_argument("--bloc", type=int, default=MC_BLOC)
+    args = parser.parse_args()
+
+    projeter_lpp_monte_carlo(40, 65, 90000, 100000, chemins=100, seed=0)  # chauffe (imports numpy)
+
+    print(f"📈 bloc={args.bloc}, médiane sur {args.repetitions} répétition(s)")
+    for duree in args.durees:
+        for chemins in args.chemins:
+            durees = []
+            for i in range(args.repetitions):
+                t0 = time.perf_counter()
+                r = projeter_lpp_monte_carlo(65 - duree, 65, 90000, 50000, chemins=chemins, seed=i, bloc=args.bloc)
+                durees.append(time.perf_counter() - t0)
+
+            tracemalloc.start()
+            projeter_lpp_monte_carlo(65 - duree, 65, 90000, 50000, chemins=chemins, seed=0, bloc=args.bloc)
+            pic = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            cf = r["capital_final"]
+            print(
+                f"{duree:2d} ans {chemins:7d} chemins  {statistics.median(durees) * 1000:8.1f} ms  "
+                f"pic={pic / 1e6:6.1f} Mo  P10/P50/P90={cf['p10']:,}/{cf['p50']:,}/{cf['p90']:,}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark — optimiseur de plans de rachat LPP (optimiseur_rachat)
+
+Temps de optimiser_rachats (génération + évaluation + top-k) selon le
+nombre de candidats, et évaluation vectorisée comparée à une boucle Python
+plan par plan sur les mêmes candidats.
+
+Usage :
+    python benchmarks/optimiseur_rachat.py --candidats 1000 4000 20000
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from calculateur_retraite import LPP
+from optimiseur_rachat import _impot_scalaire, evaluer_plans, generer_plans, optimiser_rachats
+
+PROFIL = dict(age_actuel=45, age_retraite=65, salaire_actuel=120000, potentiel=150000, plafond_annuel=40000)
+
+
+def boucle_python(plans, duree, revenu):
+    gains = []
+    for plan in plans.tolist():
+        economie, capital = 0.0, 0.0
+        for k, montant in enumerate(plan):
+            r = revenu * 1.005 ** k
+            economie += _impot_scalaire(r) - _impot_scalaire(r - montant)
+            capital += montant * (1 + LPP.TAUX_INTERET) ** (duree - k)
+        gains.append(capital * LPP.TAUX_CONVERSION * 20 + economie - sum(plan))
+    return gains
+
+
+def chrono(f, repetitions):
+    durees = []
+    for _ in range(repetitions):
+        t0 = time.perf_counter()
+        f()
+        durees.append(time.perf_counter() - t0)
+    return statistics.median(durees) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--candidats", type=int, nargs="+", default=[1000, 4000, 20000])
+    parser.add_argument("--repetitions", type=int, default=10)
+    args = parser.parse_args()
+
+    optimiser_rachats(**PROFIL, candidats=100)  # chauffe
+
+    print(f"📈 profil 45 → 65 ans, potentiel 150k, plafond 40k/an, 10 ans ; médiane sur {args.repetitions}")
+    for candidats in args.candidats:
+        plans = generer_plans(10, 150000, 40000, candidats)
+        total = chrono(lambda: optimiser_rachats(**PROFIL, candidats=candidats), args.repetitions)
+        vecto = chrono(lambda: evaluer_plans(plans, 20, 120000), args.repetitions)
+        boucle = chrono(lambda: boucle_python(plans, 20, 120000), max(1, args.repetitions // 5))
+        meilleur = optimiser_rachats(**PROFIL, candidats=candidats)['plans'][0]
+        print(
+            f"{candidats:6d} candidats  optimiser_rachats={total:7.1f} ms  évaluation : "
+            f"vectorisée={vecto:6.1f} ms  boucle={boucle:8.1f} ms  meilleur gain net={meilleur['gain_net']:,}"
+        )
+
+
+if __name__ == "__main__":
+    main()
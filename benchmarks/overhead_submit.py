@@ -0,0 +1,124 @@
+"""
+Micro-benchmark — surcoût de traitement de la requête /submit
+
+Mesure uniquement la partie "lecture du corps" du handler, sans calcul
+ni DB : deux routes minimales reproduisent l'ancien prologue de /submit
+(SubmitPayload + request.json() + print + model_dump) et le nouveau
+(SubmitPayload + model_dump, log redacté optionnel).
+
+Usage :
+    python benchmarks/overhead_submit.py -n 5000
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from schemas import SubmitPayload
+from charge_submit import payload_submit
+
+
+def mask_email(email: str) -> str:
+    # même masquage que main.mask_email (main n'est pas importé : il
+    # ouvrirait une connexion DB au chargement)
+    if not email or "@" not in email:
+        return ""
+    name, domain = email.split("@", 1)
+    return f"{name[0] + '***' if len(name) > 1 else '***'}@{domain[0] + '***' if len(domain) > 1 else '***'}"
+
+
+def payload_redacte(data: dict) -> dict:
+    redacte = dict(data)
+    for champ in ("prenom", "nom", "telephone"):
+        if redacte.get(champ):
+            redacte[champ] = "***"
+    redacte["email"] = mask_email(redacte.get("email") or "")
+    return redacte
+
+
+app = FastAPI()
+
+
+@app.post("/ancien")
+async def ancien(payload: SubmitPayload, request: Request):
+    data = await request.json()
+    print("PAYLOAD RECU =", data)
+    data = payload.model_dump()
+    return {"ok": True}
+
+
+@app.post("/nouveau")
+async def nouveau(payload: SubmitPayload):
+    data = payload.model_dump()
+    return {"ok": True}
+
+
+@app.post("/nouveau-debug")
+async def nouveau_debug(payload: SubmitPayload):
+    data = payload.model_dump()
+    print("🧾 /submit payload:", json.dumps(payload_redacte(data), ensure_ascii=False))
+    return {"ok": True}
+
+
+def mesurer(client, route, corps, n):
+    # les print partent dans un tampon : on mesure le formatage, pas le terminal
+    with contextlib.redirect_stdout(io.StringIO()):
+        for corps_i in corps[:50]:
+            client.post(route, content=corps_i, headers={"content-type": "application/json"})
+        t0 = time.perf_counter()
+        for i in range(n):
+            r = client.post(route, content=corps[i % len(corps)], headers={"content-type": "application/json"})
+        duree = time.perf_counter() - t0
+    assert r.status_code == 200, r.text
+    return duree / n * 1e6
+
+
+def mesurer_prologue(corps, n):
+    """Même travail que les handlers, hors HTTP : isole le coût du double parsing."""
+    def ancien_prologue(b):
+        payload = SubmitPayload.model_validate_json(b)
+        data = json.loads(b)
+        print("PAYLOAD RECU =", data)
+        return payload.model_dump()
+
+    def nouveau_prologue(b):
+        return SubmitPayload.model_validate_json(b).model_dump()
+
+    resultats = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        for nom, fn in (("ancien", ancien_prologue), ("nouveau", nouveau_prologue)):
+            t0 = time.perf_counter()
+            for i in range(n):
+                fn(corps[i % len(corps)])
+            resultats[nom] = (time.perf_counter() - t0) / n * 1e6
+    return resultats
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--requetes", type=int, default=5000)
+    args = parser.parse_args()
+
+    corps = [json.dumps(payload_submit(i)).encode() for i in range(500)]
+    client = TestClient(app)
+
+    print(f"📈 {args.requetes} requêtes par route (TestClient, sans réseau)")
+    for route in ("/ancien", "/nouveau", "/nouveau-debug"):
+        print(f"{route:15s} {mesurer(client, route, corps, args.requetes):8.1f} µs/requête")
+
+    print(f"\n📈 prologue seul ({args.requetes * 10} itérations, sans HTTP)")
+    for nom, us in mesurer_prologue(corps, args.requetes * 10).items():
+        print(f"{nom:15s} {us:8.2f} µs/requête")
+
+
+if __name__ == "__main__":
+    main()
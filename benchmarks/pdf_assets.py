@@ -0,0 +1,70 @@
+"""
+Benchmark — rendu PDF avec / sans cache d'assets (logo)
+
+Rend le même rapport N fois avec PDF_CACHE_ASSETS désactivé puis activé,
+et affiche le temps moyen par rapport et la taille du PDF. Avec les
+graphiques matplotlib (défaut), leur rendu domine le temps : mesurer le
+coût des assets avec le backend reportlab.
+
+Usage :
+    PDF_CHART_BACKEND=reportlab python benchmarks/pdf_assets.py -n 30
+    PDF_CHART_BACKEND=reportlab PDF_IMAGES_ASCII85=true python benchmarks/pdf_assets.py -n 30
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import pdf_generator
+from pdf_generator import generer_pdf_bytes
+from simulateur_avs_lpp import calcul_complet_retraite
+
+DONNEES = {
+    "prenom": "Anne", "nom": "Test", "email": "anne@example.com", "telephone": None,
+    "statut_civil": "marie", "statut_pro": "salarie",
+    "age_actuel": 45, "age_retraite": 65,
+    "salaire_actuel": 90000, "salaire_moyen": 80000,
+    "annees_cotisees": 20, "annees_cotisees_lpp": 20,
+    "annees_be": 0, "annees_ba": 0,
+    "capital_lpp": 150000, "rente_conjoint": 0,
+    "has_3eme_pilier": False, "type_3eme_pilier": None,
+}
+
+
+def mesurer(n, resultats):
+    durees = []
+    taille = None
+    # generer_pdf_retraite imprime ses DEBUG : on les coupe pendant la mesure
+    with contextlib.redirect_stdout(io.StringIO()):
+        generer_pdf_bytes(DONNEES, resultats)  # premier rendu (cache, polices)
+        for _ in range(n):
+            t0 = time.perf_counter()
+            pdf = generer_pdf_bytes(DONNEES, resultats)
+            durees.append(time.perf_counter() - t0)
+            taille = len(pdf)
+    return statistics.mean(durees), statistics.median(durees), taille
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--rendus", type=int, default=10)
+    args = parser.parse_args()
+
+    resultats = calcul_complet_retraite(DONNEES)
+
+    print(f"📈 {args.rendus} rendus par configuration (DPI assets : {pdf_generator.PDF_ASSETS_DPI:.0f})")
+    for actif in (False, True):
+        pdf_generator.PDF_CACHE_ASSETS = actif
+        moyenne, mediane, taille = mesurer(args.rendus, resultats)
+        nom = "cache assets" if actif else "sans cache"
+        print(f"{nom:14s} moy={moyenne * 1000:7.1f} ms  médiane={mediane * 1000:7.1f} ms  PDF={taille / 1024:8.1f} Ko")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Benchmark — projection LPP en colonnes vs une ligne (objet/dict) par année
+
+Ancien chemin (reproduit ici) : un ProjectionAnnuelle par année dans
+calculer_lpp, copié en dict par calculer_retraite_complete, puis recopié en
+{"age", "capital"} pour capital_history. Nouveau chemin : ProjectionLPP
+(une liste par colonne) partagée jusqu'au JSON.
+
+Mesure : temps du pipeline, blocs alloués et pic mémoire (tracemalloc),
+taille JSON de capital_history et de la projection complète.
+
+Usage :
+    python benchmarks/projection_lpp.py --repetitions 2000
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from calculateur_retraite import (
+    LPP, ProjectionAnnuelle, calculer_lpp, calculer_salaire_coordonne, get_taux_epargne,
+)
+
+PROFILS = [(25, 65, 60000, 0), (45, 65, 85000, 150000)]
+
+
+def pipeline_lignes(age_actuel, age_retraite, salaire, capital):
+    """Représentation précédente : objet par année, puis deux copies en dicts."""
+    projection = []
+    for age in range(age_actuel, age_retraite):
+        taux_epargne = get_taux_epargne(age)
+        salaire_coordonne = calculer_salaire_coordonne(salaire)
+        cotisation = salaire_coordonne * taux_epargne
+        interets = capital * LPP.TAUX_INTERET
+        projection.append(ProjectionAnnuelle(
+            age=age, salaire=round(salaire), salaire_coordonne=round(salaire_coordonne),
+            taux_epargne=round(taux_epargne * 100, 2), cotisation=round(cotisation),
+            interets=round(interets), capital_debut=round(capital),
+            capital_fin=round(capital + cotisation + interets),
+        ))
+        capital += cotisation + interets
+        salaire *= 1.005
+    lignes = [
+        {
+            'age': p.age, 'salaire': p.salaire, 'salaire_coordonne': p.salaire_coordonne,
+            'taux_epargne': p.taux_epargne, 'cotisation': p.cotisation, 'interets': p.interets,
+            'capital_debut': p.capital_debut, 'capital_fin': p.capital_fin,
+        }
+        for p in projection
+    ]
+    capital_history = [{"age": p["age"], "capital": p["capital_fin"]} for p in lignes]
+    return lignes, capital_history
+
+
+def pipeline_colonnes(age_actuel, age_retraite, salaire, capital):
+    projection = calculer_lpp(age_actuel, age_retraite, salaire, capital).projection
+    colonnes = projection.colonnes()
+    capital_history = {"age": colonnes["age"], "capital_fin": colonnes["capital_fin"]}
+    return colonnes, capital_history
+
+
+def mesurer(pipeline, profil, repetitions):
+    t0 = time.perf_counter()
+    for _ in range(repetitions):
+        pipeline(*profil)
+    duree = (time.perf_counter() - t0) / repetitions
+
+    tracemalloc.start()
+    avant = tracemalloc.take_snapshot()
+    resultat = pipeline(*profil)
+    apres = tracemalloc.take_snapshot()
+    pic = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    stats = apres.compare_to(avant, "filename")
+    blocs = sum(s.count_diff for s in stats if s.count_diff > 0)
+    return duree, blocs, pic, resultat
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repetitions", type=int, default=2000)
+    args = parser.parse_args()
+
+    for profil in PROFILS:
+        annees = profil[1] - profil[0]
+        print(f"📈 {annees} années de projection ({profil[0]} → {profil[1]} ans)")
+        for nom, pipeline in (("lignes", pipeline_lignes), ("colonnes", pipeline_colonnes)):
+            duree, blocs, pic, (projection, history) = mesurer(pipeline, profil, args.repetitions)
+            taille_projection = len(json.dumps(projection, separators=(",", ":")))
+            taille_history = len(json.dumps(history, separators=(",", ":")))
+            print(
+                f"  {nom:9s} {duree * 1e6:7.1f} µs  blocs alloués={blocs:5d}  pic={pic / 1024:6.1f} Ko  "
+                f"JSON projection={taille_projection:5d} o  capital_history={taille_history:4d} o"
+            )
+
+
+if __name__ == "__main__":
+    main()
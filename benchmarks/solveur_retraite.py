@@ -0,0 +1,81 @@
+"""
+Benchmark — solveur inverse (solveur_retraite) sur des profils aléatoires
+
+Temps par résolution (rachat minimal, âge minimal) comparé à la recherche
+« à la main » : calculer_retraite_complete appelé en boucle, par pas de
+1000 CHF de rachat ou d'un an d'âge.
+
+Usage :
+    python benchmarks/solveur_retraite.py -n 500
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import numpy as np
+
+from calculateur_retraite import calculer_retraite_complete
+from solveur_retraite import resoudre_age_retraite, resoudre_rachat
+
+
+def profils(n: int, seed: int = 1):
+    rng = np.random.default_rng(seed)
+    for _ in range(n):
+        age = int(rng.integers(25, 60))
+        yield dict(
+            age_actuel=age,
+            statut_civil='celibataire',
+            salaire_actuel=float(rng.uniform(40000, 150000)),
+            salaire_moyen=float(rng.uniform(40000, 100000)),
+            annees_cotisees=max(0, age - 21),
+            capital_lpp=float(rng.uniform(0, 300000)),
+        ), float(rng.uniform(4500, 7000))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--profils", type=int, default=500)
+    args = parser.parse_args()
+
+    mesures = {"rachat (bisection)": [], "rachat (pas de 1000 CHF)": [], "âge (balayage)": [], "âge (boucle scalaire)": []}
+    evaluations = []
+
+    for p, cible in profils(args.profils):
+        t0 = time.perf_counter()
+        r = resoudre_rachat(cible, age_retraite=65, **p)
+        mesures["rachat (bisection)"].append(time.perf_counter() - t0)
+        evaluations.append(r['evaluations'])
+
+        t0 = time.perf_counter()
+        rachat = 0.0
+        while rachat <= 2_000_000:
+            q = dict(p, capital_lpp=p['capital_lpp'] + rachat)
+            if calculer_retraite_complete(age_retraite=65, **q)['total'] >= cible:
+                break
+            rachat += 1000
+        mesures["rachat (pas de 1000 CHF)"].append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        resoudre_age_retraite(cible, age_min=p['age_actuel'], age_max=70, **p)
+        mesures["âge (balayage)"].append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        for age in range(p['age_actuel'], 71):
+            if calculer_retraite_complete(age_retraite=age, **p)['total'] >= cible:
+                break
+        mesures["âge (boucle scalaire)"].append(time.perf_counter() - t0)
+
+    print(f"📈 {args.profils} profils (médiane / p99 par résolution)")
+    for nom, durees in mesures.items():
+        durees.sort()
+        print(f"{nom:26s} p50={statistics.median(durees) * 1000:8.3f} ms  p99={durees[int(0.99 * (len(durees) - 1))] * 1000:8.3f} ms")
+    print(f"évaluations bisection : médiane {statistics.median(evaluations):.0f}, max {max(evaluations)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+import os
+import threading
+import time
+from collections import deque
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+from urllib3.util.retry import Retry
+
+# =========================================================
+# CLIENT HTTP BREVO PARTAGÉ
+# =========================================================
+# Une seule requests.Session par processus :
+# - keep-alive : la connexion TLS vers api.brevo.com est réutilisée d'un
+#   email à l'autre (une poignée de main par connexion du pool, pas par envoi)
+# - pool de BREVO_MAX_CONNEXIONS connexions, partagé par tous les threads
+# - au plus BREVO_CONCURRENCE appels simultanés (sémaphore) : un pic de
+#   commandes ne sature pas le quota Brevo
+# - retries avec backoff exponentiel (urllib3) sur 429 / 503 et sur les
+#   échecs de connexion, en respectant Retry-After. Pas de retry après un
+#   timeout de lecture ni sur 500 / 502 / 504 : Brevo (ou la passerelle
+#   devant lui) a pu accepter l'email, un retry l'enverrait deux fois
+#
+# HTTP/2 : requests / urllib3 ne parlent que HTTP/1.1 ; le keep-alive du
+# pool couvre l'essentiel du gain (pas de nouvelle poignée de main TLS).
+
+BREVO_API_KEY = os.getenv("BREVO_API_KEY")
+BREVO_URL = os.getenv("BREVO_URL", "https://api.brevo.com/v3/smtp/email")
+BREVO_MAX_CONNEXIONS = int(os.getenv("BREVO_MAX_CONNEXIONS", "10"))
+BREVO_CONCURRENCE = int(os.getenv("BREVO_CONCURRENCE", "8"))
+BREVO_TENTATIVES = int(os.getenv("BREVO_TENTATIVES", "4"))
+BREVO_BACKOFF_SECONDES = float(os.getenv("BREVO_BACKOFF_SECONDES", "0.5"))
+BREVO_TIMEOUT_CONNEXION = float(os.getenv("BREVO_TIMEOUT_CONNEXION", "3"))
+BREVO_TIMEOUT_LECTURE = float(os.getenv("BREVO_TIMEOUT_LECTURE", "10"))
+
+STATUTS_RETRY = (429, 503)  # refus explicites : l'email n'a pas été accepté
+
+
+def jamais_parti(erreur: Exception) -> bool:
+    """Vrai si la requête n'a pas pu partir (connexion impossible) : renvoi sans risque."""
+    if isinstance(erreur, requests.ConnectTimeout):
+        return True
+    raison = getattr(erreur.args[0], "reason", None) if erreur.args else None
+    return isinstance(erreur, requests.ConnectionError) and isinstance(raison, NewConnectionError)
+
+
+def _percentile(valeurs: list, p: float):
+    if not valeurs:
+        return None
+    valeurs = sorted(valeurs)
+    return valeurs[min(len(valeurs) - 1, int(p * len(valeurs)))]
+
+
+class ClientBrevo:
+    def __init__(
+        self,
+        url: str = BREVO_URL,
+        api_key: str = BREVO_API_KEY,
+        max_connexions: int = BREVO_MAX_CONNEXIONS,
+        concurrence: int = BREVO_CONCURRENCE,
+        tentatives: int = BREVO_TENTATIVES,
+        backoff: float = BREVO_BACKOFF_SECONDES,
+    ):
+        self.url = url
+        self.api_key = api_key
+        self._places = threading.BoundedSemaphore(concurrence)
+        self._lock = threading.Lock()
+
+        retry = Retry(
+            total=tentatives - 1,
+            connect=tentatives - 1,
+            read=0,
+            status=tentatives - 1,
+            status_forcelist=STATUTS_RETRY,
+            allowed_methods=frozenset({"POST"}),
+            backoff_factor=backoff,
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_connexions, max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "accept": "application/json",
+            "content-type": "application/json",
+        })
+
+        self.concurrence = concurrence
+        self.appels = 0
+        self.erreurs = 0
+        self.par_statut = {}
+        self._latences = deque(maxlen=1000)
+
+    def envoyer(self, payload: dict, url: str = None) -> requests.Response:
+        """
+        POST JSON vers Brevo (retries inclus). Retourne la réponse finale,
+        lève requests.RequestException si Brevo reste injoignable.
+        """
+        debut = time.perf_counter()
+        statut = None
+        try:
+            with self._places:
+                resp = self.session.post(
+                    url or self.url,
+                    json=payload,
+                    headers={"api-key": self.api_key or ""},
+                    timeout=(BREVO_TIMEOUT_CONNEXION, BREVO_TIMEOUT_LECTURE),
+                )
+            statut = resp.status_code
+            return resp
+        finally:
+            duree = time.perf_counter() - debut
+            with self._lock:
+                self.appels += 1
+                self._latences.append(duree)
+                cle = str(statut) if statut is not None else "exception"
+                self.par_statut[cle] = self.par_statut.get(cle, 0) + 1
+                if statut is None or statut >= 400:
+                    self.erreurs += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            latences = list(self._latences)
+            return {
+                "url": self.url,
+                "concurrence": self.concurrence,
+                "appels": self.appels,
+                "erreurs": self.erreurs,
+                "par_statut": dict(self.par_statut),
+                "latence_p50_ms": round(_percentile(latences, 0.5) * 1000, 1) if latences else None,
+                "latence_p99_ms": round(_percentile(latences, 0.99) * 1000, 1) if latences else None,
+            }
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client_brevo() -> ClientBrevo:
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = ClientBrevo()
+    return _client
+
+
+# =========================================================
+# TESTS (contre fake_brevo)
+# =========================================================
+def test_brevo_client():
+    from concurrent.futures import ThreadPoolExecutor
+    from fake_brevo import demarrer_fake_brevo
+
+    print("=== TEST 1: envoi et réutilisation de la connexion ===")
+    serveur, url = demarrer_fake_brevo()
+    try:
+        client = ClientBrevo(url=url, api_key="test")
+        for _ in range(5):
+            assert client.envoyer({"to": [{"email": "a@example.com"}]}).status_code == 201
+        assert len(serveur.recus) == 5
+        assert serveur.connexions == 1, serveur.connexions
+        print("✅ OK")
+    finally:
+        serveur.arreter()
+
+    print("=== TEST 2: retry sur 429 puis 503 ===")
+    serveur, url = demarrer_fake_brevo(statuts_forces=[429, 503])
+    try:
+        client = ClientBrevo(url=url, api_key="test", backoff=0.01)
+        assert client.envoyer({"to": [{"email": "a@example.com"}]}).status_code == 201
+        assert serveur.requetes == 3, serveur.requetes
+        assert len(serveur.recus) == 1
+        print("✅ OK")
+    finally:
+        serveur.arreter()
+
+    print("=== TEST 3: pas de retry sur 500 / 502 / 504 (réponse ambiguë), erreur comptée ===")
+    for statut in (500, 502, 504):
+        serveur, url = demarrer_fake_brevo(statuts_forces=[statut])
+        try:
+            client = ClientBrevo(url=url, api_key="test", backoff=0.01)
+            assert client.envoyer({}).status_code == statut
+            assert serveur.requetes == 1, (statut, serveur.requetes)
+            assert client.stats()["erreurs"] == 1
+        finally:
+            serveur.arreter()
+    print("✅ OK")
+
+    print("=== TEST 4: concurrence bornée ===")
+    serveur, url = demarrer_fake_brevo(latence=0.05)
+    try:
+        client = ClientBrevo(url=url, api_key="test", concurrence=3)
+        with ThreadPoolExecutor(12) as pool:
+            list(pool.map(lambda _: client.envoyer({}), range(24)))
+        assert serveur.max_simultanes <= 3, serveur.max_simultanes
+        assert client.stats()["appels"] == 24
+        print("✅ OK")
+    finally:
+        serveur.arreter()
+
+
+if __name__ == "__main__":
+    test_brevo_client()
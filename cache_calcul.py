@@ -0,0 +1,77 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+
+class CacheLRU:
+    """
+    Cache borné LRU + TTL, thread-safe.
+
+    - taille_max : au-delà, l'entrée la moins récemment utilisée est évincée
+    - ttl_secondes : une entrée plus ancienne est considérée absente
+    - les valeurs sont copiées (deepcopy) à l'entrée et à la sortie :
+      l'appelant peut modifier le résultat sans corrompre le cache
+    """
+
+    def __init__(self, taille_max: int = 1024, ttl_secondes: float = 3600):
+        self.taille_max = taille_max
+        self.ttl_secondes = ttl_secondes
+        self._entrees = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, cle):
+        """Retourne (trouve, valeur)."""
+        with self._lock:
+            entree = self._entrees.get(cle)
+            if entree is None:
+                self.misses += 1
+                return False, None
+
+            expire_a, valeur = entree
+            if time.monotonic() >= expire_a:
+                del self._entrees[cle]
+                self.expirations += 1
+                self.misses += 1
+                return False, None
+
+            self._entrees.move_to_end(cle)
+            self.hits += 1
+
+        return True, copy.deepcopy(valeur)
+
+    def set(self, cle, valeur):
+        valeur = copy.deepcopy(valeur)
+        with self._lock:
+            self._entrees[cle] = (time.monotonic() + self.ttl_secondes, valeur)
+            self._entrees.move_to_end(cle)
+
+            while len(self._entrees) > self.taille_max:
+                self._entrees.popitem(last=False)
+                self.evictions += 1
+
+    def vider(self):
+        with self._lock:
+            if self._entrees:
+                self.invalidations += 1
+            self._entrees.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "taille": len(self._entrees),
+                "taille_max": self.taille_max,
+                "ttl_secondes": self.ttl_secondes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
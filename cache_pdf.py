@@ -0,0 +1,207 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+# =========================================================
+# CACHE DE PDF ADRESSÉ PAR CONTENU
+# =========================================================
+# Clé = sha256(donnees + resultat + signature de rendu + date du jour).
+# - la signature de rendu (TEMPLATE_VERSION, backend graphique, DPI) vient
+#   de pdf_generator : changer le gabarit invalide tout le cache
+# - le PDF imprime la date de génération : la clé contient le jour, un
+#   renvoi le lendemain refait le rendu plutôt que de servir une date périmée
+#
+# Stockage : un fichier par clé dans PDF_CACHE_DIR (partagé entre le
+# processus web et le worker de jobs d'une même machine). Un accès remet
+# l'mtime à jour ; au-delà de PDF_CACHE_MAX_MO, les fichiers les plus
+# anciens (mtime) sont supprimés jusqu'à 90 % de la limite.
+
+PDF_CACHE = os.getenv("PDF_CACHE", "true").strip().lower() in ("1", "true", "yes", "oui", "on")
+PDF_CACHE_DIR = os.getenv("PDF_CACHE_DIR", os.path.join(tempfile.gettempdir(), "retraite_pdf_cache"))
+PDF_CACHE_MAX_MO = float(os.getenv("PDF_CACHE_MAX_MO", "500"))
+
+
+def cle_pdf(donnees, resultats, signature: str, jour: str = None) -> str:
+    """Empreinte stable (ordre des clés JSONB indifférent)."""
+    contenu = json.dumps(
+        {
+            "donnees": donnees,
+            "resultat": resultats,
+            "signature": signature,
+            "jour": jour or time.strftime("%Y-%m-%d"),
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(contenu.encode("utf-8")).hexdigest()
+
+
+class CachePDF:
+    def __init__(self, dossier: str = PDF_CACHE_DIR, max_octets: int = int(PDF_CACHE_MAX_MO * 1024 * 1024)):
+        self.dossier = dossier
+        self.max_octets = max_octets
+        self._lock = threading.Lock()
+        self._taille = None  # estimée ; recalculée à chaque éviction
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        os.makedirs(dossier, exist_ok=True)
+
+    def _chemin(self, cle: str) -> str:
+        return os.path.join(self.dossier, cle[:2], f"{cle}.pdf")
+
+    def _fichiers(self) -> list:
+        """[(mtime, taille, chemin)] de tous les PDF du cache."""
+        fichiers = []
+        for racine, _, noms in os.walk(self.dossier):
+            for nom in noms:
+                if not nom.endswith(".pdf"):
+                    continue
+                chemin = os.path.join(racine, nom)
+                try:
+                    st = os.stat(chemin)
+                except FileNotFoundError:
+                    continue  # évincé par un autre processus
+                fichiers.append((st.st_mtime, st.st_size, chemin))
+        return fichiers
+
+    def lire(self, cle: str):
+        """Octets du PDF en cache, ou None."""
+        chemin = self._chemin(cle)
+        try:
+            with open(chemin, "rb") as f:
+                pdf_bytes = f.read()
+            os.utime(chemin)  # LRU : l'accès rajeunit le fichier
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return pdf_bytes
+
+    def ecrire(self, cle: str, pdf_bytes: bytes):
+        chemin = self._chemin(cle)
+        os.makedirs(os.path.dirname(chemin), exist_ok=True)
+
+        # écriture atomique : un lecteur concurrent ne voit jamais un PDF tronqué
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(chemin), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(pdf_bytes)
+            os.replace(tmp, chemin)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+        with self._lock:
+            if self._taille is None:
+                self._taille = sum(t for _, t, _ in self._fichiers())
+            else:
+                self._taille += len(pdf_bytes)
+            trop_plein = self._taille > self.max_octets
+
+        if trop_plein:
+            self._evincer()
+
+    def _evincer(self):
+        """Supprime les moins récemment utilisés jusqu'à 90 % de la limite."""
+        with self._lock:
+            fichiers = sorted(self._fichiers())
+            taille = sum(t for _, t, _ in fichiers)
+            cible = self.max_octets * 0.9
+
+            for _, t, chemin in fichiers:
+                if taille <= cible:
+                    break
+                try:
+                    os.remove(chemin)
+                    self.evictions += 1
+                except FileNotFoundError:
+                    pass
+                taille -= t
+
+            self._taille = taille
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "dossier": self.dossier,
+                "max_mo": round(self.max_octets / 1024 / 1024, 1),
+                "taille_mo": round(self._taille / 1024 / 1024, 1) if self._taille is not None else None,
+                "hits": self.hits,
+                "misses": self.misses,
+                "taux_hit": round(self.hits / total, 3) if total else None,
+                "evictions": self.evictions,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache_pdf():
+    """Cache partagé du processus, ou None si PDF_CACHE=false."""
+    global _cache
+    if not PDF_CACHE:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = CachePDF()
+    return _cache
+
+
+# =========================================================
+# TESTS
+# =========================================================
+def test_cache_pdf():
+    import shutil
+
+    dossier = tempfile.mkdtemp()
+    try:
+        print("=== TEST 1: clé stable, sensible au contenu et à la signature ===")
+        a = cle_pdf({"x": 1, "y": [1, 2]}, {"r": 2.5}, "v1", "2026-01-01")
+        assert a == cle_pdf({"y": [1, 2], "x": 1}, {"r": 2.5}, "v1", "2026-01-01")
+        assert a != cle_pdf({"x": 1, "y": [1, 2]}, {"r": 2.6}, "v1", "2026-01-01")
+        assert a != cle_pdf({"x": 1, "y": [1, 2]}, {"r": 2.5}, "v2", "2026-01-01")
+        assert a != cle_pdf({"x": 1, "y": [1, 2]}, {"r": 2.5}, "v1", "2026-01-02")
+        print("✅ OK")
+
+        print("=== TEST 2: lecture / écriture ===")
+        cache = CachePDF(dossier, max_octets=10_000)
+        assert cache.lire(a) is None
+        cache.ecrire(a, b"%PDF-a")
+        assert cache.lire(a) == b"%PDF-a"
+        assert (cache.hits, cache.misses) == (1, 1)
+        print("✅ OK")
+
+        print("=== TEST 3: éviction LRU par taille ===")
+        cles = [cle_pdf({"i": i}, {}, "v1") for i in range(12)]
+        for i, cle in enumerate(cles[:9]):
+            cache.ecrire(cle, bytes(1000))
+            os.utime(cache._chemin(cle), (1000 + i, 1000 + i))
+        cache.lire(cles[0])  # cles[0] redevient le plus récent
+        for cle in cles[9:]:
+            cache.ecrire(cle, bytes(1000))
+        assert cache.lire(cles[0]) is not None
+        assert cache.lire(cles[1]) is None
+        assert sum(t for _, t, _ in cache._fichiers()) <= 10_000
+        assert cache.evictions > 0
+        print("✅ OK")
+    finally:
+        shutil.rmtree(dossier)
+
+
+if __name__ == "__main__":
+    test_cache_pdf()
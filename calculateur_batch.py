@@ -0,0 +1,649 @@
+"""
+Calculateur de Retraite Suisse (AVS/LPP) 2025 — moteur batch vectorisé
+Mêmes formules que calculateur_retraite.calculer_retraite_complete, appliquées
+à des colonnes de profils (NumPy) pour la re-simulation de toute la table
+`simulations`. La fonction scalaire reste la référence : test_parite_batch()
+compare les deux au centime près.
+"""
+
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from calculateur_retraite import (
+    AVS, LPP, calculer_retraite_complete, calculer_salaire_coordonne, get_taux_epargne,
+)
+
+
+# ============================================================================
+# UTILITAIRES
+# ============================================================================
+
+def _arrondi(x: np.ndarray, decimales: int = 0) -> np.ndarray:
+    """
+    Arrondi vectorisé identique au round() Python (arrondi bancaire sur la
+    valeur binaire exacte).
+
+    np.rint(x * 10**d) / 10**d diffère de round(x, d) uniquement quand
+    x * 10**d tombe (à l'erreur flottante près) sur une demi-unité : ces
+    quelques valeurs sont recalculées avec round() pour garantir la parité.
+    """
+    x = np.asarray(x, dtype=float)
+    if decimales == 0:
+        return np.rint(x)
+
+    facteur = 10.0 ** decimales
+    y = x * facteur
+    resultat = np.rint(y) / facteur
+
+    douteux = np.abs(np.abs(y - np.floor(y)) - 0.5) < 1e-6
+    if douteux.any():
+        for i in np.flatnonzero(douteux):
+            resultat.flat[i] = round(float(x.flat[i]), decimales)
+    return resultat
+
+
+def _colonne(valeurs, n: int, dtype=float) -> np.ndarray:
+    """Convertit un scalaire ou une séquence en colonne de longueur n."""
+    arr = np.asarray(valeurs, dtype=dtype)
+    if arr.ndim == 0:
+        return np.full(n, arr, dtype=dtype)
+    if arr.shape != (n,):
+        raise ValueError(f"Colonne de taille {arr.shape} (attendu: ({n},))")
+    return arr
+
+
+# ============================================================================
+# LPP / AVS VECTORISÉS
+# ============================================================================
+
+def taux_epargne_batch(age: np.ndarray) -> np.ndarray:
+    """Version vectorisée de get_taux_epargne."""
+    return np.select(
+        [age < 25, age <= 34, age <= 44, age <= 54],
+        [0.0, LPP.TAUX_EPARGNE[25], LPP.TAUX_EPARGNE[35], LPP.TAUX_EPARGNE[45]],
+        default=LPP.TAUX_EPARGNE[55],
+    )
+
+
+def salaire_coordonne_batch(salaire_brut: np.ndarray) -> np.ndarray:
+    """Version vectorisée de calculer_salaire_coordonne."""
+    salaire_assure = np.minimum(salaire_brut, LPP.SALAIRE_MAX)
+    return np.where(
+        salaire_brut < LPP.SALAIRE_MIN,
+        0.0,
+        np.maximum(0.0, salaire_assure - LPP.DEDUCTION_COORD),
+    )
+
+
+def calculer_lpp_batch(
+    age_actuel: np.ndarray,
+    age_retraite: np.ndarray,
+    salaire_actuel: np.ndarray,
+    capital_initial: np.ndarray,
+    progression_salariale: float = 0.005
+) -> Dict[str, np.ndarray]:
+    """
+    Accumulation LPP de tous les profils en parallèle
+
+    La boucle porte sur les années (au plus ~60 itérations), chaque itération
+    traitant toutes les lignes d'un coup. Aucune projection détaillée n'est
+    construite : seuls les cumuls arrondis année par année sont conservés,
+    exactement comme calculer_lpp.
+
+    Returns:
+        Colonnes capital_final, rente_mensuelle, salaire_coordonne,
+        total_cotisations, total_interets
+    """
+    duree = age_retraite - age_actuel
+    capital = capital_initial.astype(float)
+    salaire = salaire_actuel.astype(float)
+    total_cotisations = np.zeros(len(capital))
+    total_interets = np.zeros(len(capital))
+
+    for k in range(int(duree.max(initial=0))):
+        actif = k < duree
+        taux_epargne = taux_epargne_batch(age_actuel + k)
+        cotisation_annuelle = salaire_coordonne_batch(salaire) * taux_epargne
+        interets = capital * LPP.TAUX_INTERET
+
+        total_cotisations += np.where(actif, _arrondi(cotisation_annuelle), 0.0)
+        total_interets += np.where(actif, _arrondi(interets), 0.0)
+
+        capital = np.where(actif, capital + (cotisation_annuelle + interets), capital)
+        salaire = np.where(actif, salaire * (1 + progression_salariale), salaire)
+
+    rente_mensuelle = (capital * LPP.TAUX_CONVERSION) / 12
+
+    return {
+        'capital_initial': capital_initial.astype(float),
+        'capital_final': _arrondi(capital),
+        'rente_mensuelle': _arrondi(rente_mensuelle, 2),
+        'salaire_coordonne': salaire_coordonne_batch(salaire_actuel),
+        'total_cotisations': total_cotisations,
+        'total_interets': total_interets,
+    }
+
+
+def calculer_avs_batch(
+    salaire_moyen: np.ndarray,
+    annees_cotisees: np.ndarray,
+    annees_bonif_education: np.ndarray,
+    annees_bonif_assistance: np.ndarray
+) -> Dict[str, np.ndarray]:
+    """Version vectorisée de calculer_avs (échelle 44)."""
+    avec_annees = annees_cotisees > 0
+    diviseur = np.where(avec_annees, annees_cotisees, 1)
+
+    total_bonifications = np.where(
+        avec_annees,
+        ((annees_bonif_education + annees_bonif_assistance) * AVS.BONIF_CREDIT_ANNUEL) / diviseur,
+        0.0,
+    )
+
+    ramd = np.minimum(salaire_moyen + total_bonifications, AVS.RAMD_MAX * 1.5)
+
+    ratio = ramd / AVS.RAMD_MAX
+    rente_complete = np.select(
+        [ramd >= AVS.RAMD_MAX, ramd <= AVS.RAMD_MAX / 3],
+        [AVS.RENTE_MAX, AVS.RENTE_MIN],
+        default=AVS.RENTE_MIN + (AVS.RENTE_MAX - AVS.RENTE_MIN) * ratio,
+    )
+
+    annees_manquantes = np.maximum(0, AVS.CARRIERE_PLEINE - annees_cotisees)
+    taux_reduction = annees_manquantes * AVS.REDUCTION_PAR_ANNEE
+    rente_finale_brute = rente_complete * (1 - np.minimum(taux_reduction, 1.0))
+
+    rente_min_proportionnelle = AVS.RENTE_MIN * (annees_cotisees / AVS.CARRIERE_PLEINE)
+    rente_finale = np.where(
+        avec_annees,
+        np.maximum(rente_finale_brute, rente_min_proportionnelle),
+        0.0,
+    )
+
+    return {
+        'rente': _arrondi(rente_finale, 2),
+        'rente_complete': _arrondi(rente_complete, 2),
+        'ramd': _arrondi(ramd),
+        'annees_manquantes': annees_manquantes,
+        'taux_reduction': _arrondi(taux_reduction * 100, 1),
+        'bonifications': _arrondi(total_bonifications),
+    }
+
+
+# ============================================================================
+# FONCTION PRINCIPALE BATCH
+# ============================================================================
+
+def calculer_retraite_batch(
+    age_actuel,
+    age_retraite,
+    statut_civil,
+    salaire_actuel,
+    salaire_moyen,
+    annees_cotisees,
+    annees_bonif_education=0,
+    annees_bonif_assistance=0,
+    capital_lpp=0.0,
+    situation_conjoint=None,
+    rente_conjoint=np.nan
+) -> Dict:
+    """
+    Calcule la projection de retraite complète pour N profils en colonnes
+
+    Chaque argument accepte un scalaire (diffusé à toutes les lignes) ou une
+    séquence de longueur N. Pour rente_conjoint, NaN remplace le None de la
+    version scalaire.
+
+    Returns:
+        Dictionnaire de colonnes NumPy avec la même structure que
+        calculer_retraite_complete (sans la projection annuelle détaillée).
+        Les scénarios sont regroupés par type avec un masque 'eligible'.
+    """
+    age_actuel = np.atleast_1d(np.asarray(age_actuel, dtype=np.int64))
+    n = len(age_actuel)
+
+    age_retraite = _colonne(age_retraite, n, np.int64)
+    statut_civil = _colonne(statut_civil, n, object)
+    salaire_actuel = _colonne(salaire_actuel, n)
+    salaire_moyen = _colonne(salaire_moyen, n)
+    annees_cotisees = _colonne(annees_cotisees, n, np.int64)
+    annees_bonif_education = _colonne(annees_bonif_education, n, np.int64)
+    annees_bonif_assistance = _colonne(annees_bonif_assistance, n, np.int64)
+    capital_lpp = _colonne(capital_lpp, n)
+    situation_conjoint = _colonne(situation_conjoint, n, object)
+    rente_conjoint = _colonne(rente_conjoint, n)
+
+    lpp = calculer_lpp_batch(age_actuel, age_retraite, salaire_actuel, capital_lpp)
+
+    return _completer_batch(
+        age_actuel, age_retraite, statut_civil, salaire_moyen, annees_cotisees,
+        annees_bonif_education, annees_bonif_assistance, situation_conjoint,
+        rente_conjoint, lpp
+    )
+
+
+def _completer_batch(
+    age_actuel, age_retraite, statut_civil, salaire_moyen, annees_cotisees,
+    annees_bonif_education, annees_bonif_assistance, situation_conjoint,
+    rente_conjoint, lpp: Dict[str, np.ndarray]
+) -> Dict:
+    """AVS, conjoint et scénarios à partir de colonnes normalisées et du LPP déjà calculé."""
+    # Projection des années totales
+    annees_restantes = age_retraite - age_actuel
+    annees_totales = annees_cotisees + annees_restantes
+
+    avs = calculer_avs_batch(
+        salaire_moyen, annees_totales, annees_bonif_education, annees_bonif_assistance
+    )
+
+    # Gestion du conjoint (si marié)
+    marie = statut_civil == 'marie'
+    rente_saisie = (situation_conjoint == 'sait') & ~np.isnan(rente_conjoint)
+    rente_conj = np.select(
+        [rente_saisie, situation_conjoint == 'jamais_travaille'],
+        [rente_conjoint, AVS.RENTE_MIN],
+        default=AVS.RENTE_MEDIANE,
+    )
+
+    # Plafonnement couple (150% de la rente max)
+    total_theorique = avs['rente'] + rente_conj
+    plafonne = marie & (total_theorique > AVS.PLAFOND_COUPLE)
+    excedent = total_theorique - AVS.PLAFOND_COUPLE
+    ratio_personne = avs['rente'] / np.where(total_theorique > 0, total_theorique, 1.0)
+    rente_personne_plaf = _arrondi(avs['rente'] - excedent * ratio_personne, 2)
+    rente_conjoint_plaf = _arrondi(rente_conj - excedent * (1 - ratio_personne), 2)
+
+    rente_avs = np.where(plafonne, rente_personne_plaf, avs['rente'])
+
+    conjoint = {
+        'marie': marie,
+        'rente': np.where(marie, np.where(plafonne, rente_conjoint_plaf, rente_conj), np.nan),
+        'plafonne': plafonne,
+        'excedent': np.where(plafonne, _arrondi(excedent, 2), 0.0),
+        'total_theorique': np.where(plafonne, _arrondi(total_theorique, 2), total_theorique),
+        'total_final': np.where(plafonne, AVS.PLAFOND_COUPLE, total_theorique),
+    }
+
+    # Scénarios de rachat
+    rente_base = rente_avs + lpp['rente_mensuelle']
+
+    eligible_lpp = (lpp['salaire_coordonne'] > 0) & (annees_restantes >= 3)
+    potentiel_rachat = lpp['salaire_coordonne'] * 0.18 * np.minimum(annees_restantes, 10)
+    gain_rente_mensuelle = (potentiel_rachat * LPP.TAUX_CONVERSION) / 12
+    economie_impot = potentiel_rachat * 0.25
+
+    eligible_avs = (avs['annees_manquantes'] > 0) & (avs['annees_manquantes'] <= 5)
+    gain_mensuel_avs = (AVS.RENTE_MAX * AVS.REDUCTION_PAR_ANNEE) * avs['annees_manquantes']
+
+    scenarios = {
+        'sans_rachat': {
+            'rente_totale': rente_base,
+        },
+        'rachat_lpp': {
+            'eligible': eligible_lpp,
+            'duree_etalement': np.minimum(annees_restantes, 5),
+            'cout_total': _arrondi(potentiel_rachat),
+            'cout_net': _arrondi(potentiel_rachat - economie_impot),
+            'economie_impot': _arrondi(economie_impot),
+            'gain_mensuel': _arrondi(gain_rente_mensuelle),
+            'gain_annuel': _arrondi(gain_rente_mensuelle * 12),
+            'gain_20_ans': _arrondi(gain_rente_mensuelle * 12 * 20),
+            'rente_totale': rente_base + gain_rente_mensuelle,
+        },
+        'lacunes_avs': {
+            'eligible': eligible_avs,
+            'cout_total': _arrondi(avs['annees_manquantes'] * 10500),
+            'gain_mensuel': _arrondi(gain_mensuel_avs),
+            'gain_annuel': _arrondi(gain_mensuel_avs * 12),
+            'gain_20_ans': _arrondi(gain_mensuel_avs * 12 * 20),
+            'rente_totale': avs['rente_complete'] + lpp['rente_mensuelle'],
+            'recommande': avs['annees_manquantes'] >= 3,
+        },
+    }
+
+    return {
+        'avs': dict(avs, rente=rente_avs),
+        'lpp': lpp,
+        'conjoint': conjoint,
+        'scenarios': scenarios,
+        'total': rente_base,
+        'annees_totales': annees_totales,
+        'annees_restantes': annees_restantes,
+    }
+
+
+# ============================================================================
+# BALAYAGE DE L'ÂGE DE RETRAITE (UN PROFIL, TOUS LES ÂGES)
+# ============================================================================
+
+def calculer_lpp_prefixe(
+    age_actuel: int,
+    duree_max: int,
+    salaire_actuel: float,
+    capital_initial: float,
+    progression_salariale: float = 0.005
+) -> Dict[str, np.ndarray]:
+    """
+    Accumulation LPP d'un profil, une seule fois jusqu'à duree_max années
+
+    Le capital à la retraite à age_actuel + k ne dépend que des k premières
+    années : partir à 63 ou à 66 partage le même préfixe. Les opérations
+    sont celles de calculer_lpp, dans le même ordre (mêmes flottants).
+
+    Returns:
+        Colonnes indexées par k = 0..duree_max (années cotisées) : capital
+        (non arrondi), total_cotisations et total_interets (cumuls arrondis
+        année par année)
+    """
+    capital = np.empty(duree_max + 1)
+    total_cotisations = np.zeros(duree_max + 1)
+    total_interets = np.zeros(duree_max + 1)
+
+    c = float(capital_initial)
+    salaire = float(salaire_actuel)
+    capital[0] = c
+    for k in range(duree_max):
+        taux_epargne = get_taux_epargne(age_actuel + k)
+        cotisation_annuelle = calculer_salaire_coordonne(salaire) * taux_epargne
+        interets = c * LPP.TAUX_INTERET
+
+        total_cotisations[k + 1] = total_cotisations[k] + round(cotisation_annuelle)
+        total_interets[k + 1] = total_interets[k] + round(interets)
+
+        c += cotisation_annuelle + interets
+        capital[k + 1] = c
+        salaire *= (1 + progression_salariale)
+
+    return {
+        'capital': capital,
+        'total_cotisations': total_cotisations,
+        'total_interets': total_interets,
+    }
+
+
+def calculer_balayage_age(
+    age_actuel: int,
+    age_min: int,
+    age_max: int,
+    statut_civil: str,
+    salaire_actuel: float,
+    salaire_moyen: float,
+    annees_cotisees: int,
+    annees_bonif_education: int = 0,
+    annees_bonif_assistance: int = 0,
+    capital_lpp: float = 0.0,
+    situation_conjoint: Optional[str] = None,
+    rente_conjoint: float = np.nan
+) -> Dict:
+    """
+    Calcule la retraite d'un profil pour chaque âge de départ de age_min à
+    age_max (bornes incluses, âges antérieurs à age_actuel exclus)
+
+    Le LPP est accumulé une seule fois (calculer_lpp_prefixe) ; AVS,
+    plafonnement couple et scénarios sont calculés pour tous les âges
+    d'un coup, comme une colonne de calculer_retraite_batch.
+
+    Returns:
+        Même structure que calculer_retraite_batch, une ligne par âge, plus
+        la colonne 'age_retraite'
+    """
+    age_min = max(int(age_min), int(age_actuel))
+    ages = np.arange(age_min, int(age_max) + 1, dtype=np.int64)
+    n = len(ages)
+    if n == 0:
+        raise ValueError("Plage d'âges vide")
+
+    prefixe = calculer_lpp_prefixe(
+        int(age_actuel), int(ages[-1]) - int(age_actuel), salaire_actuel, capital_lpp
+    )
+    k = ages - age_actuel
+    capital = prefixe['capital'][k]
+
+    lpp = {
+        'capital_initial': np.full(n, float(capital_lpp)),
+        'capital_final': _arrondi(capital),
+        'rente_mensuelle': _arrondi((capital * LPP.TAUX_CONVERSION) / 12, 2),
+        'salaire_coordonne': np.full(n, calculer_salaire_coordonne(salaire_actuel)),
+        'total_cotisations': prefixe['total_cotisations'][k],
+        'total_interets': prefixe['total_interets'][k],
+    }
+
+    resultat = _completer_batch(
+        np.full(n, int(age_actuel), dtype=np.int64), ages,
+        _colonne(statut_civil, n, object), np.full(n, float(salaire_moyen)),
+        np.full(n, int(annees_cotisees), dtype=np.int64),
+        np.full(n, int(annees_bonif_education), dtype=np.int64),
+        np.full(n, int(annees_bonif_assistance), dtype=np.int64),
+        _colonne(situation_conjoint, n, object), np.full(n, float(rente_conjoint)),
+        lpp
+    )
+    resultat['age_retraite'] = ages
+    return resultat
+
+
+def balayage_age_depuis_donnees(donnees: Dict, age_min: int, age_max: int) -> Dict[str, List]:
+    """
+    Balayage de l'âge de retraite pour les `donnees` d'un formulaire
+
+    Table compacte en colonnes (une valeur par âge), prête pour le JSON d'un
+    curseur côté navigateur. Les gains de scénarios valent 0 quand le
+    scénario n'est pas proposé à cet âge.
+    """
+    colonnes = colonnes_depuis_donnees([donnees])
+    profil = {k: v[0] for k, v in colonnes.items() if k != 'age_retraite'}
+    r = calculer_balayage_age(age_min=age_min, age_max=age_max, **profil)
+
+    rachat = r['scenarios']['rachat_lpp']
+    lacunes = r['scenarios']['lacunes_avs']
+    return {
+        'age': r['age_retraite'].tolist(),
+        'rente_avs': r['avs']['rente'].tolist(),
+        'rente_lpp': r['lpp']['rente_mensuelle'].tolist(),
+        'total': np.round(r['total'], 2).tolist(),
+        'capital_lpp': r['lpp']['capital_final'].tolist(),
+        'annees_manquantes': r['avs']['annees_manquantes'].tolist(),
+        'rachat_lpp_cout': np.where(rachat['eligible'], rachat['cout_total'], 0.0).tolist(),
+        'rachat_lpp_gain_mensuel': np.where(rachat['eligible'], rachat['gain_mensuel'], 0.0).tolist(),
+        'lacunes_avs_gain_mensuel': np.where(lacunes['eligible'], lacunes['gain_mensuel'], 0.0).tolist(),
+    }
+
+
+def colonnes_depuis_donnees(lignes: Iterable[Dict]) -> Dict[str, np.ndarray]:
+    """
+    Convertit des `donnees` de simulations (JSONB) en colonnes d'entrée
+
+    Applique la même normalisation que simulateur_avs_lpp.calcul_complet_retraite
+    (indépendant sans capital LPP, rente conjoint connue ou estimée).
+
+    Returns:
+        kwargs prêts pour calculer_retraite_batch(**colonnes)
+    """
+    colonnes: Dict[str, List] = {
+        'age_actuel': [], 'age_retraite': [], 'statut_civil': [],
+        'salaire_actuel': [], 'salaire_moyen': [], 'annees_cotisees': [],
+        'annees_bonif_education': [], 'annees_bonif_assistance': [],
+        'capital_lpp': [], 'situation_conjoint': [], 'rente_conjoint': [],
+    }
+
+    for donnees in lignes:
+        statut_civil = (donnees.get("statut_civil") or "celibataire").strip().lower()
+        statut_pro = (donnees.get("statut_pro") or "salarie").strip().lower()
+        capital_lpp = float(donnees.get("capital_lpp", 0))
+        rente_conjoint = float(donnees.get("rente_conjoint", 0))
+
+        situation_conjoint: Optional[str] = None
+        rente_conjoint_param = np.nan
+        if statut_civil == "marie":
+            if rente_conjoint > 0:
+                situation_conjoint = "sait"
+                rente_conjoint_param = rente_conjoint
+            else:
+                situation_conjoint = "ne_sait_pas"
+
+        colonnes['age_actuel'].append(int(donnees.get("age_actuel", 0)))
+        colonnes['age_retraite'].append(int(donnees.get("age_retraite", 65)))
+        colonnes['statut_civil'].append(statut_civil)
+        colonnes['salaire_actuel'].append(float(donnees.get("salaire_actuel", 0)))
+        colonnes['salaire_moyen'].append(float(donnees.get("salaire_moyen", 0)))
+        colonnes['annees_cotisees'].append(int(donnees.get("annees_cotisees", 0)))
+        colonnes['annees_bonif_education'].append(int(donnees.get("annees_be", 0)))
+        colonnes['annees_bonif_assistance'].append(int(donnees.get("annees_ba", 0)))
+        colonnes['capital_lpp'].append(0.0 if statut_pro == "independant" else capital_lpp)
+        colonnes['situation_conjoint'].append(situation_conjoint)
+        colonnes['rente_conjoint'].append(rente_conjoint_param)
+
+    return {
+        'age_actuel': np.asarray(colonnes['age_actuel'], dtype=np.int64),
+        'age_retraite': np.asarray(colonnes['age_retraite'], dtype=np.int64),
+        'statut_civil': np.asarray(colonnes['statut_civil'], dtype=object),
+        'salaire_actuel': np.asarray(colonnes['salaire_actuel'], dtype=float),
+        'salaire_moyen': np.asarray(colonnes['salaire_moyen'], dtype=float),
+        'annees_cotisees': np.asarray(colonnes['annees_cotisees'], dtype=np.int64),
+        'annees_bonif_education': np.asarray(colonnes['annees_bonif_education'], dtype=np.int64),
+        'annees_bonif_assistance': np.asarray(colonnes['annees_bonif_assistance'], dtype=np.int64),
+        'capital_lpp': np.asarray(colonnes['capital_lpp'], dtype=float),
+        'situation_conjoint': np.asarray(colonnes['situation_conjoint'], dtype=object),
+        'rente_conjoint': np.asarray(colonnes['rente_conjoint'], dtype=float),
+    }
+
+
+# ============================================================================
+# TESTS DE PARITÉ (référence = calculer_retraite_complete)
+# ============================================================================
+
+def _profils_aleatoires(n: int, seed: int = 2025) -> Dict[str, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    age_actuel = rng.integers(18, 66, n)
+    situation = rng.choice(np.array(['sait', 'ne_sait_pas', 'jamais_travaille', None], dtype=object), n)
+    rente_conjoint = np.where(rng.random(n) < 0.7, np.round(rng.uniform(0, 2600, n), 2), np.nan)
+
+    return {
+        'age_actuel': age_actuel,
+        'age_retraite': np.minimum(age_actuel + rng.integers(0, 45, n), 70),
+        'statut_civil': rng.choice(np.array(['celibataire', 'marie', 'divorce', 'veuf'], dtype=object), n),
+        'salaire_actuel': np.round(rng.uniform(0, 250000, n), rng.integers(0, 3)),
+        'salaire_moyen': np.round(rng.uniform(0, 180000, n), 2),
+        'annees_cotisees': rng.integers(0, 45, n),
+        'annees_bonif_education': rng.integers(0, 20, n),
+        'annees_bonif_assistance': rng.integers(0, 5, n),
+        'capital_lpp': np.round(rng.uniform(0, 800000, n), 2),
+        'situation_conjoint': situation,
+        'rente_conjoint': rente_conjoint,
+    }
+
+
+def _scalaire(valeur):
+    return None if isinstance(valeur, float) and np.isnan(valeur) else valeur
+
+
+def test_parite_batch(n: int = 5000, seed: int = 2025):
+    """Compare calculer_retraite_batch à la référence scalaire, profil par profil"""
+    print("\n\n" + "=" * 80)
+    print(f"TESTS DE PARITÉ BATCH ({n} profils)")
+    print("=" * 80)
+
+    profils = _profils_aleatoires(n, seed)
+    batch = calculer_retraite_batch(**profils)
+
+    ecarts = 0
+    for i in range(n):
+        ref = calculer_retraite_complete(**{
+            k: _scalaire(v[i].item() if hasattr(v[i], 'item') else v[i])
+            for k, v in profils.items()
+        })
+
+        attendus = [
+            (('avs', k), ref['avs'][k]) for k in ref['avs']
+        ] + [
+            (('lpp', k), ref['lpp'][k]) for k in ref['lpp'] if k != 'projection'
+        ] + [
+            (('total',), ref['total']),
+            (('annees_totales',), ref['annees_totales']),
+            (('scenarios', 'sans_rachat', 'rente_totale'), ref['scenarios'][0]['rente_totale']),
+        ]
+
+        if ref['conjoint']:
+            attendus.append((('conjoint', 'rente'), ref['conjoint']['rente']))
+            for k, v in ref['conjoint']['plafonnement'].items():
+                if k not in ('rente_personne', 'rente_conjoint'):
+                    attendus.append((('conjoint', k), v))
+
+        noms = [s['nom'] for s in ref['scenarios']]
+        assert bool(batch['scenarios']['rachat_lpp']['eligible'][i]) == ("Rachat LPP optimisé" in noms)
+        assert bool(batch['scenarios']['lacunes_avs']['eligible'][i]) == ("Comblement lacunes AVS" in noms)
+        for s in ref['scenarios'][1:]:
+            cle = 'rachat_lpp' if s['nom'] == "Rachat LPP optimisé" else 'lacunes_avs'
+            for k in ('cout_total', 'gain_mensuel', 'gain_annuel', 'gain_20_ans', 'rente_totale'):
+                attendus.append((('scenarios', cle, k), s[k]))
+
+        for chemin, attendu in attendus:
+            obtenu = batch
+            for p in chemin:
+                obtenu = obtenu[p]
+            if abs(float(obtenu[i]) - float(attendu)) >= 0.005:
+                ecarts += 1
+                print(f"  ❌ profil {i} {'.'.join(chemin)}: batch={obtenu[i]} ref={attendu}")
+
+    assert ecarts == 0, f"{ecarts} écarts"
+    print(f"  PASSED - {n} profils identiques au centime")
+
+
+def test_balayage_age(n: int = 300, seed: int = 2026):
+    """Compare calculer_balayage_age à calculer_retraite_complete pour chaque âge"""
+    print("\n\n" + "=" * 80)
+    print(f"TESTS BALAYAGE ÂGE DE RETRAITE ({n} profils, âges 58-70)")
+    print("=" * 80)
+
+    profils = _profils_aleatoires(n, seed)
+    ecarts = 0
+    for i in range(n):
+        profil = {
+            k: _scalaire(v[i].item() if hasattr(v[i], 'item') else v[i])
+            for k, v in profils.items() if k != 'age_retraite'
+        }
+        balayage = calculer_balayage_age(
+            age_min=58, age_max=70,
+            **dict(profil, rente_conjoint=np.nan if profil['rente_conjoint'] is None else profil['rente_conjoint'])
+        )
+
+        for j, age in enumerate(balayage['age_retraite']):
+            ref = calculer_retraite_complete(**profil, age_retraite=int(age))
+            attendus = [
+                (('total',), ref['total']),
+                (('avs', 'rente'), ref['avs']['rente']),
+                (('avs', 'annees_manquantes'), ref['avs']['annees_manquantes']),
+            ] + [
+                (('lpp', cle), ref['lpp'][cle])
+                for cle in ('capital_final', 'rente_mensuelle', 'total_cotisations', 'total_interets')
+            ]
+            for s in ref['scenarios'][1:]:
+                cle = 'rachat_lpp' if s['nom'] == "Rachat LPP optimisé" else 'lacunes_avs'
+                attendus.append((('scenarios', cle, 'gain_mensuel'), s['gain_mensuel']))
+
+            for chemin, attendu in attendus:
+                obtenu = balayage
+                for p in chemin:
+                    obtenu = obtenu[p]
+                if abs(float(obtenu[j]) - float(attendu)) >= 0.005:
+                    ecarts += 1
+                    print(f"  ❌ profil {i} âge {age} {'.'.join(chemin)}: balayage={obtenu[j]} ref={attendu}")
+
+    assert ecarts == 0, f"{ecarts} écarts"
+    print(f"  PASSED - {n} profils × âges identiques au centime")
+
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+if __name__ == "__main__":
+    import time
+
+    test_parite_batch()
+    test_balayage_age()
+
+    profils = _profils_aleatoires(100000)
+    t0 = time.perf_counter()
+    calculer_retraite_batch(**profils)
+    print(f"\n⏱️  100 000 profils en {time.perf_counter() - t0:.2f} s")
@@ -0,0 +1,230 @@
+"""
+Calculateur de Retraite Suisse (AVS/LPP) 2025 — projection LPP stochastique
+Monte Carlo sur le taux d'intérêt crédité et la progression salariale :
+mêmes règles que calculateur_retraite.calculer_lpp, mais avec un taux et une
+progression tirés chaque année, pour des milliers de chemins à la fois.
+
+- taux d'intérêt : AR(1) autour de LPP.TAUX_INTERET (les régimes de taux
+  durent plusieurs années), plancher à 0 (pas d'intérêt négatif crédité)
+- progression salariale : tirages indépendants autour de 0.5 %/an
+- chemins générés par blocs de MC_BLOC : les tirages et les calculs
+  intermédiaires (float64) ne dépassent pas la taille d'un bloc, aucune
+  boucle Python par chemin (la boucle porte sur les années, chaque
+  itération traite tout le bloc)
+- mémoire : les bandes par âge sont des percentiles exacts, il faut donc
+  garder le capital de chaque chemin à chaque âge, soit une matrice float32
+  de 4 × chemins × (années + 1) octets (20 Mo pour 100 000 chemins sur
+  50 ans), triée sur place par np.percentile (pas de copie). MC_CHEMINS_MAX
+  borne ce coût
+- reproductible : même seed -> mêmes bandes, quelle que soit la taille de bloc
+"""
+
+import os
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+from calculateur_retraite import LPP, calculer_lpp
+from calculateur_batch import colonnes_depuis_donnees, salaire_coordonne_batch, taux_epargne_batch
+
+MC_CHEMINS = int(os.getenv("MC_CHEMINS", "10000"))
+MC_CHEMINS_MAX = int(os.getenv("MC_CHEMINS_MAX", "100000"))
+MC_BLOC = int(os.getenv("MC_BLOC", "4096"))
+
+MC_SIGMA_INTERET = float(os.getenv("MC_SIGMA_INTERET", "0.0075"))
+MC_PERSISTANCE_INTERET = float(os.getenv("MC_PERSISTANCE_INTERET", "0.6"))
+MC_SIGMA_SALAIRE = float(os.getenv("MC_SIGMA_SALAIRE", "0.01"))
+
+PERCENTILES = (10, 50, 90)
+
+
+# ============================================================================
+# SIMULATION D'UN BLOC DE CHEMINS
+# ============================================================================
+
+def _simuler_bloc(
+    rng_interet: np.random.Generator,
+    rng_salaire: np.random.Generator,
+    nb: int,
+    age_actuel: int,
+    duree: int,
+    salaire_actuel: float,
+    capital_initial: float,
+    progression_salariale: float,
+    sigma_interet: float,
+    persistance: float,
+    sigma_salaire: float,
+) -> np.ndarray:
+    """
+    Capital de fin d'année de `nb` chemins
+
+    Returns:
+        Matrice (nb, duree + 1) : colonne k = capital après k années
+    """
+    # AR(1) stationnaire : écart-type des chocs réduit pour garder sigma_interet
+    choc = sigma_interet * np.sqrt(1 - persistance ** 2)
+    eps_interet = rng_interet.standard_normal((nb, duree))
+    eps_salaire = rng_salaire.standard_normal((nb, duree))
+
+    capital = np.full(nb, float(capital_initial))
+    salaire = np.full(nb, float(salaire_actuel))
+    ecart = sigma_interet * eps_interet[:, 0] if duree else np.zeros(nb)
+
+    trajectoire = np.empty((nb, duree + 1))
+    trajectoire[:, 0] = capital
+
+    for k in range(duree):
+        if k:
+            ecart = persistance * ecart + choc * eps_interet[:, k]
+        taux = np.maximum(LPP.TAUX_INTERET + ecart, 0.0)
+
+        cotisation_annuelle = salaire_coordonne_batch(salaire) * taux_epargne_batch(np.int64(age_actuel + k))
+        interets = capital * taux
+        capital = capital + (cotisation_annuelle + interets)
+        salaire = salaire * (1 + (progression_salariale + sigma_salaire * eps_salaire[:, k]))
+
+        trajectoire[:, k + 1] = capital
+
+    return trajectoire
+
+
+# ============================================================================
+# FONCTION PRINCIPALE
+# ============================================================================
+
+def projeter_lpp_monte_carlo(
+    age_actuel: int,
+    age_retraite: int,
+    salaire_actuel: float,
+    capital_initial: float,
+    chemins: int = MC_CHEMINS,
+    seed: Optional[int] = None,
+    progression_salariale: float = 0.005,
+    sigma_interet: float = MC_SIGMA_INTERET,
+    persistance: float = MC_PERSISTANCE_INTERET,
+    sigma_salaire: float = MC_SIGMA_SALAIRE,
+    bloc: int = MC_BLOC,
+    percentiles: Sequence[int] = PERCENTILES,
+) -> Dict:
+    """
+    Projection LPP sur `chemins` scénarios de taux et de salaire
+
+    Args:
+        seed: graine du générateur (None = aléatoire ; la graine utilisée
+            est renvoyée pour rejouer le tirage)
+        sigma_interet / sigma_salaire: 0 et 0 redonnent exactement
+            calculer_lpp (chemin déterministe)
+
+    Returns:
+        Percentiles du capital final et de la rente mensuelle, bandes de
+        capital par âge (colonnes), et la projection déterministe de référence
+    """
+    if not 1 <= chemins <= MC_CHEMINS_MAX:
+        raise ValueError(f"chemins doit être entre 1 et {MC_CHEMINS_MAX}")
+
+    duree = max(0, int(age_retraite) - int(age_actuel))
+    if seed is None:
+        seed = int(np.random.SeedSequence().entropy % (2 ** 63))
+    # un générateur par source d'aléa : le tirage ne dépend pas de la taille de bloc
+    graine_interet, graine_salaire = np.random.SeedSequence(seed).spawn(2)
+    rng_interet = np.random.default_rng(graine_interet)
+    rng_salaire = np.random.default_rng(graine_salaire)
+
+    # capital par (chemin, année) en float32 : 4 octets × chemins × années
+    capitaux = np.empty((chemins, duree + 1), dtype=np.float32)
+    capital_final = np.empty(chemins)
+
+    for debut in range(0, chemins, bloc):
+        nb = min(bloc, chemins - debut)
+        trajectoire = _simuler_bloc(
+            rng_interet, rng_salaire, nb, int(age_actuel), duree, salaire_actuel, capital_initial,
+            progression_salariale, sigma_interet, persistance, sigma_salaire,
+        )
+        capitaux[debut:debut + nb] = trajectoire
+        capital_final[debut:debut + nb] = trajectoire[:, -1]
+
+    q = np.asarray(percentiles, dtype=float)
+    final = np.percentile(capital_final, q)
+    # capitaux n'est plus utilisé ensuite : tri sur place plutôt qu'une copie
+    bandes = np.percentile(capitaux, q, axis=0, overwrite_input=True)
+    rente = final * LPP.TAUX_CONVERSION / 12
+
+    reference = calculer_lpp(
+        int(age_actuel), int(age_retraite), salaire_actuel, capital_initial,
+        progression_salariale=progression_salariale, detail=False,
+    )
+
+    return {
+        'chemins': chemins,
+        'seed': seed,
+        'percentiles': [int(p) for p in q],
+        'capital_final': {f'p{int(p)}': round(float(v)) for p, v in zip(q, final)},
+        'rente_mensuelle': {f'p{int(p)}': round(float(v), 2) for p, v in zip(q, rente)},
+        'bandes': dict(
+            {'age': list(range(int(age_actuel), int(age_actuel) + duree + 1))},
+            **{f'p{int(p)}': np.rint(b).astype(np.int64).tolist() for p, b in zip(q, bandes)},
+        ),
+        'deterministe': {
+            'capital_final': reference.capital_final,
+            'rente_mensuelle': reference.rente_mensuelle,
+        },
+        'hypotheses': {
+            'taux_interet_moyen': LPP.TAUX_INTERET,
+            'sigma_interet': sigma_interet,
+            'persistance_interet': persistance,
+            'progression_salariale': progression_salariale,
+            'sigma_salaire': sigma_salaire,
+        },
+    }
+
+
+def monte_carlo_depuis_donnees(donnees: Dict, chemins: int = MC_CHEMINS, seed: Optional[int] = None) -> Dict:
+    """Projection Monte Carlo pour les `donnees` d'un formulaire (indépendant : capital 0)."""
+    colonnes = colonnes_depuis_donnees([donnees])
+    return projeter_lpp_monte_carlo(
+        age_actuel=int(colonnes['age_actuel'][0]),
+        age_retraite=int(colonnes['age_retraite'][0]),
+        salaire_actuel=float(colonnes['salaire_actuel'][0]),
+        capital_initial=float(colonnes['capital_lpp'][0]),
+        chemins=chemins,
+        seed=seed,
+    )
+
+
+# ============================================================================
+# TESTS
+# ============================================================================
+
+def test_monte_carlo():
+    print("=== TEST 1: sigma = 0 -> identique à calculer_lpp ===")
+    rng = np.random.default_rng(7)
+    for _ in range(200):
+        age = int(rng.integers(20, 64))
+        retraite = int(rng.integers(age, 71))
+        salaire = float(rng.uniform(0, 200000))
+        capital = float(rng.uniform(0, 500000))
+        r = projeter_lpp_monte_carlo(age, retraite, salaire, capital, chemins=3, seed=1,
+                                     sigma_interet=0.0, sigma_salaire=0.0)
+        ref = calculer_lpp(age, retraite, salaire, capital)
+        assert r['capital_final']['p50'] == ref.capital_final, (r['capital_final'], ref.capital_final)
+        assert r['bandes']['p10'] == r['bandes']['p90']
+    print("✅ OK")
+
+    print("=== TEST 2: même seed -> même résultat, quelle que soit la taille de bloc ===")
+    a = projeter_lpp_monte_carlo(40, 65, 90000, 100000, chemins=5000, seed=42, bloc=4096)
+    b = projeter_lpp_monte_carlo(40, 65, 90000, 100000, chemins=5000, seed=42, bloc=333)
+    assert a['capital_final'] == b['capital_final'] and a['bandes'] == b['bandes']
+    c = projeter_lpp_monte_carlo(40, 65, 90000, 100000, chemins=5000, seed=43)
+    assert c['capital_final'] != a['capital_final']
+    print("✅ OK")
+
+    print("=== TEST 3: bandes ordonnées, médiane proche du déterministe ===")
+    p10, p50, p90 = (a['capital_final'][k] for k in ('p10', 'p50', 'p90'))
+    assert p10 < p50 < p90
+    assert abs(p50 / a['deterministe']['capital_final'] - 1) < 0.05, (p50, a['deterministe'])
+    assert all(x <= y <= z for x, y, z in zip(a['bandes']['p10'], a['bandes']['p50'], a['bandes']['p90']))
+    print("✅ OK")
+
+
+if __name__ == "__main__":
+    test_monte_carlo()
@@ -4,8 +4,9 @@ Reproduction exacte des calculs de l'application React
 """
 
 from typing import Dict, List, Optional, Tuple
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields
 import json
+import math
 
 
 # ============================================================================
@@ -47,6 +48,23 @@ AVS = ConfigAVS()
 LPP = ConfigLPP()
 
 
+def empreinte_config() -> Tuple:
+    """
+    Empreinte des valeurs courantes de AVS et LPP
+    
+    Change dès qu'une constante est modifiée: sert à invalider les caches
+    construits à partir de ces valeurs. Tuple comparable, assez léger pour
+    être recalculé à chaque appel.
+    """
+    return (
+        tuple(vars(AVS).items()),
+        tuple(
+            (k, tuple(sorted(v.items())) if isinstance(v, dict) else v)
+            for k, v in vars(LPP).items()
+        ),
+    )
+
+
 # ============================================================================
 # CLASSES DE RÉSULTATS
 # ============================================================================
@@ -75,6 +93,36 @@ class ProjectionAnnuelle:
     capital_fin: float
 
 
+COLONNES_PROJECTION = tuple(f.name for f in fields(ProjectionAnnuelle))
+
+
+class ProjectionLPP:
+    """
+    Projection LPP en colonnes : une liste par champ de ProjectionAnnuelle
+
+    Pas d'objet par année ; colonnes() donne directement la forme JSON
+    ({"age": [...], "capital_fin": [...], ...}) sans copier les listes.
+    L'accès par ligne (itération, indice) reste possible.
+    """
+    __slots__ = COLONNES_PROJECTION
+
+    def __init__(self):
+        for nom in COLONNES_PROJECTION:
+            setattr(self, nom, [])
+
+    def __len__(self) -> int:
+        return len(self.age)
+
+    def __getitem__(self, i: int) -> ProjectionAnnuelle:
+        return ProjectionAnnuelle(*(getattr(self, nom)[i] for nom in COLONNES_PROJECTION))
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def colonnes(self) -> Dict[str, List]:
+        return {nom: getattr(self, nom) for nom in COLONNES_PROJECTION}
+
+
 @dataclass
 class ResultatLPP:
     """Résultat du calcul LPP"""
@@ -82,7 +130,7 @@ class ResultatLPP:
     capital_final: float
     rente_mensuelle: float
     salaire_coordonne: float
-    projection: List[ProjectionAnnuelle]
+    projection: ProjectionLPP
     total_cotisations: float
     total_interets: float
 
@@ -155,12 +203,84 @@ def calculer_salaire_coordonne(salaire_brut: float) -> float:
     return max(0.0, salaire_assure - LPP.DEDUCTION_COORD)
 
 
+def _capital_lpp_analytique(
+    age_actuel: int,
+    age_retraite: int,
+    salaire_actuel: float,
+    capital_initial: float,
+    progression_salariale: float
+) -> Tuple[float, float]:
+    """
+    Capital LPP final en forme fermée (séries géométriques)
+
+    Les années sont découpées en segments où le taux d'épargne (tranche d'âge)
+    et le régime du salaire coordonné (nul, linéaire, plafonné) sont constants.
+    Sur chaque segment : capital × q^m + somme géométrique des cotisations,
+    avec q = 1 + taux d'intérêt et g = 1 + progression salariale.
+
+    Returns:
+        (capital final non arrondi, total des cotisations non arrondi)
+    """
+    duree = age_retraite - age_actuel
+    if duree <= 0:
+        return capital_initial, 0.0
+
+    q = 1 + LPP.TAUX_INTERET
+    g = 1 + progression_salariale
+    seuil_bas = max(LPP.SALAIRE_MIN, LPP.DEDUCTION_COORD)
+
+    # Points de rupture: changements de tranche d'âge + franchissement des seuils salariaux
+    ruptures = {0, duree}
+    for age_tranche in LPP.TAUX_EPARGNE:
+        ruptures.add(age_tranche - age_actuel)
+    if salaire_actuel > 0 and g > 0 and g != 1:
+        for seuil in (seuil_bas, LPP.SALAIRE_MAX):
+            x = math.log(seuil / salaire_actuel) / math.log(g)
+            ruptures.update((math.floor(x), math.floor(x) + 1, math.ceil(x)))
+    ruptures = sorted(k for k in ruptures if 0 <= k <= duree)
+
+    capital = capital_initial
+    total_cotisations = 0.0
+
+    for debut, fin in zip(ruptures, ruptures[1:]):
+        m = fin - debut
+        taux_epargne = get_taux_epargne(age_actuel + debut)
+        salaire_debut = salaire_actuel * g ** debut
+        croissance = q ** m
+        # somme des q^j pour j = 0..m-1 (valeur finale d'une cotisation constante)
+        annuite = m if q == 1 else (croissance - 1) / (q - 1)
+
+        if taux_epargne == 0 or salaire_debut < seuil_bas:
+            apport = 0.0
+            cotisations = 0.0
+        elif salaire_debut > LPP.SALAIRE_MAX:
+            cotisation = (LPP.SALAIRE_MAX - LPP.DEDUCTION_COORD) * taux_epargne
+            apport = cotisation * annuite
+            cotisations = cotisation * m
+        else:
+            # cotisation_k = taux × (salaire_debut × g^k − déduction)
+            if abs(q - g) < 1e-12:
+                serie_croisee = m * q ** (m - 1)
+            else:
+                serie_croisee = (croissance - g ** m) / (q - g)
+            serie_salaire = m if g == 1 else (g ** m - 1) / (g - 1)
+
+            apport = taux_epargne * (salaire_debut * serie_croisee - LPP.DEDUCTION_COORD * annuite)
+            cotisations = taux_epargne * (salaire_debut * serie_salaire - LPP.DEDUCTION_COORD * m)
+
+        capital = capital * croissance + apport
+        total_cotisations += cotisations
+
+    return capital, total_cotisations
+
+
 def calculer_lpp(
     age_actuel: int,
     age_retraite: int,
     salaire_actuel: float,
     capital_initial: float,
-    progression_salariale: float = 0.005
+    progression_salariale: float = 0.005,
+    detail: bool = True
 ) -> ResultatLPP:
     """
     Calcule la projection LPP complète avec accumulation année par année
@@ -171,13 +291,30 @@ def calculer_lpp(
         salaire_actuel: Salaire annuel actuel
         capital_initial: Capital LPP actuel
         progression_salariale: Taux de progression salariale annuel (défaut: 0.5%)
+        detail: Si False, mode rapide: capital final en forme fermée, sans
+            projection annuelle (les totaux sont alors arrondis globalement
+            et non plus année par année)
         
     Returns:
         ResultatLPP avec capital final, rente et projection détaillée
     """
+    if not detail:
+        capital, cotisations = _capital_lpp_analytique(
+            age_actuel, age_retraite, salaire_actuel, capital_initial, progression_salariale
+        )
+        return ResultatLPP(
+            capital_initial=capital_initial,
+            capital_final=round(capital),
+            rente_mensuelle=round((capital * LPP.TAUX_CONVERSION) / 12, 2),
+            salaire_coordonne=calculer_salaire_coordonne(salaire_actuel),
+            projection=ProjectionLPP(),
+            total_cotisations=round(cotisations),
+            total_interets=round(capital - capital_initial - cotisations)
+        )
+
     capital = capital_initial
     salaire = salaire_actuel
-    projection_annuelle = []
+    projection = ProjectionLPP()
     
     for age in range(age_actuel, age_retraite):
         taux_epargne = get_taux_epargne(age)
@@ -185,30 +322,28 @@ def calculer_lpp(
         cotisation_annuelle = salaire_coordonne * taux_epargne
         interets = capital * LPP.TAUX_INTERET
         
-        projection_annuelle.append(ProjectionAnnuelle(
-            age=age,
-            salaire=round(salaire),
-            salaire_coordonne=round(salaire_coordonne),
-            taux_epargne=round(taux_epargne * 100, 2),
-            cotisation=round(cotisation_annuelle),
-            interets=round(interets),
-            capital_debut=round(capital),
-            capital_fin=round(capital + cotisation_annuelle + interets)
-        ))
+        projection.age.append(age)
+        projection.salaire.append(round(salaire))
+        projection.salaire_coordonne.append(round(salaire_coordonne))
+        projection.taux_epargne.append(round(taux_epargne * 100, 2))
+        projection.cotisation.append(round(cotisation_annuelle))
+        projection.interets.append(round(interets))
+        projection.capital_debut.append(round(capital))
+        projection.capital_fin.append(round(capital + cotisation_annuelle + interets))
         
         capital += cotisation_annuelle + interets
         salaire *= (1 + progression_salariale)
     
     rente_mensuelle = (capital * LPP.TAUX_CONVERSION) / 12
-    total_cotisations = sum(p.cotisation for p in projection_annuelle)
-    total_interets = sum(p.interets for p in projection_annuelle)
+    total_cotisations = sum(projection.cotisation)
+    total_interets = sum(projection.interets)
     
     return ResultatLPP(
         capital_initial=capital_initial,
         capital_final=round(capital),
         rente_mensuelle=round(rente_mensuelle, 2),
         salaire_coordonne=calculer_salaire_coordonne(salaire_actuel),
-        projection=projection_annuelle,
+        projection=projection,
         total_cotisations=total_cotisations,
         total_interets=total_interets
     )
@@ -426,7 +561,10 @@ def calculer_retraite_complete(
     
     # Conjoint (si marié)
     situation_conjoint: Optional[str] = None,  # 'sait', 'ne_sait_pas', 'jamais_travaille'
-    rente_conjoint: Optional[float] = None
+    rente_conjoint: Optional[float] = None,
+
+    # Mode de calcul LPP
+    detail_lpp: bool = True
 ) -> Dict:
     """
     Calcule la projection de retraite complète
@@ -443,6 +581,7 @@ def calculer_retraite_complete(
         capital_lpp: Capital LPP actuel
         situation_conjoint: Situation du conjoint si marié
         rente_conjoint: Rente AVS du conjoint si connue
+        detail_lpp: Si False, LPP en mode rapide (forme fermée, projection vide)
         
     Returns:
         Dictionnaire avec tous les résultats de calcul
@@ -463,7 +602,8 @@ def calculer_retraite_complete(
         age_actuel=age_actuel,
         age_retraite=age_retraite,
         salaire_actuel=salaire_actuel,
-        capital_initial=capital_lpp
+        capital_initial=capital_lpp,
+        detail=detail_lpp
     )
     
     # Gestion du conjoint (si marié)
@@ -531,19 +671,8 @@ def calculer_retraite_complete(
             'salaire_coordonne': lpp.salaire_coordonne,
             'total_cotisations': lpp.total_cotisations,
             'total_interets': lpp.total_interets,
-            'projection': [
-                {
-                    'age': p.age,
-                    'salaire': p.salaire,
-                    'salaire_coordonne': p.salaire_coordonne,
-                    'taux_epargne': p.taux_epargne,
-                    'cotisation': p.cotisation,
-                    'interets': p.interets,
-                    'capital_debut': p.capital_debut,
-                    'capital_fin': p.capital_fin
-                }
-                for p in lpp.projection
-            ]
+            # en colonnes ({'age': [...], 'capital_fin': [...], ...}), sans copie
+            'projection': lpp.projection.colonnes()
         },
         'conjoint': conjoint_info,
         'scenarios': [
@@ -764,7 +893,20 @@ def test_calculs():
     assert plaf.plafonne == True
     assert plaf.total_final == 3780
     print(f"  PASSED - Plafonnement appliqué: {plaf.total_final} CHF")
-    
+
+    # Test 6: LPP mode rapide (forme fermée) = boucle annuelle
+    print("\n✓ Test 6: LPP mode rapide")
+    for args in [(25, 65, 60000, 0), (45, 65, 85000, 150000), (30, 64, 20000, 5000), (50, 70, 120000, 300000)]:
+        lent = calculer_lpp(*args)
+        rapide = calculer_lpp(*args, detail=False)
+        assert rapide.capital_final == lent.capital_final
+        assert rapide.rente_mensuelle == lent.rente_mensuelle
+        assert len(rapide.projection) == 0
+        assert len(lent.projection) == args[1] - args[0]
+        assert lent.projection.capital_fin[-1] == lent.capital_final
+        assert lent.projection[-1] == ProjectionAnnuelle(*(col[-1] for col in lent.projection.colonnes().values()))
+    print("  PASSED")
+
     print("\n✅ Tous les tests sont passés!")
 
 
@@ -0,0 +1,148 @@
+"""
+Faux serveur Brevo (POST /v3/smtp/email) pour les tests et benchmarks.
+
+- HTTP/1.1 keep-alive, un thread par connexion (ThreadingHTTPServer)
+- répond 201 {"messageId": ...} ; avec messageVersions, un messageId par
+  destinataire ({"messageIds": [...]}) comme l'API batch
+- injection de pannes : statuts forcés (ex: 429, 503) puis taux d'erreur
+  aléatoire, latence fixe ; adresses rejetées : 400 "email is not valid"
+  pour toute requête qui en contient une
+- compteurs : requêtes, connexions, payloads acceptés, pic de requêtes
+  simultanées
+
+Usage :
+    python fake_brevo.py --port 8025 --latence-ms 50 --taux-erreur 0.05
+    BREVO_URL=http://127.0.0.1:8025/v3/smtp/email uvicorn main:app
+"""
+
+import argparse
+import json
+import random
+import socket
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def setup(self):
+        super().setup()
+        # en-têtes et corps partent en deux écritures : sans TCP_NODELAY,
+        # Nagle + ACK retardé ajoutent ~40 ms par réponse en keep-alive
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        with self.server.lock:
+            self.server.connexions += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def _repondre(self, statut: int, corps: dict, entetes: dict = None):
+        donnees = json.dumps(corps).encode()
+        self.send_response(statut)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(donnees)))
+        for cle, valeur in (entetes or {}).items():
+            self.send_header(cle, valeur)
+        self.end_headers()
+        self.wfile.write(donnees)
+
+    def do_POST(self):
+        serveur = self.server
+        corps = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+        with serveur.lock:
+            serveur.requetes += 1
+            serveur.simultanes += 1
+            serveur.max_simultanes = max(serveur.max_simultanes, serveur.simultanes)
+            force = serveur.statuts_forces.pop(0) if serveur.statuts_forces else None
+
+        try:
+            if serveur.latence:
+                time.sleep(serveur.latence)
+
+            if not self.path.endswith("/smtp/email"):
+                return self._repondre(404, {"code": "not_found"})
+            if not self.headers.get("api-key"):
+                return self._repondre(401, {"code": "unauthorized"})
+
+            statut = force
+            if statut is None and serveur.taux_erreur and random.random() < serveur.taux_erreur:
+                statut = random.choice((429, 503))
+            if statut is not None:
+                return self._repondre(statut, {"code": "erreur_simulee"}, {"Retry-After": "0"} if statut == 429 else None)
+
+            payload = json.loads(corps or b"{}")
+            versions = payload.get("messageVersions") or [payload]
+            if any(d.get("email") in serveur.rejetees for v in versions for d in v.get("to", [])):
+                return self._repondre(400, {"code": "invalid_parameter", "message": "email is not valid in to"})
+
+            with serveur.lock:
+                serveur.recus.append(payload)
+
+            versions = payload.get("messageVersions")
+            if versions:
+                ids = [f"<{uuid.uuid4()}@fake-brevo>" for v in versions for _ in v.get("to", [])]
+                return self._repondre(201, {"messageIds": ids})
+            return self._repondre(201, {"messageId": f"<{uuid.uuid4()}@fake-brevo>"})
+        finally:
+            with serveur.lock:
+                serveur.simultanes -= 1
+
+
+class FakeBrevo(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, adresse, latence: float = 0.0, taux_erreur: float = 0.0, statuts_forces=None,
+                 rejetees=None):
+        super().__init__(adresse, _Handler)
+        self.lock = threading.Lock()
+        self.latence = latence
+        self.taux_erreur = taux_erreur
+        self.statuts_forces = list(statuts_forces or [])
+        self.rejetees = set(rejetees or [])
+
+        self.requetes = 0
+        self.connexions = 0
+        self.simultanes = 0
+        self.max_simultanes = 0
+        self.recus = []
+
+    def destinataires(self) -> int:
+        """Nombre de destinataires acceptés (envois simples + versions)."""
+        total = 0
+        for payload in self.recus:
+            versions = payload.get("messageVersions") or [payload]
+            total += sum(len(v.get("to", [])) for v in versions)
+        return total
+
+    def arreter(self):
+        self.shutdown()
+        self.server_close()
+
+
+def demarrer_fake_brevo(port: int = 0, **options):
+    """Démarre le serveur dans un thread. Retourne (serveur, url)."""
+    serveur = FakeBrevo(("127.0.0.1", port), **options)
+    threading.Thread(target=serveur.serve_forever, daemon=True).start()
+    return serveur, f"http://127.0.0.1:{serveur.server_address[1]}/v3/smtp/email"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8025)
+    parser.add_argument("--latence-ms", type=float, default=0)
+    parser.add_argument("--taux-erreur", type=float, default=0)
+    args = parser.parse_args()
+
+    serveur = FakeBrevo(("127.0.0.1", args.port), latence=args.latence_ms / 1000, taux_erreur=args.taux_erreur)
+    print(f"📨 Faux Brevo sur http://127.0.0.1:{args.port}/v3/smtp/email")
+    try:
+        serveur.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"🛑 {serveur.requetes} requête(s), {serveur.destinataires()} destinataire(s) acceptés")
+        serveur.server_close()
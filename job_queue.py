@@ -0,0 +1,343 @@
+import os
+import traceback
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import text, or_, and_, update
+from sqlalchemy.orm import Session
+
+from models.models import Job
+
+# =========================================================
+# FILE DE JOBS DURABLE (TABLE jobs)
+# =========================================================
+# - enqueue() ajoute le job dans la session de l'appelant : il est commité
+#   dans la même transaction que le reste (ex: WebhookDelivery)
+# - reclamer() prend des jobs avec SELECT ... FOR UPDATE SKIP LOCKED :
+#   plusieurs workers (threads ou processus) ne prennent jamais le même job
+# - un job qui échoue est replanifié avec un backoff exponentiel, puis passe
+#   en "echec" après max_tentatives
+# - un job "en_cours" dont le worker est mort (verrou plus vieux que
+#   JOB_VISIBILITE_SECONDES) redevient réclamable, sauf s'il a épuisé ses
+#   tentatives (job qui tue son worker : OOM, SIGKILL) : il passe en "echec"
+# - verrouille_a sert de jeton de réclamation : marquer_termine /
+#   marquer_echec ne touchent le job que si ce jeton est toujours le sien
+#   (un worker lent ne réécrit pas l'état du job réclamé par un autre)
+# - un handler pas encore prêt (dépendance non traitée) lève JobReporte :
+#   le job est replanifié sans consommer de tentative et libère le worker
+# - un handler dont l'effet ne doit pas être rejoué lève JobAbandonne
+#   (refus définitif -> "echec") ou JobIncertain (effet peut-être produit,
+#   ex : email sans réponse de Brevo -> "incertain") : jamais de retry
+
+JOB_BACKOFF_BASE_SECONDES = float(os.getenv("JOB_BACKOFF_BASE_SECONDES", "30"))
+JOB_BACKOFF_MAX_SECONDES = float(os.getenv("JOB_BACKOFF_MAX_SECONDES", "3600"))
+JOB_VISIBILITE_SECONDES = float(os.getenv("JOB_VISIBILITE_SECONDES", "900"))
+
+EN_ATTENTE = "en_attente"
+EN_COURS = "en_cours"
+TERMINE = "termine"
+ECHEC = "echec"
+INCERTAIN = "incertain"
+
+
+class JobReporte(Exception):
+    """Levée par un handler : le job n'est pas prêt, à reprendre dans `delai` secondes."""
+
+    def __init__(self, delai: float, raison: str = ""):
+        super().__init__(raison)
+        self.delai = delai
+
+
+class JobAbandonne(Exception):
+    """Levée par un handler : échec définitif, le job n'est pas rejoué."""
+
+    statut = ECHEC
+
+
+class JobIncertain(JobAbandonne):
+    """Levée par un handler : l'effet a pu se produire, le rejouer risquerait un doublon."""
+
+    statut = INCERTAIN
+
+
+def _maintenant() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def enqueue(db: Session, type_job: str, payload: dict, max_tentatives: int = 5) -> Job:
+    """Ajoute un job à la session (pas de commit ici)."""
+    job = Job(
+        type=type_job,
+        payload=payload,
+        statut=EN_ATTENTE,
+        tentatives=0,
+        max_tentatives=max_tentatives,
+        disponible_a=_maintenant(),
+    )
+    db.add(job)
+    return job
+
+
+def reclamer(db: Session, types=None, limite: int = 1) -> list:
+    """
+    Réclame jusqu'à `limite` jobs disponibles et les passe "en_cours".
+    Retourne des dicts détachés (id, type, payload, tentatives, verrouille_a) ;
+    verrouille_a est le jeton à repasser à marquer_termine / marquer_echec.
+    """
+    now = _maintenant()
+    expire = now - timedelta(seconds=JOB_VISIBILITE_SECONDES)
+
+    # verrou expiré et plus de tentative : le worker est mort à chaque essai
+    abandon = (
+        update(Job)
+        .where(Job.statut == EN_COURS, Job.verrouille_a < expire, Job.tentatives >= Job.max_tentatives)
+        .values(
+            statut=ECHEC,
+            termine_a=now,
+            verrouille_a=None,
+            derniere_erreur="Verrou expiré (worker arrêté pendant l'exécution), tentatives épuisées",
+        )
+    )
+    if types:
+        abandon = abandon.where(Job.type.in_(list(types)))
+    abandonnes = db.execute(abandon).rowcount
+    if abandonnes:
+        print(f"❌ {abandonnes} job(s) en_cours abandonnés (verrou expiré, tentatives épuisées)")
+
+    query = (
+        db.query(Job)
+        .filter(
+            or_(
+                and_(Job.statut == EN_ATTENTE, Job.disponible_a <= now),
+                and_(
+                    Job.statut == EN_COURS,
+                    Job.verrouille_a < expire,
+                    Job.tentatives < Job.max_tentatives,
+                ),
+            )
+        )
+    )
+    if types:
+        query = query.filter(Job.type.in_(list(types)))
+
+    jobs = (
+        query.order_by(Job.disponible_a, Job.id)
+        .limit(limite)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+
+    reclames = []
+    for job in jobs:
+        job.statut = EN_COURS
+        job.verrouille_a = now
+        job.tentatives += 1
+        reclames.append({
+            "id": job.id,
+            "type": job.type,
+            "payload": job.payload,
+            "tentatives": job.tentatives,
+            "verrouille_a": now,
+            "created_at": job.created_at,
+        })
+
+    db.commit()
+    return reclames
+
+
+def statut_job(db: Session, job_id: int):
+    """Statut courant d'un job, ou None s'il n'existe pas."""
+    return db.query(Job.statut).filter(Job.id == job_id).scalar()
+
+
+def etat_job(db: Session, job_id: int):
+    """(statut, âge en secondes depuis la création), ou (None, None) si le job n'existe pas."""
+    ligne = db.query(Job.statut, Job.created_at).filter(Job.id == job_id).first()
+    if ligne is None:
+        return None, None
+    return ligne.statut, (_maintenant() - ligne.created_at).total_seconds()
+
+
+def delai_backoff(tentatives: int) -> float:
+    return min(JOB_BACKOFF_MAX_SECONDES, JOB_BACKOFF_BASE_SECONDES * (2 ** max(0, tentatives - 1)))
+
+
+def _filtre_reclame(db: Session, job_id: int, verrou: datetime):
+    """Le job, seulement s'il est toujours en cours sous ce jeton de réclamation."""
+    return db.query(Job).filter(Job.id == job_id, Job.statut == EN_COURS, Job.verrouille_a == verrou)
+
+
+def marquer_termine(db: Session, job_id: int, verrou: datetime) -> bool:
+    """Retourne False si le job a été réclamé à nouveau entre-temps (rien n'est écrit)."""
+    modifies = _filtre_reclame(db, job_id, verrou).update(
+        {"statut": TERMINE, "termine_a": _maintenant(), "verrouille_a": None},
+        synchronize_session=False,
+    )
+    db.commit()
+    return modifies == 1
+
+
+def reporter(db: Session, job_id: int, verrou: datetime, delai: float) -> bool:
+    """Remet le job en attente dans `delai` secondes ; la tentative en cours n'est pas comptée."""
+    modifies = _filtre_reclame(db, job_id, verrou).update(
+        {
+            "statut": EN_ATTENTE,
+            "disponible_a": _maintenant() + timedelta(seconds=delai),
+            "verrouille_a": None,
+            "tentatives": Job.tentatives - 1,
+        },
+        synchronize_session=False,
+    )
+    db.commit()
+    return modifies == 1
+
+
+def abandonner(db: Session, job_id: int, verrou: datetime, statut: str, erreur: str) -> bool:
+    """Passe le job en `statut` final (echec / incertain) sans retry."""
+    modifies = _filtre_reclame(db, job_id, verrou).update(
+        {"statut": statut, "termine_a": _maintenant(), "verrouille_a": None, "derniere_erreur": (erreur or "")[-4000:]},
+        synchronize_session=False,
+    )
+    db.commit()
+    return modifies == 1
+
+
+def marquer_echec(db: Session, job_id: int, verrou: datetime, erreur: str) -> bool:
+    """
+    Replanifie le job avec backoff, ou le passe en échec définitif.
+    Retourne False si le job a été réclamé à nouveau entre-temps.
+    """
+    job = _filtre_reclame(db, job_id, verrou).with_for_update().first()
+    if not job:
+        db.rollback()
+        return False
+
+    job.derniere_erreur = (erreur or "")[-4000:]
+    job.verrouille_a = None
+
+    if job.tentatives >= job.max_tentatives:
+        job.statut = ECHEC
+        job.termine_a = _maintenant()
+    else:
+        job.statut = EN_ATTENTE
+        job.disponible_a = _maintenant() + timedelta(seconds=delai_backoff(job.tentatives))
+
+    db.commit()
+    return True
+
+
+def executer(db_factory, job: dict, handlers: dict) -> bool:
+    """
+    Exécute un job réclamé et enregistre son issue.
+    Une exception du handler = échec (retry selon backoff), sauf JobReporte
+    et JobAbandonne / JobIncertain (voir plus haut).
+    """
+    handler = handlers.get(job["type"])
+    debut = _maintenant()
+
+    try:
+        if handler is None:
+            raise RuntimeError(f"Aucun handler pour le type de job {job['type']}")
+        handler(**job["payload"])
+    except JobReporte as e:
+        db = db_factory()
+        try:
+            reporter(db, job["id"], job["verrouille_a"], e.delai)
+        finally:
+            db.close()
+        print(f"⏳ Job {job['id']} ({job['type']}) reporté de {e.delai:.0f}s : {e}")
+        return False
+    except JobAbandonne as e:
+        print(f"❌ Job {job['id']} ({job['type']}) {e.statut}, sans retry :", e)
+        db = db_factory()
+        try:
+            if not abandonner(db, job["id"], job["verrouille_a"], e.statut, traceback.format_exc()):
+                print(f"⚠️ Job {job['id']} réclamé par un autre worker entre-temps : {e.statut} non enregistré")
+        finally:
+            db.close()
+        return False
+    except Exception as e:
+        print(f"❌ Job {job['id']} ({job['type']}) tentative {job['tentatives']} en échec :", repr(e))
+        db = db_factory()
+        try:
+            if not marquer_echec(db, job["id"], job["verrouille_a"], traceback.format_exc()):
+                print(f"⚠️ Job {job['id']} réclamé par un autre worker entre-temps : échec non enregistré")
+        finally:
+            db.close()
+        return False
+
+    db = db_factory()
+    try:
+        if not marquer_termine(db, job["id"], job["verrouille_a"]):
+            print(f"⚠️ Job {job['id']} réclamé par un autre worker entre-temps : fin non enregistrée")
+            return False
+    finally:
+        db.close()
+
+    fin = _maintenant()
+    attente = (debut - job["created_at"]).total_seconds() if job.get("created_at") else float("nan")
+    print(
+        f"✅ Job {job['id']} ({job['type']}) terminé | "
+        f"attente={attente:.1f}s | exécution={(fin - debut).total_seconds():.1f}s"
+    )
+    return True
+
+
+# =========================================================
+# MÉTRIQUES
+# =========================================================
+SQL_METRIQUES_FILE = text("""
+    SELECT statut,
+           count(*) AS nb,
+           extract(epoch FROM now() - min(disponible_a)) AS plus_ancien_secondes
+    FROM jobs
+    GROUP BY statut
+""")
+
+SQL_METRIQUES_LATENCE = text("""
+    SELECT type,
+           count(*) AS nb,
+           percentile_cont(0.5) WITHIN GROUP (ORDER BY extract(epoch FROM termine_a - created_at)) AS p50,
+           percentile_cont(0.99) WITHIN GROUP (ORDER BY extract(epoch FROM termine_a - created_at)) AS p99,
+           avg(tentatives) AS tentatives_moyennes
+    FROM jobs
+    WHERE statut = 'termine' AND termine_a >= now() - make_interval(secs => :fenetre)
+    GROUP BY ROLLUP (type)
+""")
+
+
+def metriques(db: Session, fenetre_secondes: int = 3600) -> dict:
+    """
+    Profondeur de la file par statut et latence bout-en-bout (création ->
+    fin) des jobs terminés sur la fenêtre, globale et par type de job (une
+    étape de commande = un type). Calculé en DB : valable quel que soit le
+    processus qui exécute les jobs.
+    """
+    file = {}
+    for statut, nb, plus_ancien in db.execute(SQL_METRIQUES_FILE):
+        file[statut] = {
+            "nb": nb,
+            "plus_ancien_secondes": round(float(plus_ancien), 1) if plus_ancien is not None else None,
+        }
+
+    def arrondi(valeur):
+        return round(float(valeur), 2) if valeur is not None else None
+
+    latence = {"termines": 0, "p50_secondes": None, "p99_secondes": None, "tentatives_moyennes": None}
+    par_type = {}
+    for ligne in db.execute(SQL_METRIQUES_LATENCE, {"fenetre": fenetre_secondes}).mappings():
+        valeurs = {
+            "termines": ligne["nb"],
+            "p50_secondes": arrondi(ligne["p50"]),
+            "p99_secondes": arrondi(ligne["p99"]),
+            "tentatives_moyennes": arrondi(ligne["tentatives_moyennes"]),
+        }
+        if ligne["type"] is None:
+            latence = valeurs  # ligne de total du ROLLUP
+        else:
+            par_type[ligne["type"]] = valeurs
+
+    return {
+        "file": file,
+        "profondeur": sum(v["nb"] for s, v in file.items() if s in (EN_ATTENTE, EN_COURS)),
+        "latence": {"fenetre_secondes": fenetre_secondes, **latence, "par_type": par_type},
+    }
@@ -5,26 +5,46 @@ print("=== Backend MaretraiteSuisse chargé ===")
 # =========================================================
 import os
 import base64
-import requests
 import hmac
 import hashlib
+import json
+import threading
 
-from fastapi import FastAPI, Depends, Request, BackgroundTasks
-from fastapi.responses import FileResponse, JSONResponse
+import requests
+from fastapi import FastAPI, Depends, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 from database import engine, get_db, SessionLocal
-from simulateur_avs_lpp import calcul_complet_retraite
+from simulateur_avs_lpp import calcul_complet_retraite_memo, CACHE_CALCUL
 from models.models import Base, Client, Simulation, WebhookDelivery
+from job_queue import (
+    enqueue, etat_job, JobReporte, JobAbandonne, JobIncertain,
+    TERMINE as JOB_TERMINE, ECHEC as JOB_ECHEC, INCERTAIN as JOB_INCERTAIN, metriques as metriques_jobs,
+)
+from worker import demarrer_workers
 from routes.avis import router as avis_router
-from pdf_generator import generer_pdf_retraite
+from pdf_service import get_service_pdf, ServicePDFSature
+from cache_pdf import get_cache_pdf
+from pdf_lot import flux_zip_pdf, filtre_simulations, PDF_LOT_MAX
 from rate_limit import is_rate_limited
-from schemas import SubmitPayload
+from brevo_client import get_client_brevo, jamais_parti, BREVO_API_KEY, STATUTS_RETRY
+from avis_cron import planifier_demande_avis, envoyer_demandes_avis
+from schemas import (
+    SubmitPayload, BalayageAgePayload, MonteCarloPayload, ObjectifPayload, OptimisationRachatPayload,
+)
+from calculateur_batch import balayage_age_depuis_donnees
+from calculateur_monte_carlo import monte_carlo_depuis_donnees
+from solveur_retraite import resoudre_depuis_donnees
+from optimiseur_rachat import optimiser_rachats
 
 import time
-from sqlalchemy import text
+from sqlalchemy import select, text, func
+from datetime import datetime
 
 ENV = os.getenv("ENV", "production").lower()
 
@@ -157,17 +177,68 @@ def mask_email(email: str) -> str:
 # =========================================================
 # CONFIG BREVO
 # =========================================================
-BREVO_API_KEY = os.getenv("BREVO_API_KEY")
-BREVO_URL = "https://api.brevo.com/v3/smtp/email"
 SHOPIFY_WEBHOOK_SECRET = os.getenv("SHOPIFY_WEBHOOK_SECRET")
 EXPECTED_SHOP_DOMAIN = os.getenv("SHOPIFY_SHOP_DOMAIN", "").strip().lower()
 EXPECTED_PRODUCT_ID = int(os.getenv("SHOPIFY_PRODUCT_ID", "0"))
 ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+CRON_TOKEN = os.getenv("CRON_TOKEN")  # exigé par /cron-avis : refusé (503) s'il n'est pas défini
 SENDER = {
     "email": "noreply@maretraitesuisse.ch",
     "name": "Ma Retraite Suisse"
 }
 
+def verifier_admin(request: Request):
+    """Retourne une JSONResponse d'erreur si le header X-Admin-Token est invalide, sinon None."""
+    token = request.headers.get("X-Admin-Token")
+
+    if not ADMIN_TOKEN:
+        return JSONResponse(
+            status_code=500,
+            content={"error": "ADMIN_TOKEN non configuré"}
+        )
+
+    if token != ADMIN_TOKEN:
+        return JSONResponse(
+            status_code=401,
+            content={"error": "Accès non autorisé"}
+        )
+
+    return None
+
+# Issue d'un envoi pour la file de jobs (voir JOB PAIEMENT) :
+# - 2xx : envoyé
+# - 429 / 503 (après les retries du client) ou connexion impossible : l'email
+#   n'est pas parti, exception ordinaire -> l'étape est rejouée
+# - timeout de lecture, 500 / 502 / 504 : Brevo a pu accepter l'email ->
+#   JobIncertain, jamais rejoué (pas de doublon chez le client)
+# - autre refus (4xx) : le même envoi serait refusé -> JobAbandonne
+def _envoyer_brevo(payload: dict, libelle: str):
+    try:
+        resp = get_client_brevo().envoyer(payload)
+
+    except requests.RequestException as e:
+        print(f"❌ Erreur Brevo {libelle} :", repr(e))
+        if jamais_parti(e):
+            raise
+        raise JobIncertain(f"Brevo sans réponse ({libelle}) : {e!r}") from e
+
+    print("📨 Brevo status:", resp.status_code)
+    try:
+        print("📨 Brevo body:", resp.json())
+    except Exception:
+        print("📨 Brevo body (raw):", resp.text)
+
+    if resp.status_code < 300:
+        return
+
+    erreur = f"Brevo {resp.status_code} ({libelle}) : {resp.text[:500]}"
+    if resp.status_code in STATUTS_RETRY:
+        raise RuntimeError(erreur)
+    if resp.status_code >= 500:
+        raise JobIncertain(erreur)
+    raise JobAbandonne(erreur)
+
+
 def envoyer_email(template_id: int, email: str, prenom: str):
     if not BREVO_API_KEY:
         print("❌ BREVO_API_KEY manquant côté Render")
@@ -180,37 +251,16 @@ def envoyer_email(template_id: int, email: str, prenom: str):
         "sender": SENDER
     }
 
-    try:
-        resp = requests.post(
-            BREVO_URL,
-            json=payload,
-            headers={
-                "accept": "application/json",
-                "api-key": BREVO_API_KEY,
-                "content-type": "application/json"
-            },
-            timeout=10
-        )
-
-    except Exception as e:
-        print("❌ Erreur Brevo :", str(e))
-        return
-
-    print("📨 Brevo status:", resp.status_code)
-    try:
-        print("📨 Brevo body:", resp.json())
-    except Exception:
-        print("📨 Brevo body (raw):", resp.text)
+    _envoyer_brevo(payload, f"template {template_id}")
 
     
 
-def envoyer_email_avec_pdf(template_id, email, prenom, pdf_path):
+def envoyer_email_avec_pdf(template_id, email, prenom, pdf_bytes: bytes):
     if not BREVO_API_KEY:
         print("❌ BREVO_API_KEY manquant côté Render")
         return
 
-    with open(pdf_path, "rb") as f:
-        pdf_content = base64.b64encode(f.read()).decode()
+    pdf_content = base64.b64encode(pdf_bytes).decode()
 
     payload = {
         "templateId": template_id,
@@ -223,27 +273,7 @@ def envoyer_email_avec_pdf(template_id, email, prenom, pdf_path):
         }]
     }
 
-    try:
-        resp = requests.post(
-            BREVO_URL,
-            json=payload,
-            headers={
-                "accept": "application/json",
-                "api-key": BREVO_API_KEY,
-                "content-type": "application/json"
-            },
-            timeout=10
-        )
-
-    except Exception as e:
-        print("❌ Erreur Brevo PDF :", str(e))
-        return
-
-    print("📨 Brevo status:", resp.status_code)
-    try:
-        print("📨 Brevo body:", resp.json())
-    except Exception:
-        print("📨 Brevo body (raw):", resp.text)
+    _envoyer_brevo(payload, "PDF")
 
 
 # =========================================================
@@ -252,7 +282,6 @@ def envoyer_email_avec_pdf(template_id, email, prenom, pdf_path):
 @app.post("/webhook/shopify-paid")
 async def shopify_paid(
     request: Request,
-    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
 ):
 
@@ -465,11 +494,16 @@ async def shopify_paid(
             content={"ok": False, "error": "Client not found"}
         )
 
+    prenom = (form_prenom_attr or client.prenom or "").strip()
+
     # =========================================================
     # IDEMPOTENCE — seulement APRÈS validations sécurité
     # =========================================================
+    # WebhookDelivery et job dans la même transaction : soit la commande est
+    # enregistrée ET planifiée, soit rien (Shopify renverra le webhook).
     try:
         db.add(WebhookDelivery(webhook_id=webhook_id, order_id=str(order_id)))
+        planifier_commande_payee(db, simulation.id, email_final, prenom)
         db.commit()
     except IntegrityError:
         db.rollback()
@@ -500,32 +534,105 @@ async def shopify_paid(
             content={"ok": False, "error": "Webhook persistence error"}
         )
 
-    prenom = (form_prenom_attr or client.prenom or "").strip()
-
-    background_tasks.add_task(
-        process_paid_order,
-        simulation.id,
-        email_final,
-        prenom
-    )
+    print("📥 Commande planifiée :", order_id)
 
     return {"ok": True}
     
 # =========================================================
 # ROUTE : SUBMIT
 # =========================================================
+# LPP en forme fermée (sans projection annuelle) : le PDF reconstruit
+# capital_history et les totaux LPP à partir des données au moment du rendu.
+SUBMIT_LPP_RAPIDE = parse_bool(os.getenv("SUBMIT_LPP_RAPIDE", "false"))
+
+# Log de debug du payload /submit (désactivé par défaut, ne pas activer en
+# production) : une ligne JSON, données personnelles masquées.
+SUBMIT_DEBUG_LOG = parse_bool(os.getenv("SUBMIT_DEBUG_LOG", "false"))
+
+CHAMPS_PERSONNELS_SUBMIT = ("prenom", "nom", "telephone")
+
+def payload_redacte(data: dict) -> dict:
+    """Copie du payload validé, sans données personnelles en clair."""
+    redacte = dict(data)
+    for champ in CHAMPS_PERSONNELS_SUBMIT:
+        if redacte.get(champ):
+            redacte[champ] = "***"
+    redacte["email"] = mask_email(redacte.get("email") or "")
+    return redacte
+
+def enregistrer_simulation(data: dict, resultat: dict) -> int:
+    """
+    Persistance client + simulation (bloquant: appelé via run_in_threadpool).
+    Retourne l'id de la simulation.
+
+    Une seule transaction :
+    - INSERT client ... ON CONFLICT (email) DO NOTHING RETURNING id
+      (pas de collision sur la contrainte unique quand deux /submit arrivent
+      avec le même email ; le client existant est conservé tel quel et sa
+      ligne n'est pas réécrite)
+    - client déjà connu (RETURNING vide) : SELECT id par email
+    - INSERT simulation ... RETURNING id
+    """
+    db = SessionLocal()
+    try:
+        # CLIENT (upsert)
+        stmt_client = pg_insert(Client).values(
+            prenom=data["prenom"],
+            nom=data["nom"],
+            email=data["email"],
+            telephone=data["telephone"]
+        )
+        stmt_client = stmt_client.on_conflict_do_nothing(
+            index_elements=[Client.email]
+        ).returning(Client.id)
+
+        client_id = db.execute(stmt_client).scalar_one_or_none()
+        if client_id is None:
+            client_id = db.execute(
+                select(Client.id).where(Client.email == data["email"])
+            ).scalar_one()
+
+        # SIMULATION
+        stmt_simulation = pg_insert(Simulation).values(
+            client_id=client_id,
+            statut_civil=data["statut_civil"],
+            statut_pro=data["statut_pro"],
+            age_actuel=data["age_actuel"],
+            age_retraite=data["age_retraite"],
+            salaire_actuel=data["salaire_actuel"],
+            salaire_moyen=data["salaire_moyen"],
+            annees_cotisees=data["annees_cotisees"],
+            annees_cotisees_lpp=data["annees_cotisees_lpp"],
+            annees_be=data["annees_be"],
+            annees_ba=data["annees_ba"],
+            capital_lpp=data["capital_lpp"],
+            rente_conjoint=data["rente_conjoint"],
+            has_3eme_pilier=data["has_3eme_pilier"],
+            type_3eme_pilier=data["type_3eme_pilier"],
+            donnees=data,
+            resultat=resultat
+        ).returning(Simulation.id)
+
+        simulation_id = db.execute(stmt_simulation).scalar_one()
+
+        db.commit()
+
+        return simulation_id
+
+    except Exception:
+        db.rollback()
+        raise
+
+    finally:
+        db.close()
+
+
 @app.post("/submit")
 async def submit(
     payload: SubmitPayload,
-    request: Request,
-    db: Session = Depends(get_db)
+    request: Request
 ):
 
-    try:
-        data = await request.json()
-        print("PAYLOAD RECU =", data)
-    except Exception as e:
-        print("ERREUR LECTURE PAYLOAD =", e)
     origin = (request.headers.get("origin") or "").lower()
     referer = (request.headers.get("referer") or "").lower()
 
@@ -545,117 +652,273 @@ async def submit(
 
     rate_key = f"submit:{client_ip}"
 
-    if is_rate_limited(rate_key, limit=10, window_seconds=60):
+    # backends partagés (sqlite / postgres) : aller-retour DB bloquant, hors
+    # de la boucle d'événements comme le calcul et l'enregistrement
+    if await run_in_threadpool(is_rate_limited, rate_key, limit=10, window_seconds=60):
         return JSONResponse(
             status_code=429,
             content={"success": False, "error": "Trop de requêtes"}
         )
 
+    # Le corps est déjà parsé et validé par FastAPI (SubmitPayload) :
+    # on ne relit pas request.json(), un seul model_dump().
     data = payload.model_dump()
 
+    if SUBMIT_DEBUG_LOG:
+        print("🧾 /submit payload:", json.dumps(payload_redacte(data), ensure_ascii=False))
 
-    # CLIENT
-    client = db.query(Client).filter(Client.email == data["email"]).first()
-    if not client:
-        client = Client(
-            prenom=data["prenom"],
-            nom=data["nom"],
-            email=data["email"],
-            telephone=data["telephone"]
-        )
-        db.add(client)
-        db.commit()
-        db.refresh(client)
-
-    # CALCUL
-    resultat = calcul_complet_retraite(data)
-
-    # SIMULATION
-    simulation = Simulation(
-        client_id=client.id,
-        statut_civil=data["statut_civil"],
-        statut_pro=data["statut_pro"],
-        age_actuel=data["age_actuel"],
-        age_retraite=data["age_retraite"],
-        salaire_actuel=data["salaire_actuel"],
-        salaire_moyen=data["salaire_moyen"],
-        annees_cotisees=data["annees_cotisees"],
-        annees_cotisees_lpp=data["annees_cotisees_lpp"],
-        annees_be=data["annees_be"],
-        annees_ba=data["annees_ba"],
-        capital_lpp=data["capital_lpp"],
-        rente_conjoint=data["rente_conjoint"],
-        has_3eme_pilier=data["has_3eme_pilier"],
-        type_3eme_pilier=data["type_3eme_pilier"],
-        donnees=data,
-        resultat=resultat
+    # Calcul (CPU) et accès DB (bloquants) hors de la boucle d'événements :
+    # le worker continue de servir les autres requêtes pendant ce temps.
+    resultat = await run_in_threadpool(
+        calcul_complet_retraite_memo, data, not SUBMIT_LPP_RAPIDE
     )
+    simulation_id = await run_in_threadpool(enregistrer_simulation, data, resultat)
 
-    db.add(simulation)
-    db.commit()
-    db.refresh(simulation)
-
-    
-
-    token = generate_secure_token(simulation.id)
+    token = generate_secure_token(simulation_id)
 
     return {
         "success": True,
-        "simulation_id": simulation.id,
+        "simulation_id": simulation_id,
         "secure_token": token,
         "resultat": resultat
     }
 
+# =========================================================
+# ROUTES : SIMULATION INTERACTIVE (curseurs, solveurs)
+# =========================================================
+# Calculs seuls, rien n'est enregistré. Même contrôle d'origine que
+# /submit, limite plus large : un curseur envoie une requête par cran.
+ORIGINES_AUTORISEES = (
+    "https://maretraitesuisse.ch",
+    "https://www.maretraitesuisse.ch",
+)
+
+def verifier_appel_public(request: Request, nom: str, limit: int = 120):
+    """Retourne une JSONResponse d'erreur (403 / 429) ou None."""
+    origin = (request.headers.get("origin") or "").lower()
+    referer = (request.headers.get("referer") or "").lower()
+
+    if not origin.startswith(ORIGINES_AUTORISEES) and not referer.startswith(ORIGINES_AUTORISEES):
+        print(f"❌ Requête /{nom} bloquée (origin non autorisé)", origin, referer)
+        return JSONResponse(
+            status_code=403,
+            content={"success": False, "error": "Forbidden"}
+        )
+
+    client_ip = request.headers.get("x-forwarded-for", "").split(",")[0].strip() or request.client.host
+
+    if is_rate_limited(f"{nom}:{client_ip}", limit=limit, window_seconds=60):
+        return JSONResponse(
+            status_code=429,
+            content={"success": False, "error": "Trop de requêtes"}
+        )
+
+    return None
+
+
+@app.post("/simulation/balayage-age")
+def balayage_age(payload: BalayageAgePayload, request: Request):
+    """Retraite pour chaque âge de départ de age_min à age_max, en colonnes."""
+    refus = verifier_appel_public(request, "balayage-age")
+    if refus:
+        return refus
+
+    data = payload.model_dump()
+    return {
+        "success": True,
+        "table": balayage_age_depuis_donnees(data, data["age_min"], data["age_max"]),
+    }
+
+
+@app.post("/simulation/monte-carlo-lpp")
+def monte_carlo_lpp(payload: MonteCarloPayload, request: Request):
+    """Bandes P10/P50/P90 du capital et de la rente LPP (taux et salaire aléatoires)."""
+    refus = verifier_appel_public(request, "monte-carlo-lpp", limit=30)
+    if refus:
+        return refus
+
+    data = payload.model_dump()
+    return {
+        "success": True,
+        "projection": monte_carlo_depuis_donnees(data, chemins=data["chemins"], seed=data["seed"]),
+    }
+
+
+@app.post("/simulation/objectif")
+def objectif(payload: ObjectifPayload, request: Request):
+    """Rachat LPP minimal ou âge de retraite minimal pour atteindre cible_mensuelle."""
+    refus = verifier_appel_public(request, "objectif")
+    if refus:
+        return refus
+
+    data = payload.model_dump()
+    return {
+        "success": True,
+        "inconnue": data["inconnue"],
+        "solution": resoudre_depuis_donnees(
+            data, data["inconnue"], data["cible_mensuelle"], rachat=data["rachat"], age_max=data["age_max"]
+        ),
+    }
+
+
+@app.post("/simulation/optimiser-rachat")
+def optimiser_rachat(payload: OptimisationRachatPayload, request: Request):
+    """Meilleurs plans de rachat LPP étalés (gain net après impôt)."""
+    refus = verifier_appel_public(request, "optimiser-rachat", limit=30)
+    if refus:
+        return refus
+
+    data = payload.model_dump()
+    return {
+        "success": True,
+        "optimisation": optimiser_rachats(
+            age_actuel=data["age_actuel"],
+            age_retraite=data["age_retraite"],
+            salaire_actuel=data["salaire_actuel"],
+            potentiel=data["potentiel_rachat"],
+            plafond_annuel=data["plafond_annuel"],
+            revenu_imposable=data["revenu_imposable"],
+            annees_max=data["annees_max"],
+            top=data["top"],
+        ),
+    }
+
+
 # =========================================================
 # ROUTES AVIS
 # =========================================================
 app.include_router(avis_router, prefix="/api/avis")
 
 # =========================================================
-# BACKGROUND TASK PAIEMENT
+# JOB PAIEMENT
 # =========================================================
-def process_paid_order(simulation_id: int, email_final: str, prenom: str):
+# Exécuté par les workers de la file (worker.py) : une exception fait
+# échouer la tentative, le job est rejoué avec backoff.
+#
+# Une commande payée = deux jobs indépendants, planifiés ensemble :
+#
+#   email_confirmation  ──────────────┐
+#   email_pdf : confirmation traitée ? ── rendu PDF ── envoi PDF
+#                   └─ non : rendu lancé en fond, job reporté
+#
+# - la confirmation part dès qu'un worker est libre
+# - chaque étape a ses propres tentatives : un retry de l'envoi PDF ne
+#   renvoie jamais la confirmation (et le rendu est relu du cache PDF)
+# - l'email PDF n'est envoyé qu'une fois la confirmation traitée (envoyée
+#   ou en échec / incertain), pour que le client reçoive les deux emails dans
+#   l'ordre. Sinon le job est reporté de PDF_REPORT_SECONDES sans consommer
+#   de tentative ni bloquer de worker (les confirmations attendues peuvent
+#   tourner même si tous les workers ont pris des jobs PDF). Au-delà de
+#   PDF_ATTENTE_CONFIRMATION_SECONDES après la commande, le PDF part quand même.
+PDF_ATTENTE_CONFIRMATION_SECONDES = float(os.getenv("PDF_ATTENTE_CONFIRMATION_SECONDES", "30"))
+PDF_REPORT_SECONDES = float(os.getenv("PDF_REPORT_SECONDES", "2"))
+
+JOB_EMAIL_CONFIRMATION = "email_confirmation"
+JOB_EMAIL_PDF = "email_pdf"
+
+
+def planifier_commande_payee(db: Session, simulation_id: int, email_final: str, prenom: str):
+    """Ajoute les jobs d'une commande à la session de l'appelant (pas de commit)."""
+    confirmation = enqueue(db, JOB_EMAIL_CONFIRMATION, {
+        "email_final": email_final,
+        "prenom": prenom,
+    })
+    db.flush()  # id de la confirmation, dont dépend l'email PDF
+
+    enqueue(db, JOB_EMAIL_PDF, {
+        "simulation_id": simulation_id,
+        "email_final": email_final,
+        "prenom": prenom,
+        "confirmation_job_id": confirmation.id,
+    })
+
+    # email J+1 de demande d'avis, envoyé par /cron-avis
+    planifier_demande_avis(db, email_final, prenom, simulation_id)
+
+
+def envoyer_confirmation_commande(email_final: str, prenom: str):
+    debut = time.perf_counter()
+    envoyer_email(1, email_final, prenom)
+    print(f"✅ email confirmation envoyé | {(time.perf_counter() - debut) * 1000:.0f} ms")
+
+
+def confirmation_traitee(confirmation_job_id: int) -> bool:
+    """
+    Vrai si la confirmation est envoyée, en échec / incertain, introuvable, ou
+    en attente depuis plus de PDF_ATTENTE_CONFIRMATION_SECONDES.
+    """
     db = SessionLocal()
-    pdf_path = None
-
     try:
-        print(f"🚀 process_paid_order START | simulation_id={simulation_id} | email={email_final} | prenom={prenom}")
+        statut, age = etat_job(db, confirmation_job_id)
+    finally:
+        db.close()
+
+    if statut in (None, JOB_TERMINE, JOB_ECHEC, JOB_INCERTAIN):
+        return True
+    if age >= PDF_ATTENTE_CONFIRMATION_SECONDES:
+        print(f"⚠️ Confirmation {confirmation_job_id} toujours {statut} : envoi du PDF sans attendre")
+        return True
+    return False
 
+
+def envoyer_pdf_commande(simulation_id: int, email_final: str, prenom: str, confirmation_job_id: int = None):
+    db = SessionLocal()
+    try:
         simulation = db.query(Simulation).filter(Simulation.id == simulation_id).first()
-        if not simulation:
-            print("❌ simulation introuvable en background")
-            return
+    finally:
+        db.close()
 
-        print("✅ simulation récupérée")
+    if not simulation:
+        print("❌ simulation introuvable en background :", simulation_id)
+        return
 
-        pdf_path = generer_pdf_retraite(
-            donnees=simulation.donnees,
-            resultats=simulation.resultat
-        )
-        print("✅ PDF généré :", pdf_path)
+    service = get_service_pdf()
 
-        envoyer_email(1, email_final, prenom)
-        print("✅ email confirmation envoyé")
+    if confirmation_job_id is not None and not confirmation_traitee(confirmation_job_id):
+        # rendu en fond pendant le report : la reprise le relit du cache PDF
+        # (un rendu déjà en vol pour la même simulation est réutilisé)
+        if get_cache_pdf() is not None:
+            try:
+                service.soumettre(simulation.donnees, simulation.resultat, attente_max=0)
+            except ServicePDFSature:
+                pass
+        raise JobReporte(PDF_REPORT_SECONDES, f"confirmation {confirmation_job_id} pas encore traitée")
 
-        envoyer_email_avec_pdf(2, email_final, prenom, pdf_path)
-        print("✅ email PDF envoyé")
+    debut = time.perf_counter()
+    pdf_bytes = service.rendre(simulation.donnees, simulation.resultat)
+    rendu = time.perf_counter()
 
-        print("✅ process_paid_order terminé")
+    envoyer_email_avec_pdf(2, email_final, prenom, pdf_bytes)
+    fin = time.perf_counter()
 
-    except Exception as e:
-        print("❌ ERREUR process_paid_order :", repr(e))
-        import traceback
-        traceback.print_exc()
+    print(
+        f"✅ email PDF envoyé | simulation={simulation_id} | {len(pdf_bytes)} octets | "
+        f"rendu={(rendu - debut) * 1000:.0f} ms | envoi={(fin - rendu) * 1000:.0f} ms"
+    )
 
-    finally:
-        try:
-            if pdf_path and os.path.exists(pdf_path):
-                os.remove(pdf_path)
-                print("🧹 PDF supprimé :", pdf_path)
-        except Exception as e:
-            print("⚠️ Erreur suppression PDF :", str(e))
 
-        db.close()
+JOB_HANDLERS = {
+    JOB_EMAIL_CONFIRMATION: envoyer_confirmation_commande,
+    JOB_EMAIL_PDF: envoyer_pdf_commande,
+}
+
+# Workers dans le processus web (défaut, pour un déploiement à un seul
+# service). Avec un service `python worker.py` séparé : JOB_WORKER_EMBARQUE=false.
+JOB_WORKER_EMBARQUE = parse_bool(os.getenv("JOB_WORKER_EMBARQUE", "true"))
+
+# Workers PDF démarrés au lancement (sinon au premier rendu). Par défaut
+# seulement si ce processus exécute aussi les jobs : un serveur web seul ne
+# charge la pile PDF (matplotlib, reportlab) qu'à la première régénération.
+PDF_PRECHAUFFER = parse_bool(os.getenv("PDF_PRECHAUFFER", "true" if JOB_WORKER_EMBARQUE else "false"))
+
+@app.on_event("startup")
+def startup_workers():
+    if JOB_WORKER_EMBARQUE:
+        demarrer_workers(JOB_HANDLERS)
+
+    if PDF_PRECHAUFFER:
+        # en arrière-plan : ne retarde pas l'ouverture du port
+        threading.Thread(target=get_service_pdf().prechauffer, daemon=True).start()
 
 
 # =========================
@@ -673,19 +936,9 @@ def regenerate_pdf_admin(
     # SÉCURITÉ ADMIN
     # =========================
 
-    token = request.headers.get("X-Admin-Token")
-
-    if not ADMIN_TOKEN:
-        return JSONResponse(
-            status_code=500,
-            content={"error": "ADMIN_TOKEN non configuré"}
-        )
-
-    if token != ADMIN_TOKEN:
-        return JSONResponse(
-            status_code=401,
-            content={"error": "Accès non autorisé"}
-        )
+    refus = verifier_admin(request)
+    if refus:
+        return refus
 
     print(f"🔁 Regénération PDF demandée pour simulation {simulation_id}")
 
@@ -719,22 +972,28 @@ def regenerate_pdf_admin(
         # GÉNÉRATION PDF
         # =========================
 
-        pdf_path = generer_pdf_retraite(
-            donnees=simulation.donnees,
-            resultat=simulation.resultat,
-            simulation_id=simulation.id
-        )
+        pdf_bytes = get_service_pdf().rendre(simulation.donnees, simulation.resultat)
 
-        print("✅ PDF régénéré :", pdf_path)
+        print(f"✅ PDF régénéré : {len(pdf_bytes)} octets")
 
         # =========================
         # RETOURNER LE FICHIER
         # =========================
 
-        return FileResponse(
-            pdf_path,
+        return Response(
+            content=pdf_bytes,
             media_type="application/pdf",
-            filename=f"simulation_{simulation.id}.pdf"
+            headers={"Content-Disposition": f'attachment; filename="simulation_{simulation.id}.pdf"'}
+        )
+
+    except ServicePDFSature:
+
+        print("⚠️ Service PDF saturé")
+
+        return JSONResponse(
+            status_code=503,
+            headers={"Retry-After": "10"},
+            content={"error": "Service PDF saturé, réessayer plus tard"}
         )
 
     except Exception as e:
@@ -745,6 +1004,127 @@ def regenerate_pdf_admin(
             status_code=500,
             content={"error": str(e)}
         )
+# =========================
+# REGÉNÉRATION PDF PAR LOT
+# =========================
+
+@app.get("/admin/regenerate-pdf-lot")
+def regenerate_pdf_lot_admin(
+    request: Request,
+    debut: int = None,
+    fin: int = None,
+    depuis: datetime = None,
+    jusqu_a: datetime = None,
+    db: Session = Depends(get_db)
+):
+    """
+    ZIP en streaming des PDF des simulations d'id dans [debut, fin] et/ou
+    créées dans [depuis, jusqu_a[. Erreurs et durées dans manifest.json.
+    """
+
+    refus = verifier_admin(request)
+    if refus:
+        return refus
+
+    if debut is None and fin is None and depuis is None and jusqu_a is None:
+        return JSONResponse(
+            status_code=400,
+            content={"error": "Filtre requis : debut/fin ou depuis/jusqu_a"}
+        )
+
+    conditions = filtre_simulations(debut, fin, depuis, jusqu_a)
+    total = db.query(func.count(Simulation.id)).filter(*conditions).scalar()
+
+    if total > PDF_LOT_MAX:
+        return JSONResponse(
+            status_code=400,
+            content={"error": f"{total} simulations, maximum {PDF_LOT_MAX} par lot"}
+        )
+
+    print(f"🔁 Regénération PDF par lot : {total} simulation(s)")
+
+    return StreamingResponse(
+        flux_zip_pdf(conditions, total),
+        media_type="application/zip",
+        headers={
+            "Content-Disposition": 'attachment; filename="simulations_pdf.zip"',
+            "X-Lot-Total": str(total),
+        }
+    )
+# =========================================================
+# BREVO (métriques du client HTTP)
+# =========================================================
+@app.get("/admin/brevo")
+def brevo_admin(request: Request):
+    refus = verifier_admin(request)
+    if refus:
+        return refus
+    return get_client_brevo().stats()
+
+
+# =========================================================
+# CACHE CALCUL (compteurs)
+# =========================================================
+@app.get("/admin/cache-calcul")
+def cache_calcul_admin(request: Request):
+    refus = verifier_admin(request)
+    if refus:
+        return refus
+
+    return CACHE_CALCUL.stats()
+
+# =========================================================
+# SERVICE PDF (compteurs)
+# =========================================================
+@app.get("/admin/pdf-service")
+def pdf_service_admin(request: Request):
+    refus = verifier_admin(request)
+    if refus:
+        return refus
+
+    return get_service_pdf().stats()
+
+# =========================================================
+# FILE DE JOBS (profondeur, latence)
+# =========================================================
+@app.get("/admin/jobs")
+def jobs_admin(request: Request, db: Session = Depends(get_db)):
+    refus = verifier_admin(request)
+    if refus:
+        return refus
+
+    return metriques_jobs(db)
+
+# =========================================================
+# CRON — DEMANDES D'AVIS J+1
+# =========================================================
+# Appelé chaque jour par .github/workflows/cron-avis.yml. Rejouable sans
+# risque : seules les demandes "a_envoyer" et dues partent.
+@app.get("/cron-avis")
+def cron_avis(request: Request, db: Session = Depends(get_db)):
+    if not CRON_TOKEN:
+        print("❌ CRON_TOKEN manquant côté Render : /cron-avis refusé")
+        return JSONResponse(
+            status_code=503,
+            content={"error": "CRON_TOKEN non configuré"}
+        )
+
+    if not hmac.compare_digest(request.headers.get("X-Cron-Token", ""), CRON_TOKEN):
+        return JSONResponse(
+            status_code=403,
+            content={"error": "Accès non autorisé"}
+        )
+
+    if not BREVO_API_KEY:
+        print("❌ BREVO_API_KEY manquant côté Render")
+        return JSONResponse(
+            status_code=500,
+            content={"error": "BREVO_API_KEY manquant"}
+        )
+
+    return envoyer_demandes_avis(db, SENDER)
+
+
 # =========================================================
 # PING
 # =========================================================
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, Index
 from sqlalchemy.sql import func
 
 from database import Base
@@ -23,3 +23,41 @@ class Avis(Base):
     published_at = Column(DateTime, nullable=True)
 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+# =========================================================
+# DEMANDE D'AVIS (EMAIL J+1 APRÈS UNE COMMANDE)
+# =========================================================
+# Une ligne par email client (contrainte unique) : un client qui commande
+# deux fois ne reçoit qu'une demande. Le statut est la trace d'envoi de
+# /cron-avis :
+# - a_envoyer : due dès envoyer_a
+# - en_cours  : réclamée par un run du cron (lot en vol) à reclame_a
+# - envoye    : acceptée par Brevo (message_id)
+# - incertain : Brevo n'a pas répondu (timeout), ou run interrompu avec la
+#               demande en_cours ; jamais renvoyée automatiquement, pour ne
+#               pas risquer un doublon
+# - echec     : refusée par Brevo après max tentatives
+class DemandeAvis(Base):
+    __tablename__ = "demandes_avis"
+
+    id = Column(Integer, primary_key=True)
+
+    email = Column(String, unique=True, nullable=False)
+    prenom = Column(String)
+    simulation_id = Column(Integer)
+
+    statut = Column(String, nullable=False, default="a_envoyer")
+    envoyer_a = Column(DateTime(timezone=True), nullable=False)
+    tentatives = Column(Integer, nullable=False, default=0)
+    reclame_a = Column(DateTime(timezone=True))
+
+    message_id = Column(String)
+    envoye_a = Column(DateTime(timezone=True))
+    derniere_erreur = Column(Text)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_demandes_avis_statut_envoyer_a", "statut", "envoyer_a"),
+    )
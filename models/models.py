@@ -9,7 +9,7 @@ from sqlalchemy import (
     Text
 )
 from sqlalchemy.dialects.postgresql import JSONB
-from sqlalchemy import UniqueConstraint
+from sqlalchemy import UniqueConstraint, Index
 from sqlalchemy.sql import func
 from database import Base
 
@@ -80,3 +80,37 @@ class WebhookDelivery(Base):
     webhook_id = Column(String, unique=True, nullable=False, index=True)
     order_id = Column(String, unique=True, nullable=False, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
+# =========================================================
+# JOBS (FILE DURABLE)
+# =========================================================
+class Job(Base):
+    __tablename__ = "jobs"
+
+    __table_args__ = (
+        Index("ix_jobs_statut_disponible_a", "statut", "disponible_a"),
+    )
+
+    id = Column(Integer, primary_key=True)
+
+    type = Column(String, nullable=False)
+    payload = Column(JSONB, nullable=False)
+
+    # en_attente -> en_cours -> termine | (en_attente ... ) -> echec
+    # en_cours -> echec | incertain (JobAbandonne / JobIncertain, sans retry)
+    statut = Column(String, nullable=False, default="en_attente", server_default="en_attente")
+
+    tentatives = Column(Integer, nullable=False, default=0, server_default="0")
+    max_tentatives = Column(Integer, nullable=False, default=5, server_default="5")
+
+    disponible_a = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    verrouille_a = Column(DateTime(timezone=True))
+    termine_a = Column(DateTime(timezone=True))
+
+    derniere_erreur = Column(Text)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<Job id={self.id} type={self.type} statut={self.statut} tentatives={self.tentatives}>"
@@ -0,0 +1,293 @@
+"""
+Calculateur de Retraite Suisse (AVS/LPP) 2025 — optimiseur de rachats LPP
+Recherche du meilleur plan de rachats étalé sur plusieurs années, sous un
+plafond annuel et le potentiel de rachat, en maximisant le gain net :
+
+    gain_net = gain de rente sur 20 ans + économie d'impôt − coût des rachats
+
+- impôt progressif (barème marginal simplifié BAREME_IMPOT, revenu
+  imposable projeté avec la progression salariale) : étaler les rachats
+  garde la déduction dans des tranches plus hautes
+- un rachat versé tôt porte intérêt LPP plus longtemps : le compromis entre
+  intérêt et progressivité fait l'optimum
+- candidats générés d'un coup (plans réguliers + plans aléatoires), évalués
+  comme une matrice (candidats × années), sans boucle Python par plan
+"""
+
+import os
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from calculateur_retraite import LPP, calculer_salaire_coordonne
+
+OPTIM_CANDIDATS = int(os.getenv("OPTIM_CANDIDATS", "4000"))
+OPTIM_ANNEES_MAX = int(os.getenv("OPTIM_ANNEES_MAX", "10"))
+OPTIM_SEED = int(os.getenv("OPTIM_SEED", "2025"))
+
+# Barème marginal simplifié (impôt fédéral + cantonal/communal moyen) :
+# (revenu imposable à partir duquel le taux s'applique, taux marginal)
+BAREME_IMPOT: Tuple[Tuple[float, float], ...] = (
+    (0, 0.0),
+    (15000, 0.05),
+    (30000, 0.10),
+    (50000, 0.15),
+    (75000, 0.20),
+    (100000, 0.25),
+    (150000, 0.30),
+    (250000, 0.35),
+)
+
+NIVEAUX_REGULIERS = (0.25, 0.5, 0.75, 1.0)  # fractions du potentiel
+
+
+# ============================================================================
+# IMPÔT ET ÉVALUATION VECTORISÉS
+# ============================================================================
+
+def impot_progressif(revenu: np.ndarray, bareme: Sequence[Tuple[float, float]] = BAREME_IMPOT) -> np.ndarray:
+    """Impôt annuel pour chaque revenu imposable (tableau de forme quelconque)."""
+    seuils = np.array([s for s, _ in bareme], dtype=float)
+    taux = np.array([t for _, t in bareme], dtype=float)
+    largeurs = np.append(np.diff(seuils), np.inf)
+
+    revenu = np.maximum(np.asarray(revenu, dtype=float), 0.0)[..., None]
+    return (np.clip(revenu - seuils, 0.0, largeurs) * taux).sum(axis=-1)
+
+
+def evaluer_plans(
+    plans: np.ndarray,
+    duree: int,
+    revenu_imposable: float,
+    progression_salariale: float = 0.005,
+    bareme: Sequence[Tuple[float, float]] = BAREME_IMPOT,
+) -> Dict[str, np.ndarray]:
+    """
+    Évalue des plans de rachat (une ligne par plan, une colonne par année
+    à partir d'aujourd'hui)
+
+    Returns:
+        Colonnes par plan : cout_total, economie_impot, cout_net,
+        capital_supplementaire, gain_mensuel, gain_20_ans, gain_net
+    """
+    plans = np.asarray(plans, dtype=float)
+    annees = np.arange(plans.shape[1])
+
+    revenus = revenu_imposable * (1 + progression_salariale) ** annees
+    economie = (impot_progressif(revenus, bareme) - impot_progressif(revenus - plans, bareme)).sum(axis=1)
+
+    # rachat de l'année k : intérêts crédités pendant duree − k années
+    capitalisation = (1 + LPP.TAUX_INTERET) ** np.maximum(duree - annees, 0)
+    capital = plans @ capitalisation
+
+    cout = plans.sum(axis=1)
+    gain_mensuel = capital * LPP.TAUX_CONVERSION / 12
+    gain_20_ans = gain_mensuel * 12 * 20
+
+    return {
+        'cout_total': cout,
+        'economie_impot': economie,
+        'cout_net': cout - economie,
+        'capital_supplementaire': capital,
+        'gain_mensuel': gain_mensuel,
+        'gain_20_ans': gain_20_ans,
+        'gain_net': gain_20_ans + economie - cout,
+    }
+
+
+# ============================================================================
+# GÉNÉRATION DES CANDIDATS
+# ============================================================================
+
+def _appliquer_plafond(plans: np.ndarray, plafond: float) -> np.ndarray:
+    """Écrête chaque année au plafond et reporte l'excédent sur les années qui ont de la marge."""
+    for _ in range(plans.shape[1]):
+        excedent = np.maximum(plans - plafond, 0.0).sum(axis=1, keepdims=True)
+        plans = np.minimum(plans, plafond)
+        if not excedent.any():
+            break
+        marge = plafond - plans
+        total_marge = marge.sum(axis=1, keepdims=True)
+        report = np.minimum(excedent, total_marge)
+        plans = plans + np.divide(marge * report, total_marge, out=np.zeros_like(plans), where=total_marge > 0)
+    return np.minimum(plans, plafond)
+
+
+def generer_plans(
+    nb_annees: int,
+    potentiel: float,
+    plafond_annuel: float,
+    candidats: int = OPTIM_CANDIDATS,
+    seed: int = OPTIM_SEED,
+) -> np.ndarray:
+    """
+    Matrice (candidats, nb_annees) de plans admissibles : total <= potentiel,
+    chaque année <= plafond_annuel
+
+    Plans réguliers (montant égal sur les n premières ou n dernières années,
+    pour quelques fractions du potentiel) puis plans aléatoires (années
+    actives et répartition tirées, total entre 10 % et 100 % du potentiel).
+    """
+    rng = np.random.default_rng(seed)
+    annees = np.arange(nb_annees)
+
+    reguliers = []
+    for n in range(1, nb_annees + 1):
+        premieres = (annees < n) / n
+        dernieres = (annees >= nb_annees - n) / n
+        for niveau in NIVEAUX_REGULIERS:
+            reguliers.append(premieres * potentiel * niveau)
+            reguliers.append(dernieres * potentiel * niveau)
+    reguliers = np.array(reguliers)
+
+    nb_aleatoires = max(0, candidats - len(reguliers))
+    actives = rng.random((nb_aleatoires, nb_annees)) < rng.uniform(0.2, 1.0, (nb_aleatoires, 1))
+    actives[np.arange(nb_aleatoires), rng.integers(0, nb_annees, nb_aleatoires)] = True
+    poids = rng.exponential(1.0, (nb_aleatoires, nb_annees)) * actives
+    poids /= poids.sum(axis=1, keepdims=True)
+    aleatoires = poids * potentiel * rng.uniform(0.1, 1.0, (nb_aleatoires, 1))
+
+    return _appliquer_plafond(np.vstack([reguliers, aleatoires]), plafond_annuel)
+
+
+# ============================================================================
+# FONCTION PRINCIPALE
+# ============================================================================
+
+def potentiel_rachat_estime(salaire_actuel: float, annees_restantes: int) -> float:
+    """Estimation du potentiel de rachat (même règle que calculer_scenarios_rachats)."""
+    return calculer_salaire_coordonne(salaire_actuel) * 0.18 * min(annees_restantes, 10)
+
+
+def optimiser_rachats(
+    age_actuel: int,
+    age_retraite: int,
+    salaire_actuel: float,
+    potentiel: Optional[float] = None,
+    plafond_annuel: Optional[float] = None,
+    revenu_imposable: Optional[float] = None,
+    annees_max: int = OPTIM_ANNEES_MAX,
+    top: int = 5,
+    candidats: int = OPTIM_CANDIDATS,
+    seed: int = OPTIM_SEED,
+    bareme: Sequence[Tuple[float, float]] = BAREME_IMPOT,
+) -> Dict:
+    """
+    Meilleurs plans de rachat LPP étalés sur au plus `annees_max` années
+
+    Args:
+        potentiel: potentiel de rachat (certificat de prévoyance) ;
+            None = estimation potentiel_rachat_estime
+        plafond_annuel: rachat maximal par année (None = pas de plafond)
+        revenu_imposable: revenu imposable de cette année (None = salaire)
+
+    Returns:
+        {'plans': top-k plans triés par gain net décroissant,
+         'reference': plan « Rachat LPP optimisé » actuel (potentiel estimé,
+         borné au potentiel, réparti sur min(années, 5) ans), 'candidats',
+         'nb_annees'}
+    """
+    duree = max(0, int(age_retraite) - int(age_actuel))
+    if potentiel is None:
+        potentiel = potentiel_rachat_estime(salaire_actuel, duree)
+    if plafond_annuel is None:
+        plafond_annuel = potentiel
+    if revenu_imposable is None:
+        revenu_imposable = salaire_actuel
+
+    nb_annees = max(1, min(int(annees_max), duree))
+    if potentiel <= 0 or plafond_annuel <= 0:
+        return {'plans': [], 'reference': None, 'candidats': 0, 'nb_annees': nb_annees}
+
+    plans = generer_plans(nb_annees, potentiel, plafond_annuel, candidats, seed)
+    resultats = evaluer_plans(plans, duree, revenu_imposable, bareme=bareme)
+
+    # plans quasi identiques (au franc près) : un seul représentant
+    _, uniques = np.unique(np.rint(plans), axis=0, return_index=True)
+    ordre = uniques[np.argsort(-resultats['gain_net'][uniques], kind='stable')][:top]
+
+    reference_plan = np.zeros((1, nb_annees))
+    n_ref = min(nb_annees, 5)
+    reference_plan[0, :n_ref] = min(potentiel_rachat_estime(salaire_actuel, duree), potentiel) / n_ref
+    reference_plan = _appliquer_plafond(reference_plan, plafond_annuel)
+    reference = evaluer_plans(reference_plan, duree, revenu_imposable, bareme=bareme)
+
+    return {
+        'plans': [_plan_dict(plans[i], resultats, i, age_actuel) for i in ordre],
+        'reference': _plan_dict(reference_plan[0], reference, 0, age_actuel),
+        'candidats': len(plans),
+        'nb_annees': nb_annees,
+    }
+
+
+def _plan_dict(plan: np.ndarray, resultats: Dict[str, np.ndarray], i: int, age_actuel: int) -> Dict:
+    cout = float(resultats['cout_total'][i])
+    economie = float(resultats['economie_impot'][i])
+    return {
+        'rachats': [
+            {'age': int(age_actuel) + k, 'montant': round(float(m))}
+            for k, m in enumerate(plan) if m >= 0.5
+        ],
+        'cout_total': round(cout),
+        'economie_impot': round(economie),
+        'cout_net': round(cout - economie),
+        'taux_economie': round(economie / cout * 100, 1) if cout > 0 else 0.0,
+        'capital_supplementaire': round(float(resultats['capital_supplementaire'][i])),
+        'gain_mensuel': round(float(resultats['gain_mensuel'][i]), 2),
+        'gain_20_ans': round(float(resultats['gain_20_ans'][i])),
+        'gain_net': round(float(resultats['gain_net'][i])),
+    }
+
+
+# ============================================================================
+# TESTS
+# ============================================================================
+
+def _impot_scalaire(revenu: float, bareme=BAREME_IMPOT) -> float:
+    impot = 0.0
+    for (seuil, taux), (suivant, _) in zip(bareme, list(bareme[1:]) + [(float('inf'), 0)]):
+        if revenu > seuil:
+            impot += (min(revenu, suivant) - seuil) * taux
+    return impot
+
+
+def test_optimiseur():
+    print("=== TEST 1: évaluation vectorisée = boucle scalaire ===")
+    rng = np.random.default_rng(11)
+    plans = generer_plans(8, 120000, 30000, candidats=500, seed=3)
+    r = evaluer_plans(plans, 12, 110000)
+    for i in rng.integers(0, len(plans), 50):
+        economie, capital = 0.0, 0.0
+        for k, montant in enumerate(plans[i]):
+            revenu = 110000 * 1.005 ** k
+            economie += _impot_scalaire(revenu) - _impot_scalaire(revenu - montant)
+            capital += montant * (1 + LPP.TAUX_INTERET) ** (12 - k)
+        assert abs(economie - r['economie_impot'][i]) < 1e-6
+        assert abs(capital - r['capital_supplementaire'][i]) < 1e-6
+    print("✅ OK")
+
+    print("=== TEST 2: contraintes potentiel et plafond respectées ===")
+    plans = generer_plans(10, 200000, 25000, candidats=3000, seed=4)
+    assert (plans.sum(axis=1) <= 200000 + 1e-6).all()
+    assert (plans <= 25000 + 1e-6).all() and (plans >= 0).all()
+    print("✅ OK")
+
+    print("=== TEST 3: meilleur plan >= plan de référence, résultat reproductible ===")
+    a = optimiser_rachats(45, 65, 120000, potentiel=150000, plafond_annuel=40000, top=3)
+    b = optimiser_rachats(45, 65, 120000, potentiel=150000, plafond_annuel=40000, top=3)
+    assert a == b and len(a['plans']) == 3
+    assert a['plans'][0]['gain_net'] >= a['reference']['gain_net']
+    assert all(p['gain_net'] >= q['gain_net'] for p, q in zip(a['plans'], a['plans'][1:]))
+    print("✅ OK")
+
+    print("=== TEST 4: impôt progressif -> étaler bat un rachat unique ===")
+    annees = np.zeros((2, 5))
+    annees[0, 0] = 100000
+    annees[1, :] = 20000
+    r = evaluer_plans(annees, 5, 120000)
+    assert r['economie_impot'][1] > r['economie_impot'][0]
+    print("✅ OK")
+
+
+if __name__ == "__main__":
+    test_optimiseur()
@@ -1,5 +1,6 @@
 # pdf_generator.py
 import os
+import io
 import datetime
 import math
 import base64
@@ -9,10 +10,16 @@ from reportlab.pdfgen import canvas
 from reportlab.lib.units import cm
 from reportlab.lib import colors
 from reportlab.lib.utils import ImageReader
+from reportlab import rl_config
 
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
+# matplotlib n'est importé qu'au premier graphique rendu avec ce backend
+# (voir _pyplot) : le backend "reportlab" ne le charge jamais.
+plt = None
+
+# Version du gabarit : à incrémenter à chaque changement visible du rapport
+# (mise en page, textes, graphiques). Elle fait partie de la clé du cache de
+# PDF (cache_pdf.py) : l'incrémenter invalide tous les PDF déjà rendus.
+TEMPLATE_VERSION = "2026.10-1"
 
 
 # ===============================================================
@@ -45,6 +52,83 @@ def asset_path(*parts):
     """assets/... relative to this file."""
     return os.path.join(os.path.dirname(__file__), "assets", *parts)
 
+# ===============================================================
+# ASSETS (cache par processus)
+# ===============================================================
+# Chaque image d'assets/ est décodée une seule fois par processus et réduite
+# à PDF_ASSETS_DPI pour sa largeur d'impression (logo.png : 1024 px pour
+# 6.5 cm, soit 400 dpi, décodé et embarqué brut à chaque rendu auparavant).
+# Chaque rapport dessine l'image réduite avec c.drawImage, depuis un
+# ImageReader construit une fois par processus (pixels déjà convertis).
+#
+# Flux d'images binaires (PDF_IMAGES_ASCII85=false) : ReportLab encode par
+# défaut chaque image en ASCII85, en Python pur sans rl_accel, et cet
+# encodage du logo dominait le rendu (~300 ms par rapport). Le PDF reste
+# valide et il est plus petit (ASCII85 ajoute 25 %).
+PDF_IMAGES_ASCII85 = os.getenv("PDF_IMAGES_ASCII85", "false").strip().lower() in ("1", "true", "yes", "oui", "on")
+rl_config.useA85 = 1 if PDF_IMAGES_ASCII85 else 0
+PDF_CACHE_ASSETS = os.getenv("PDF_CACHE_ASSETS", "true").strip().lower() in ("1", "true", "yes", "oui", "on")
+PDF_ASSETS_DPI = float(os.getenv("PDF_ASSETS_DPI", "300"))
+
+LOGO_LARGEUR = 6.5 * cm
+
+_ASSETS = {}
+
+
+class AssetFichier:
+    """Asset lu depuis le disque à chaque rendu (cache désactivé)."""
+
+    def __init__(self, chemin):
+        self.chemin = chemin
+        self.taille = ImageReader(chemin).getSize()
+
+    def dessiner(self, c, x, y, width, height):
+        c.drawImage(self.chemin, x, y, width=width, height=height, mask="auto")
+
+
+class AssetImage:
+    """Asset décodé une fois et réduit à la résolution d'impression."""
+
+    def __init__(self, chemin, largeur_cible):
+        from PIL import Image
+
+        with Image.open(chemin) as im:
+            im.load()
+            largeur_px = max(1, int(round(largeur_cible / 72.0 * PDF_ASSETS_DPI)))
+            if im.width > largeur_px:
+                hauteur_px = max(1, int(round(im.height * largeur_px / im.width)))
+                im = im.resize((largeur_px, hauteur_px), Image.LANCZOS)
+            else:
+                im = im.copy()
+
+        self.reader = ImageReader(im)
+        self.taille = im.size
+
+    def dessiner(self, c, x, y, width, height):
+        c.drawImage(self.reader, x, y, width=width, height=height, mask="auto")
+
+
+def image_asset(nom, largeur_cible):
+    """Image de assets/<nom> prête à dessiner à `largeur_cible` points, ou None."""
+    chemin = asset_path(nom)
+    if not os.path.exists(chemin):
+        return None
+
+    if not PDF_CACHE_ASSETS:
+        return AssetFichier(chemin)
+
+    cle = (nom, round(largeur_cible, 1))
+    asset = _ASSETS.get(cle)
+    if asset is None:
+        asset = _ASSETS[cle] = AssetImage(chemin, largeur_cible)
+    return asset
+
+
+def precharger_assets():
+    """Charge les assets utilisés par les rapports (préchauffage des workers)."""
+    image_asset("logo.png", LOGO_LARGEUR)
+
+
 def _to_float(x):
     """
     Convertit proprement vers float même si x contient:
@@ -193,10 +277,90 @@ def draw_gradient_bar(c, x, y, w, h, center_hex="#2563EB", edge_hex="#93C5FD", s
 
 
 # ===============================================================
-# CHARTS (Matplotlib -> PNG -> drawImage)
+# FOND ET CADRE DES PAGES 2 À 5
+# ===============================================================
+
+def dessiner_fond_page(c):
+    """Fond + mention confidentielle (pages 2 à 5 ; pied de page en fin de page)."""
+    width, height = A4
+    c.setFillColor(BG)
+    c.rect(0, 0, width, height, stroke=0, fill=1)
+    draw_top_confidential(c, width, height)
+
+
+def dessiner_cadre_page(c, titre, titre_y, container):
+    """Titre de page + container blanc ombré."""
+    draw_shadow_card(c, *container, r=18, fill=WHITE, stroke=LIGHT)
+    c.setFont("Helvetica-Bold", 22)
+    c.setFillColor(PRIMARY)
+    c.drawString(2 * cm, titre_y, titre)
+
+
+# ===============================================================
+# CHARTS (Matplotlib -> PNG en mémoire -> drawImage)
 # ===============================================================
+# out : chemin ou objet fichier ; par défaut un BytesIO, rembobiné et
+# retourné (à passer à ImageReader). Aucun fichier temporaire.
+
+def _sortie_png(out):
+    return io.BytesIO() if out is None else out
+
+def _rembobiner(out):
+    if hasattr(out, "seek"):
+        out.seek(0)
+    return out
+
+def _pyplot():
+    global plt
+    if plt is None:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as pyplot
+        plt = pyplot
+    return plt
+
+
+def _lignes_capital(capital_history):
+    """
+    Paires (âge, capital) de capital_history, quel que soit le format :
+    colonnes {"age": [...], "capital_fin": [...]} (actuel) ou liste de
+    {"age": ..., "capital": ...} (résultats enregistrés avant).
+    """
+    if isinstance(capital_history, dict):
+        capitaux = capital_history.get("capital_fin")
+        if capitaux is None:
+            capitaux = capital_history.get("capital") or []
+        return zip(capital_history.get("age") or [], capitaux)
+    return ((x.get("age"), x.get("capital")) for x in (capital_history or []) if isinstance(x, dict))
 
-def draw_donut_chart(values, labels, out_path):
+
+def _historique_vide(capital_history) -> bool:
+    return next(iter(_lignes_capital(capital_history)), None) is None
+
+
+def _points_capital(capital_history):
+    """(ages, capitaux) triés par âge ; série vide remplacée par des zéros."""
+    ages = []
+    capitals = []
+    for age, capital in _lignes_capital(capital_history):
+        try:
+            age, capital = int(float(age)), float(capital)
+        except Exception:
+            continue
+        ages.append(age)
+        capitals.append(capital)
+
+    if not ages or not capitals:
+        ages = [45, 46, 47, 48, 49, 50]
+        capitals = [0, 0, 0, 0, 0, 0]
+
+    # tri au cas où
+    pairs = sorted(zip(ages, capitals), key=lambda t: t[0])
+    return [p[0] for p in pairs], [p[1] for p in pairs]
+
+
+def draw_donut_chart(values, labels, out=None):
+    plt = _pyplot()
     plt.figure(figsize=(3.0, 3.0))
     plt.pie(
         values,
@@ -209,35 +373,22 @@ def draw_donut_chart(values, labels, out_path):
 
     plt.gca().set_aspect("equal")  # <-- AJOUT CRITIQUE
 
+    out = _sortie_png(out)
     plt.tight_layout()
-    plt.savefig(out_path, dpi=200, transparent=True)
+    plt.savefig(out, format="png", dpi=200, transparent=True)
     plt.close()
-    return out_path
+    return _rembobiner(out)
 
 
-def draw_capital_graph(capital_history, out_path):
+def draw_capital_graph(capital_history, out=None):
     """
     Bar chart style UI (comme ton img2).
-    capital_history: list[{"age": ..., "capital": ...}]
+    capital_history: {"age": [...], "capital_fin": [...]} (ou ancien format
+    list[{"age": ..., "capital": ...}])
     """
-    ages = []
-    capitals = []
-    for x in (capital_history or []):
-        try:
-            ages.append(int(float(x.get("age"))))
-            capitals.append(float(x.get("capital")))
-        except Exception:
-            pass
-
-    if not ages or not capitals:
-        ages = [45, 46, 47, 48, 49, 50]
-        capitals = [0, 0, 0, 0, 0, 0]
-
-    # tri au cas où
-    pairs = sorted(zip(ages, capitals), key=lambda t: t[0])
-    ages = [p[0] for p in pairs]
-    capitals = [p[1] for p in pairs]
+    ages, capitals = _points_capital(capital_history)
 
+    plt = _pyplot()
     plt.figure(figsize=(7.2, 3.1))
     ax = plt.gca()
 
@@ -265,10 +416,132 @@ def draw_capital_graph(capital_history, out_path):
     # marges propres
     ax.margins(x=0.02)
 
+    out = _sortie_png(out)
     plt.tight_layout()
-    plt.savefig(out_path, dpi=220)
+    plt.savefig(out, format="png", dpi=220)
     plt.close()
-    return out_path
+    return _rembobiner(out)
+
+
+# ===============================================================
+# CHARTS (ReportLab vectoriel, sans matplotlib)
+# ===============================================================
+# PDF_CHART_BACKEND=reportlab : mêmes graphiques dessinés directement sur
+# le canvas (chemins vectoriels), sans image intermédiaire.
+
+PDF_CHART_BACKEND = os.getenv("PDF_CHART_BACKEND", "matplotlib").strip().lower()
+
+# couleurs par défaut de matplotlib (C0, C1) pour garder le même rendu
+DONUT_COULEURS = [colors.HexColor("#1f77b4"), colors.HexColor("#ff7f0e")]
+BARRES_COULEUR = colors.HexColor("#4F46E5")
+
+
+def draw_donut_vectoriel(c, values, x, y, size):
+    """Anneau AVS/LPP dans le carré (x, y, size), départ à 12h, sens anti-horaire."""
+    total = float(sum(values)) or 1.0
+    cx, cy = x + size / 2, y + size / 2
+    r_ext = size * 0.40
+    r_int = r_ext * 0.72  # wedgeprops width=0.28
+
+    c.saveState()
+    c.setLineWidth(0)
+    angle = 90.0
+    for i, v in enumerate(values):
+        etendue = 360.0 * float(v) / total
+        if etendue <= 0:
+            continue
+        c.setFillColor(DONUT_COULEURS[i % len(DONUT_COULEURS)])
+        if etendue >= 359.999:
+            c.circle(cx, cy, r_ext, stroke=0, fill=1)
+        else:
+            c.wedge(cx - r_ext, cy - r_ext, cx + r_ext, cy + r_ext, angle, etendue, stroke=0, fill=1)
+        angle += etendue
+
+    c.setFillColor(WHITE)
+    c.circle(cx, cy, r_int, stroke=0, fill=1)
+    c.restoreState()
+
+
+def _graduations(vmax, nb=5):
+    """Graduations "rondes" de 0 à au moins vmax (1, 2, 2.5, 5 x 10^n)."""
+    if vmax <= 0:
+        return [0.0, 1.0]
+    brut = vmax / nb
+    puissance = 10 ** math.floor(math.log10(brut))
+    for m in (1, 2, 2.5, 5, 10):
+        pas = m * puissance
+        if pas >= brut:
+            break
+    n = int(math.ceil(vmax / pas - 1e-9))
+    return [i * pas for i in range(n + 1)]
+
+
+def draw_capital_vectoriel(c, capital_history, x, y, w, h):
+    """Barres du capital LPP par âge dans le cadre (x, y, w, h)."""
+    ages, capitals = _points_capital(capital_history)
+    ticks_y = _graduations(max(capitals))
+    y_max = ticks_y[-1]
+
+    # zone de tracé : place pour les libellés d'axes
+    gx = x + 1.9 * cm
+    gy = y + 1.1 * cm
+    gw = w - 1.9 * cm - 0.2 * cm
+    gh = h - 1.1 * cm - 0.3 * cm
+
+    c.saveState()
+
+    # grille Y + libellés
+    c.setFont("Helvetica", 7.5)
+    for t in ticks_y:
+        ty = gy + gh * t / y_max
+        c.setStrokeColor(LIGHT)
+        c.setLineWidth(0.5)
+        c.line(gx, ty, gx + gw, ty)
+        c.setFillColor(GRAY)
+        c.drawRightString(gx - 0.15 * cm, ty - 2.5, fmt_int(t))
+
+    # axes gauche / bas
+    c.setStrokeColor(colors.HexColor("#BFC3CA"))
+    c.setLineWidth(0.6)
+    c.line(gx, gy, gx, gy + gh)
+    c.line(gx, gy, gx + gw, gy)
+
+    # barres
+    n = len(ages)
+    a0, a1 = ages[0], ages[-1]
+    etendue = max(1, a1 - a0 + 1)
+    pas_x = gw / (etendue + 0.04 * etendue)
+    marge_x = (gw - pas_x * etendue) / 2
+    largeur = pas_x * 0.65
+
+    c.setFillColor(BARRES_COULEUR)
+    for age, cap in zip(ages, capitals):
+        if cap <= 0:
+            continue
+        bx = gx + marge_x + (age - a0 + 0.5) * pas_x - largeur / 2
+        c.rect(bx, gy, largeur, gh * cap / y_max, stroke=0, fill=1)
+
+    # libellés X (au plus ~12 pour rester lisibles)
+    pas_label = max(1, int(math.ceil(etendue / 12.0)))
+    if pas_label > 1:
+        pas_label = next(p for p in (2, 5, 10, 20) if p >= pas_label)
+    c.setFillColor(GRAY)
+    c.setFont("Helvetica", 7.5)
+    for age in range(a0, a1 + 1):
+        if age % pas_label == 0 or n == 1:
+            c.drawCentredString(gx + marge_x + (age - a0 + 0.5) * pas_x, gy - 0.4 * cm, str(age))
+
+    # titres d'axes
+    c.setFillColor(BLACK)
+    c.setFont("Helvetica", 9)
+    c.drawCentredString(gx + gw / 2, y + 0.1 * cm, "Âge")
+    c.saveState()
+    c.translate(x + 0.25 * cm, gy + gh / 2)
+    c.rotate(90)
+    c.drawCentredString(0, 0, "CHF")
+    c.restoreState()
+
+    c.restoreState()
 
 
 
@@ -291,6 +564,22 @@ def page_cover(c, donnees):
     SHIFT_Y = -4.0 * cm   # NEGATIF = on descend. Ajuste: -1.5cm / -2.5cm etc.
     CARD_SHIFT_Y = -5.5 * cm  # négatif = on descend la carte uniquement
 
+    header_h = 4.2 * cm
+    logo_y = height - header_h - 2.6*cm + SHIFT_Y
+    title_y = logo_y - 2.0*cm
+
+    # trait gradient (petit, centré)
+    bar_w = 4.6 * cm
+    bar_h = 0.12 * cm
+    bar_x = (width - bar_w) / 2
+    bar_y = title_y - 1.75 * cm
+
+    card_w = width * 0.70
+    card_h = 7.7 * cm
+    card_x = (width - card_w) / 2
+    card_y = bar_y - 5.2 * cm + CARD_SHIFT_Y
+
+    footer_band_h = 0.55 * cm
 
     # =========================================================
     # FOND (non blanc)
@@ -301,8 +590,6 @@ def page_cover(c, donnees):
     # =========================================================
     # HEADER demi-bannière + coupe diagonale (triangle)
     # =========================================================
-    header_h = 4.2 * cm
-
     # grand bandeau bleu en haut avec diagonale (comme ton img2)
     c.setFillColor(PRIMARY)
     c.setStrokeColor(PRIMARY)
@@ -310,7 +597,6 @@ def page_cover(c, donnees):
 
     # Polygone : haut plein, bas coupé en diagonale
     # (gauche plus bas, droite plus haut) -> look "triangle"
-    
     p = c.beginPath()
     p.moveTo(0, height)
     p.lineTo(width, height)
@@ -324,41 +610,53 @@ def page_cover(c, donnees):
     c.setLineWidth(1)
     c.line(2.2*cm, height - header_h - 0.25*cm, width - 2.2*cm, height - header_h - 0.25*cm)
 
+    # trait gradient (comme page avis)
+    draw_gradient_bar(
+        c,
+        bar_x, bar_y,
+        bar_w, bar_h,
+        center_hex="#2563EB",
+        edge_hex="#BFDBFE",
+        steps=140
+    )
+
     # =========================================================
-    # LOGO (centré, sur fond clair, sous le bandeau)
+    # CARTE CLIENT (blanche + ombre) comme tes cards UI (img3)
     # =========================================================
-    logo_path = asset_path("logo.png")
-    logo_y = height - header_h - 2.6*cm + SHIFT_Y
+    draw_shadow_card(c, card_x, card_y, card_w, card_h, r=16, fill=WHITE, stroke=LIGHT)
 
+    # =========================================================
+    # BANDEAU BAS (fin, pas épais)
+    # =========================================================
+    c.setFillColor(PRIMARY)
+    c.rect(0, 0, width, footer_band_h, stroke=0, fill=1)
 
-    if os.path.exists(logo_path):
-        img = ImageReader(logo_path)
-        iw, ih = img.getSize()
-        target_w = 6.5 * cm
+    # =========================================================
+    # LOGO (centré, sur fond clair, sous le bandeau)
+    # =========================================================
+    logo = image_asset("logo.png", LOGO_LARGEUR)
+
+    if logo is not None:
+        iw, ih = logo.taille
+        target_w = LOGO_LARGEUR
         scale = target_w / float(iw)
         target_h = ih * scale
-        c.drawImage(
-            logo_path,
+        logo.dessiner(
+            c,
             (width - target_w) / 2,
             logo_y,
             width=target_w,
             height=target_h,
-            mask="auto"
         )
-        logo_block_h = target_h
     else:
         # fallback texte si logo absent
         c.setFillColor(PRIMARY)
         c.setFont("Helvetica-Bold", 18)
         c.drawCentredString(width/2, logo_y + 0.8*cm, "MA RETRAITE SUISSE")
-        logo_block_h = 1.2*cm
 
     # =========================================================
-    # TITRE / SOUS-TITRE + TRAIT GRADIENT (comme page avis)
+    # TITRE / SOUS-TITRE
     # =========================================================
-    title_y = logo_y - 2.0*cm
-
-
     c.setFillColor(PRIMARY)
     c.setFont("Helvetica-Bold", 22)
     c.drawCentredString(width/2, title_y, "PROJECTION RETRAITE CERTIFIÉE")
@@ -367,32 +665,19 @@ def page_cover(c, donnees):
     c.setFont("Helvetica", 13)
     c.drawCentredString(width/2, title_y - 1.0*cm, "Analyse personnalisée AVS & LPP")
 
-    # trait gradient (petit, centré)
-    bar_w = 4.6 * cm
-    bar_h = 0.12 * cm
-    bar_x = (width - bar_w) / 2
-    bar_y = title_y - 1.75 * cm
-    draw_gradient_bar(
-        c,
-        bar_x, bar_y,
-        bar_w, bar_h,
-        center_hex="#2563EB",
-        edge_hex="#BFDBFE",
-        steps=140
-    )
-
-
     # =========================================================
-    # CARTE CLIENT (blanche + ombre) comme tes cards UI (img3)
+    # MENTIONS (au-dessus du bandeau bas)
     # =========================================================
-    card_w = width * 0.70
-    card_h = 7.7 * cm
-    card_x = (width - card_w) / 2
-    card_y = bar_y - 5.2 * cm + CARD_SHIFT_Y
-
+    c.setFillColor(GRAY)
+    c.setFont("Helvetica", 8.5)
+    c.drawCentredString(
+        width/2,
+        footer_band_h + 0.95*cm,
+        "Ce rapport fournit une estimation indicative basée sur les informations déclarées et ne constitue pas un conseil financier contractuel."
+    )
 
-    # ombre + carte
-    draw_shadow_card(c, card_x, card_y, card_w, card_h, r=16, fill=WHITE, stroke=LIGHT)
+    c.setFont("Helvetica", 9)
+    c.drawCentredString(width/2, footer_band_h + 0.35*cm, f"www.maretraitesuisse.ch — © {year} Ma Retraite Suisse")
 
     # contenu
     # contenu (lignes propres)
@@ -434,25 +719,6 @@ def page_cover(c, donnees):
     c.setFont("Helvetica", 10)
     c.drawString(x, y, f"Référence : {ref}")
 
-
-    # =========================================================
-    # BANDEAU BAS (fin, pas épais) + mentions
-    # =========================================================
-    footer_band_h = 0.55 * cm
-    c.setFillColor(PRIMARY)
-    c.rect(0, 0, width, footer_band_h, stroke=0, fill=1)
-
-    c.setFillColor(GRAY)
-    c.setFont("Helvetica", 8.5)
-    c.drawCentredString(
-        width/2,
-        footer_band_h + 0.95*cm,
-        "Ce rapport fournit une estimation indicative basée sur les informations déclarées et ne constitue pas un conseil financier contractuel."
-    )
-
-    c.setFont("Helvetica", 9)
-    c.drawCentredString(width/2, footer_band_h + 0.35*cm, f"www.maretraitesuisse.ch — © {year} Ma Retraite Suisse")
-
     c.showPage()
 
 
@@ -504,12 +770,9 @@ def page_synthese(c, pdf):
         loss_20 = diff_m * 12.0 * 20.0
 
     # =========================================================
-    # FOND
+    # FOND (+ mention confidentielle + pied de page)
     # =========================================================
-    c.setFillColor(BG)
-    c.rect(0, 0, width, height, stroke=0, fill=1)
-
-    draw_top_confidential(c, width, height)
+    dessiner_fond_page(c)
 
     # =========================================================
     # PARAMÈTRES
@@ -531,16 +794,12 @@ def page_synthese(c, pdf):
     top_y = container_y + container_h - pad
 
     # =========================================================
-    # TITRE
-    # =========================================================
-    c.setFont("Helvetica-Bold", 22)
-    c.setFillColor(PRIMARY)
-    c.drawString(2 * cm, height - 3.3 * cm + LIFT, "SYNTHÈSE GLOBALE")
-
-    # =========================================================
-    # DESSINE LE CONTAINER EN PREMIER (visuel)
+    # TITRE + CONTAINER EN PREMIER (visuel)
     # =========================================================
-    draw_shadow_card(c, container_x, container_y, container_w, container_h, r=18, fill=WHITE, stroke=LIGHT)
+    dessiner_cadre_page(
+        c, "SYNTHÈSE GLOBALE", height - 3.3 * cm + LIFT,
+        (container_x, container_y, container_w, container_h)
+    )
 
     # =========================================================
     # CARTE TOTAL
@@ -652,27 +911,24 @@ def page_synthese(c, pdf):
     c.drawString(inner_x + 1.0 * cm * scale, donut_y + (donut_h * 0.42),
                  f"LPP (2ème pilier) : {fmt_pct(part_lpp, 1)}" if part_lpp is not None else "LPP (2ème pilier)")
 
-    donut_path = "donut_tmp.png"
-    try:
-        v0 = _to_float(avs_m) or 0.0
-        v1 = _to_float(lpp_m) or 0.0
-        values = [v0, v1]
-        if values[0] + values[1] <= 0:
-            values = [1, 1]
-
-        draw_donut_chart(values, ["AVS", "LPP"], donut_path)
+    v0 = _to_float(avs_m) or 0.0
+    v1 = _to_float(lpp_m) or 0.0
+    values = [v0, v1]
+    if values[0] + values[1] <= 0:
+        values = [1, 1]
 
-        # donut image doit rester carrée, mais adaptée à la hauteur dispo
-        donut_size = min(5.2 * cm * scale, donut_h - 1.2 * cm * scale)
-        donut_size = max(2.0 * cm * scale, donut_size)  # plancher pour rester lisible
+    # donut image doit rester carrée, mais adaptée à la hauteur dispo
+    donut_size = min(5.2 * cm * scale, donut_h - 1.2 * cm * scale)
+    donut_size = max(2.0 * cm * scale, donut_size)  # plancher pour rester lisible
 
-        donut_x = inner_x + inner_w - donut_size - 1.0 * cm * scale
-        donut_img_y = donut_y + (donut_h - donut_size) / 2
+    donut_x = inner_x + inner_w - donut_size - 1.0 * cm * scale
+    donut_img_y = donut_y + (donut_h - donut_size) / 2
 
-        c.drawImage(donut_path, donut_x, donut_img_y, width=donut_size, height=donut_size, mask="auto")
-    finally:
-        if os.path.exists(donut_path):
-            os.remove(donut_path)
+    if PDF_CHART_BACKEND == "reportlab":
+        draw_donut_vectoriel(c, values, donut_x, donut_img_y, donut_size)
+    else:
+        donut_png = draw_donut_chart(values, ["AVS", "LPP"])
+        c.drawImage(ImageReader(donut_png), donut_x, donut_img_y, width=donut_size, height=donut_size, mask="auto")
 
     # =========================================================
     # DESSINE ORANGE EN DERNIER (au-dessus de tout)
@@ -708,26 +964,20 @@ def page_avs(c, avs):
     # =========================
     # Fond + header (comme P2)
     # =========================
-    c.setFillColor(BG)
-    c.rect(0, 0, width, height, stroke=0, fill=1)
-    draw_top_confidential(c, width, height)
+    dessiner_fond_page(c)
 
     # =========================
-    # Titre (PRIMARY, MAJ)
-    # =========================
-    c.setFont("Helvetica-Bold", 22)
-    c.setFillColor(PRIMARY)
-    c.drawString(2 * cm, height - 3.3 * cm, "DÉTAIL AVS")
-
-    # =========================
-    # Container global (comme P2)
+    # Titre (PRIMARY, MAJ) + container global (comme P2)
     # =========================
     container_w = width - 3.5 * cm
     container_x = (width - container_w) / 2
     container_y = 2.8 * cm
     container_h = height - 6.6 * cm
 
-    draw_shadow_card(c, container_x, container_y, container_w, container_h, r=18, fill=WHITE, stroke=LIGHT)
+    dessiner_cadre_page(
+        c, "DÉTAIL AVS", height - 3.3 * cm,
+        (container_x, container_y, container_w, container_h)
+    )
 
     pad = 1.2 * cm
     inner_x = container_x + pad
@@ -935,21 +1185,17 @@ def page_lpp(c, lpp):
     width, height = A4
 
     # Fond + header
-    c.setFillColor(BG)
-    c.rect(0, 0, width, height, stroke=0, fill=1)
-    draw_top_confidential(c, width, height)
+    dessiner_fond_page(c)
 
-    # TITRE
-    c.setFont("Helvetica-Bold", 22)
-    c.setFillColor(PRIMARY)
-    c.drawString(2 * cm, height - 2.7 * cm, "DÉTAIL LPP")
-
-    # Container global
+    # TITRE + container global
     container_w = width - 3.5 * cm
     container_x = (width - container_w) / 2
     container_y = 2.2 * cm
     container_h = height - 5.4 * cm
-    draw_shadow_card(c, container_x, container_y, container_w, container_h, r=18, fill=WHITE, stroke=LIGHT)
+    dessiner_cadre_page(
+        c, "DÉTAIL LPP", height - 2.7 * cm,
+        (container_x, container_y, container_w, container_h)
+    )
 
     pad = 1.2 * cm
     inner_x = container_x + pad
@@ -1111,20 +1357,18 @@ def page_lpp(c, lpp):
     img_w = inner_w - 2 * img_pad_side
     img_h = graph_card_h - title_band - img_pad_bottom
 
-    graph_path = "capital_lpp_tmp.png"
-    try:
-        draw_capital_graph(history, graph_path)
+    if PDF_CHART_BACKEND == "reportlab":
+        draw_capital_vectoriel(c, history, img_x, img_y, img_w, img_h)
+    else:
+        graph_png = draw_capital_graph(history)
         c.drawImage(
-            graph_path,
+            ImageReader(graph_png),
             img_x, img_y,
             width=img_w, height=img_h,
             preserveAspectRatio=True,
             anchor="c",
             mask="auto",
         )
-    finally:
-        if os.path.exists(graph_path):
-            os.remove(graph_path)
 
     draw_footer(c, width)
     c.showPage()
@@ -1138,23 +1382,19 @@ def page_scenarios(c, pdf):
     width, height = A4
 
     # Fond + header
-    c.setFillColor(BG)
-    c.rect(0, 0, width, height, stroke=0, fill=1)
-    draw_top_confidential(c, width, height)
-
-    # TITRE (PRIMARY + MAJ)
-    c.setFont("Helvetica-Bold", 22)
-    c.setFillColor(PRIMARY)
-    c.drawString(2 * cm, height - 3.3 * cm, "SCÉNARIOS")
+    dessiner_fond_page(c)
 
     # =========================
-    # Container global (comme P2/P3/P4)
+    # TITRE (PRIMARY + MAJ) + container global (comme P2/P3/P4)
     # =========================
     container_w = width - 3.5 * cm
     container_x = (width - container_w) / 2
     container_y = 2.8 * cm
     container_h = height - 6.6 * cm
-    draw_shadow_card(c, container_x, container_y, container_w, container_h, r=18, fill=WHITE, stroke=LIGHT)
+    dessiner_cadre_page(
+        c, "SCÉNARIOS", height - 3.3 * cm,
+        (container_x, container_y, container_w, container_h)
+    )
 
     pad = 1.2 * cm
     inner_x = container_x + pad
@@ -1329,6 +1569,7 @@ def generer_pdf_retraite(donnees, resultats, output="projection_retraite.pdf"):
     """
     Ne casse pas tes branchements.
     Attend resultats["pdf_data"] comme avant.
+    output : chemin ou objet fichier (ex: BytesIO), voir generer_pdf_bytes.
     """
     pdf = resultats.get("pdf_data", {}) if isinstance(resultats, dict) else {}
     print("DEBUG keys resultats:", list(resultats.keys()) if isinstance(resultats, dict) else type(resultats))
@@ -1360,6 +1601,12 @@ def generer_pdf_retraite(donnees, resultats, output="projection_retraite.pdf"):
         if a0 is not None and ar is not None:
             lpp_detail["annees_restantes"] = max(0, int(round(ar - a0)))
 
+    # Fallback historique capital (résultat calculé en mode LPP rapide) :
+    # totaux repris de la même projection, pour que la page soit cohérente
+    if _historique_vide(lpp_detail.get("capital_history")) and isinstance(donnees, dict):
+        from simulateur_avs_lpp import projection_lpp_depuis_donnees
+        lpp_detail.update(projection_lpp_depuis_donnees(donnees))
+
     page_lpp(c, lpp_detail)
 
     # P5
@@ -1367,3 +1614,15 @@ def generer_pdf_retraite(donnees, resultats, output="projection_retraite.pdf"):
 
     c.save()
     return output
+
+
+def signature_rendu() -> str:
+    """Tout ce qui, hors données, change les octets du PDF rendu."""
+    return f"{TEMPLATE_VERSION}|{PDF_CHART_BACKEND}|{PDF_ASSETS_DPI:g}|{int(PDF_CACHE_ASSETS)}|{int(PDF_IMAGES_ASCII85)}"
+
+
+def generer_pdf_bytes(donnees, resultats) -> bytes:
+    """Rend le PDF entièrement en mémoire et retourne ses octets."""
+    buffer = io.BytesIO()
+    generer_pdf_retraite(donnees, resultats, output=buffer)
+    return buffer.getvalue()
@@ -0,0 +1,197 @@
+"""
+Regénération PDF par lot (admin) -> archive ZIP en streaming.
+
+- les simulations sont lues par pages (pagination par id) avec une session
+  courte par page : aucune transaction ouverte pendant le rendu
+- le rendu part dans le pool de pdf_service ; au plus PDF_LOT_EN_VOL rendus
+  en vol, pour laisser des places aux commandes payées
+- chaque PDF est écrit dans le ZIP dès qu'il est prêt (ordre d'achèvement)
+  puis envoyé au client : la mémoire reste bornée par la fenêtre en vol
+- échecs et durées dans manifest.json, dernière entrée de l'archive
+"""
+
+import io
+import json
+import os
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import wait, FIRST_COMPLETED
+
+from sqlalchemy import select
+
+from database import SessionLocal
+from models.models import Simulation
+from pdf_service import get_service_pdf, PDF_WORKERS, PDF_RENDU_MAX_SECONDES
+
+PDF_LOT_MAX = int(os.getenv("PDF_LOT_MAX", "2000"))
+PDF_LOT_EN_VOL = int(os.getenv("PDF_LOT_EN_VOL", str(PDF_WORKERS * 2)))
+PDF_LOT_PAGE = int(os.getenv("PDF_LOT_PAGE", "50"))
+PDF_LOT_LOG_CHAQUE = int(os.getenv("PDF_LOT_LOG_CHAQUE", "50"))
+
+
+# =========================================================
+# FILTRE
+# =========================================================
+def filtre_simulations(debut=None, fin=None, depuis=None, jusqu_a=None) -> list:
+    """Conditions SQLAlchemy communes au comptage et à la lecture par pages."""
+    conditions = []
+    if debut is not None:
+        conditions.append(Simulation.id >= debut)
+    if fin is not None:
+        conditions.append(Simulation.id <= fin)
+    if depuis is not None:
+        conditions.append(Simulation.created_at >= depuis)
+    if jusqu_a is not None:
+        conditions.append(Simulation.created_at < jusqu_a)
+    return conditions
+
+
+def _pages_simulations(conditions, taille_page=PDF_LOT_PAGE):
+    """Itère (id, donnees, resultat) par pages de taille_page, ordre id."""
+    dernier = None
+    while True:
+        requete = select(Simulation.id, Simulation.donnees, Simulation.resultat).where(*conditions)
+        if dernier is not None:
+            requete = requete.where(Simulation.id > dernier)
+        requete = requete.order_by(Simulation.id).limit(taille_page)
+
+        db = SessionLocal()
+        try:
+            lignes = db.execute(requete).all()
+        finally:
+            db.close()
+
+        if not lignes:
+            return
+        yield from lignes
+        dernier = lignes[-1].id
+
+
+# =========================================================
+# ZIP EN STREAMING
+# =========================================================
+class _TamponZip(io.RawIOBase):
+    """
+    Sortie non « seekable » pour zipfile : il écrit alors des data
+    descriptors au lieu de revenir sur les en-têtes, et on peut envoyer
+    les octets au fur et à mesure.
+    """
+
+    def __init__(self):
+        self._morceaux = []
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._morceaux.append(bytes(b))
+        return len(b)
+
+    def vider(self) -> bytes:
+        morceaux, self._morceaux = self._morceaux, []
+        return b"".join(morceaux)
+
+
+def flux_zip_pdf(conditions, total: int = None, en_vol: int = PDF_LOT_EN_VOL):
+    """
+    Générateur d'octets d'une archive ZIP : simulation_<id>.pdf pour chaque
+    simulation filtrée, puis manifest.json (rendus, erreurs, durées).
+    """
+    service = get_service_pdf()
+    tampon = _TamponZip()
+    # PDF déjà compressés (flux Flate) : ZIP_STORED, pas de CPU sous le GIL
+    archive = zipfile.ZipFile(tampon, mode="w", compression=zipfile.ZIP_STORED)
+
+    debut = time.perf_counter()
+    fenetre = deque()  # (simulation_id, future, t0)
+    rendus = []
+    erreurs = []
+
+    def erreur(simulation_id, message):
+        erreurs.append({"simulation_id": simulation_id, "erreur": message})
+        print(f"❌ Lot PDF : simulation {simulation_id} en échec : {message}")
+
+    def recolter(bloquant: bool):
+        """Écrit dans le ZIP les rendus terminés de la fenêtre."""
+        if not fenetre:
+            return
+        futures = [f for _, f, _ in fenetre]
+        termines, _ = wait(futures, timeout=PDF_RENDU_MAX_SECONDES if bloquant else 0, return_when=FIRST_COMPLETED)
+
+        if bloquant and not termines:
+            # plus aucun rendu n'avance : le plus ancien est abandonné
+            simulation_id, future, _ = fenetre.popleft()
+            future.cancel()
+            erreur(simulation_id, f"délai de rendu dépassé ({PDF_RENDU_MAX_SECONDES:.0f}s)")
+            return
+
+        for element in [e for e in fenetre if e[1] in termines]:
+            fenetre.remove(element)
+            simulation_id, future, t0 = element
+            try:
+                pdf_bytes = future.result()
+            except Exception as e:
+                erreur(simulation_id, repr(e))
+                continue
+
+            archive.writestr(f"simulation_{simulation_id}.pdf", pdf_bytes)
+            rendus.append({
+                "simulation_id": simulation_id,
+                "octets": len(pdf_bytes),
+                "duree_ms": round((time.perf_counter() - t0) * 1000, 1),
+            })
+
+            traites = len(rendus) + len(erreurs)
+            if traites % PDF_LOT_LOG_CHAQUE == 0:
+                ecoule = time.perf_counter() - debut
+                print(
+                    f"📦 Lot PDF : {traites}/{total if total is not None else '?'} "
+                    f"({len(erreurs)} erreur(s)) | {traites / ecoule:.1f} PDF/s"
+                )
+
+    try:
+        for ligne in _pages_simulations(conditions):
+            if not ligne.resultat:
+                erreur(ligne.id, "Résultat manquant")
+                continue
+
+            while len(fenetre) >= en_vol:
+                recolter(bloquant=True)
+                yield tampon.vider()
+
+            try:
+                # attente sans limite : la fenêtre en vol borne déjà la charge
+                future = service.soumettre(ligne.donnees, ligne.resultat, attente_max=None)
+            except Exception as e:
+                erreur(ligne.id, repr(e))
+                continue
+            fenetre.append((ligne.id, future, time.perf_counter()))
+
+            recolter(bloquant=False)
+            morceau = tampon.vider()
+            if morceau:
+                yield morceau
+
+        while fenetre:
+            recolter(bloquant=True)
+            yield tampon.vider()
+
+        duree = time.perf_counter() - debut
+        manifest = {
+            "demandes": total,
+            "rendus": len(rendus),
+            "erreurs": erreurs,
+            "duree_secondes": round(duree, 2),
+            "pdf": rendus,
+        }
+        archive.writestr("manifest.json", json.dumps(manifest, ensure_ascii=False, indent=2))
+        archive.close()
+        yield tampon.vider()
+
+        print(f"✅ Lot PDF terminé : {len(rendus)} rendu(s), {len(erreurs)} erreur(s) en {duree:.1f}s")
+
+    finally:
+        # client déconnecté ou erreur : on n'attend pas les rendus restants
+        for _, future, _ in fenetre:
+            future.cancel()
@@ -0,0 +1,222 @@
+"""
+Service de rendu PDF hors du processus web.
+
+generer_pdf_retraite (ReportLab + matplotlib) tient le GIL plusieurs
+centaines de ms : le rendu part dans un pool de processus dont les workers
+ont déjà importé pdf_generator / matplotlib / les polices.
+
+- file bornée : au plus PDF_FILE_MAX rendus en cours + en attente ;
+  au-delà, on attend PDF_ATTENTE_MAX_SECONDES puis ServicePDFSature
+- résultat : les octets du PDF (rendu en mémoire, aucun fichier)
+- cache (cache_pdf.py) : un PDF déjà rendu pour les mêmes données, le même
+  gabarit et le même jour est relu sans passer par le pool ; un rendu déjà
+  en vol pour la même clé est partagé (un seul rendu, même Future)
+"""
+
+import io
+import os
+import threading
+import time
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from cache_pdf import get_cache_pdf, cle_pdf
+
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", "2"))
+PDF_FILE_MAX = int(os.getenv("PDF_FILE_MAX", str(PDF_WORKERS * 4)))
+PDF_ATTENTE_MAX_SECONDES = float(os.getenv("PDF_ATTENTE_MAX_SECONDES", "30"))
+PDF_RENDU_MAX_SECONDES = float(os.getenv("PDF_RENDU_MAX_SECONDES", "120"))
+
+
+class ServicePDFSature(Exception):
+    """File de rendu pleine (backpressure)."""
+
+
+# =========================================================
+# CÔTÉ WORKER (processus fils)
+# =========================================================
+def _init_worker():
+    """Préchauffage : imports lourds, cache de polices, premier rendu Agg."""
+    import pdf_generator  # reportlab
+
+    pdf_generator.precharger_assets()
+
+    if pdf_generator.PDF_CHART_BACKEND != "reportlab":
+        plt = pdf_generator._pyplot()  # matplotlib Agg
+        fig = plt.figure(figsize=(1, 1))
+        fig.savefig(io.BytesIO(), format="png")
+        plt.close(fig)
+
+
+def _pret() -> int:
+    return os.getpid()
+
+
+def _signature() -> str:
+    from pdf_generator import signature_rendu
+
+    return signature_rendu()
+
+
+def _rendre(donnees, resultats) -> bytes:
+    from pdf_generator import generer_pdf_bytes
+
+    return generer_pdf_bytes(donnees, resultats)
+
+
+# =========================================================
+# CÔTÉ APPELANT (processus web / worker de jobs)
+# =========================================================
+class ServicePDF:
+    def __init__(self, nb_workers: int = PDF_WORKERS, file_max: int = PDF_FILE_MAX):
+        self.nb_workers = nb_workers
+        self.file_max = file_max
+        self._places = threading.BoundedSemaphore(file_max)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._signature = None
+        self._en_vol = {}  # clé du cache -> Future du rendu en cours
+
+        self.rendus = 0
+        self.erreurs = 0
+        self.refus = 0
+        self.en_cours = 0
+        self.duree_totale = 0.0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn : pas de fork d'un processus web multi-threadé
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.nb_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                )
+            return self._executor
+
+    def _reinitialiser(self, executor):
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def prechauffer(self):
+        """Démarre tous les workers maintenant plutôt qu'au premier rendu."""
+        executor = self._get_executor()
+        pids = {f.result() for f in [executor.submit(_pret) for _ in range(self.nb_workers * 2)]}
+        print(f"🖨️ Service PDF prêt : {len(pids)} worker(s)")
+
+    def signature(self) -> str:
+        """Signature de rendu (gabarit, backend…), lue une fois dans un worker."""
+        if self._signature is None:
+            self._signature = self._get_executor().submit(_signature).result(timeout=PDF_RENDU_MAX_SECONDES)
+        return self._signature
+
+    def soumettre(self, donnees, resultats, attente_max: float = PDF_ATTENTE_MAX_SECONDES) -> Future:
+        """
+        Réserve une place dans la file (attend au plus attente_max, None =
+        sans limite) et lance le rendu. Retourne un Future -> octets du PDF.
+        Sur un hit du cache, le Future est déjà résolu et aucune place n'est prise.
+        """
+        cache = get_cache_pdf()
+        cle = None
+        if cache is not None:
+            cle = cle_pdf(donnees, resultats, self.signature())
+            pdf_bytes = cache.lire(cle)
+            if pdf_bytes is not None:
+                future = Future()
+                future.set_result(pdf_bytes)
+                return future
+            with self._lock:
+                future = self._en_vol.get(cle)
+            if future is not None:
+                return future
+
+        if not self._places.acquire(timeout=attente_max):
+            with self._lock:
+                self.refus += 1
+            raise ServicePDFSature(f"File PDF pleine ({self.file_max})")
+
+        with self._lock:
+            self.en_cours += 1
+        debut = time.perf_counter()
+
+        try:
+            executor = self._get_executor()
+            future = executor.submit(_rendre, donnees, resultats)
+            if cle is not None:
+                with self._lock:
+                    self._en_vol[cle] = future
+        except BaseException:
+            with self._lock:
+                self.en_cours -= 1
+            self._places.release()
+            raise
+
+        def fin(f):
+            erreur = None if f.cancelled() else f.exception()
+            if isinstance(erreur, BrokenProcessPool):
+                # un worker est mort (OOM, segfault) : pool recréé au prochain appel
+                self._reinitialiser(executor)
+            with self._lock:
+                self.en_cours -= 1
+                if erreur is None and not f.cancelled():
+                    self.rendus += 1
+                    self.duree_totale += time.perf_counter() - debut
+                else:
+                    self.erreurs += 1
+            self._places.release()
+
+            if cache is not None and erreur is None and not f.cancelled():
+                try:
+                    cache.ecrire(cle, f.result())
+                except OSError as e:
+                    # disque plein, droits… : le PDF est rendu, le cache attendra
+                    print("⚠️ Cache PDF : écriture impossible :", repr(e))
+
+            # retiré après l'écriture du cache : un appel suivant lit le cache
+            if cle is not None:
+                with self._lock:
+                    if self._en_vol.get(cle) is f:
+                        del self._en_vol[cle]
+
+        future.add_done_callback(fin)
+        return future
+
+    def rendre(self, donnees, resultats, attente_max: float = PDF_ATTENTE_MAX_SECONDES) -> bytes:
+        """Rend le PDF et retourne ses octets. Bloquant."""
+        return self.soumettre(donnees, resultats, attente_max).result(timeout=PDF_RENDU_MAX_SECONDES)
+
+    def stats(self) -> dict:
+        cache = get_cache_pdf()
+        with self._lock:
+            return {
+                "workers": self.nb_workers,
+                "file_max": self.file_max,
+                "en_cours": self.en_cours,
+                "rendus": self.rendus,
+                "erreurs": self.erreurs,
+                "refus": self.refus,
+                "duree_moyenne_ms": round(self.duree_totale / self.rendus * 1000, 1) if self.rendus else None,
+                "cache": cache.stats() if cache is not None else None,
+            }
+
+    def arreter(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_service_pdf() -> ServicePDF:
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = ServicePDF()
+    return _service
@@ -1,20 +1,343 @@
+import itertools
+import os
+import sqlite3
+import threading
 import time
-from collections import defaultdict, deque
+from collections import OrderedDict
+
+# =========================================================
+# RATE LIMIT — TOKEN BUCKET, BACKENDS INTERCHANGEABLES
+# =========================================================
+# Chaque clé a un seau de `limit` jetons, rechargé à `limit / window_seconds`
+# jetons par seconde. Une requête consomme un jeton ; seau vide = limité.
+# Le seau d'une nouvelle clé part plein : le débit soutenu est de `limit`
+# requêtes par fenêtre, mais la première fenêtre en laisse passer jusqu'à
+# 2 * limit - 1 (les `limit` jetons initiaux + la recharge pendant la
+# fenêtre ; 19 pour /submit à 10/60 s). Même comportement sur les trois backends.
+#
+# Backends (variable RATE_LIMIT_BACKEND) :
+# - "memoire"  (défaut) : par processus, mémoire bornée, clés inactives évincées
+# - "sqlite"   : fichier partagé entre les workers d'une même machine
+#                (RATE_LIMIT_SQLITE_PATH)
+# - "postgres" : table partagée entre toutes les instances (DATABASE_URL)
+#
+# En cas d'erreur du backend partagé, la requête passe (fail-open) : le rate
+# limit ne doit pas rendre /submit indisponible.
+
+
+def _recharger(jetons: float, maj: float, now: float, limit: int, window_seconds: float) -> float:
+    taux = limit / window_seconds
+    return min(float(limit), jetons + max(0.0, now - maj) * taux)
+
+
+# =========================================================
+# BACKEND MÉMOIRE (PAR PROCESSUS)
+# =========================================================
+class LimiteurMemoire:
+    """
+    Token bucket en mémoire, thread-safe.
+
+    Un OrderedDict par réglage (limit, window_seconds), clés dans l'ordre du
+    dernier accès. Dans un même réglage, un seau est plein au plus
+    window_seconds après son dernier accès : si la plus ancienne clé est
+    encore active, toutes celles derrière elle le sont aussi. Une clé dont le
+    seau est redevenu plein est équivalente à une clé absente, on la supprime.
+    Au-delà de max_cles (tous réglages confondus), la plus ancienne du réglage
+    le plus peuplé part.
+    """
+
+    def __init__(self, max_cles: int = 100_000):
+        self.max_cles = max_cles
+        self._reglages = {}  # (limit, window_seconds) -> OrderedDict cle -> (jetons, maj, plein_a)
+        self._total = 0
+        self._lock = threading.Lock()
+
+    def is_rate_limited(self, key: str, limit: int, window_seconds: int) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            self._evincer_inactives(now)
+
+            seaux = self._reglages.get((limit, window_seconds))
+            if seaux is None:
+                seaux = self._reglages[(limit, window_seconds)] = OrderedDict()
+
+            seau = seaux.pop(key, None)
+            if seau is None:
+                jetons = float(limit)
+            else:
+                jetons = _recharger(seau[0], seau[1], now, limit, window_seconds)
+                self._total -= 1
+
+            limite = jetons < 1
+            if not limite:
+                jetons -= 1
+
+            # instant où le seau sera de nouveau plein
+            plein_a = now + (limit - jetons) * window_seconds / limit
+            seaux[key] = (jetons, now, plein_a)
+            self._total += 1
+
+            while self._total > self.max_cles:
+                max(self._reglages.values(), key=len).popitem(last=False)
+                self._total -= 1
+
+            return limite
+
+    def _evincer_inactives(self, now: float):
+        # la tête de chaque réglage est sa clé la moins récemment utilisée
+        for seaux in self._reglages.values():
+            while seaux:
+                cle, (_, _, plein_a) = next(iter(seaux.items()))
+                if plein_a > now:
+                    break
+                del seaux[cle]
+                self._total -= 1
+
+    def __len__(self):
+        return self._total
+
+
+# =========================================================
+# BACKEND SQLITE (FICHIER PARTAGÉ ENTRE WORKERS)
+# =========================================================
+class LimiteurSQLite:
+    """
+    Token bucket dans un fichier SQLite : tous les processus qui ouvrent le
+    même fichier partagent les mêmes seaux. BEGIN IMMEDIATE sérialise le
+    lire-modifier-écrire entre processus.
+    """
+
+    PURGE_TOUTES_LES = 1000
+
+    def __init__(self, chemin: str):
+        self.chemin = chemin
+        self._local = threading.local()
+        self._compteur = itertools.count(1)  # next() atomique sous le GIL, partagé par les threads
+
+        with self._connexion() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limits ("
+                " cle TEXT PRIMARY KEY,"
+                " jetons REAL NOT NULL,"
+                " maj REAL NOT NULL,"
+                " plein_a REAL NOT NULL)"
+            )
+
+    def _connexion(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.chemin, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def is_rate_limited(self, key: str, limit: int, window_seconds: int) -> bool:
+        conn = self._connexion()
+        now = time.time()
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            ligne = conn.execute(
+                "SELECT jetons, maj FROM rate_limits WHERE cle = ?", (key,)
+            ).fetchone()
+            jetons = float(limit) if ligne is None else _recharger(ligne[0], ligne[1], now, limit, window_seconds)
+
+            limite = jetons < 1
+            if not limite:
+                jetons -= 1
+
+            plein_a = now + (limit - jetons) * window_seconds / limit
+            conn.execute(
+                "INSERT INTO rate_limits (cle, jetons, maj, plein_a) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(cle) DO UPDATE SET jetons = excluded.jetons, "
+                "maj = excluded.maj, plein_a = excluded.plein_a",
+                (key, jetons, now, plein_a),
+            )
+
+            if next(self._compteur) % self.PURGE_TOUTES_LES == 0:
+                conn.execute("DELETE FROM rate_limits WHERE plein_a <= ?", (now,))
+
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        return limite
+
+
+# =========================================================
+# BACKEND POSTGRES (PARTAGÉ ENTRE INSTANCES)
+# =========================================================
+class LimiteurPostgres:
+    """
+    Token bucket dans une table Postgres, une seule requête par appel :
+    INSERT ... ON CONFLICT DO UPDATE calcule la recharge et la consommation
+    de façon atomique (verrou de ligne), avec l'horloge de la DB pour que
+    toutes les instances soient d'accord.
+    """
+
+    PURGE_TOUTES_LES = 1000
+
+    SQL_CREATE = """
+        CREATE TABLE IF NOT EXISTS rate_limits (
+            cle TEXT PRIMARY KEY,
+            jetons DOUBLE PRECISION NOT NULL,
+            maj DOUBLE PRECISION NOT NULL,
+            plein_a DOUBLE PRECISION NOT NULL,
+            autorise BOOLEAN NOT NULL
+        )
+    """
+
+    SQL_CONSOMMER = """
+        WITH t AS (SELECT extract(epoch FROM clock_timestamp()) AS now)
+        INSERT INTO rate_limits AS r (cle, jetons, maj, plein_a, autorise)
+        SELECT :cle, :limit - 1, t.now, t.now + :window / :limit, TRUE FROM t
+        ON CONFLICT (cle) DO UPDATE SET
+            autorise = LEAST(:limit, r.jetons + (excluded.maj - r.maj) * :limit / :window) >= 1,
+            jetons = LEAST(:limit, r.jetons + (excluded.maj - r.maj) * :limit / :window)
+                     - CASE WHEN LEAST(:limit, r.jetons + (excluded.maj - r.maj) * :limit / :window) >= 1
+                            THEN 1 ELSE 0 END,
+            plein_a = excluded.maj + (:limit - (
+                     LEAST(:limit, r.jetons + (excluded.maj - r.maj) * :limit / :window)
+                     - CASE WHEN LEAST(:limit, r.jetons + (excluded.maj - r.maj) * :limit / :window) >= 1
+                            THEN 1 ELSE 0 END)) * :window / :limit,
+            maj = excluded.maj
+        RETURNING autorise
+    """
+
+    SQL_PURGE = "DELETE FROM rate_limits WHERE plein_a <= extract(epoch FROM clock_timestamp())"
+
+    def __init__(self, engine=None):
+        from sqlalchemy import text
+
+        if engine is None:
+            from database import engine
+
+        self._engine = engine
+        self._text = text
+        self._consommer = text(self.SQL_CONSOMMER)
+        self._compteur = itertools.count(1)  # next() atomique sous le GIL, partagé par les threads
+
+        with self._engine.begin() as conn:
+            conn.execute(text(self.SQL_CREATE))
+
+    def is_rate_limited(self, key: str, limit: int, window_seconds: int) -> bool:
+        with self._engine.begin() as conn:
+            autorise = conn.execute(
+                self._consommer,
+                {"cle": key, "limit": float(limit), "window": float(window_seconds)},
+            ).scalar_one()
+
+            if next(self._compteur) % self.PURGE_TOUTES_LES == 0:
+                conn.execute(self._text(self.SQL_PURGE))
+
+        return not autorise
+
+
+# =========================================================
+# SÉLECTION DU BACKEND
+# =========================================================
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memoire").strip().lower()
+RATE_LIMIT_SQLITE_PATH = os.getenv("RATE_LIMIT_SQLITE_PATH", "/tmp/maretraitesuisse_rate_limit.sqlite3")
+RATE_LIMIT_MAX_CLES = int(os.getenv("RATE_LIMIT_MAX_CLES", "100000"))
+
+_limiteur = None
+_limiteur_lock = threading.Lock()
+
+
+def creer_limiteur(backend: str = None):
+    backend = (backend or RATE_LIMIT_BACKEND)
+    if backend == "sqlite":
+        return LimiteurSQLite(RATE_LIMIT_SQLITE_PATH)
+    if backend == "postgres":
+        return LimiteurPostgres()
+    if backend != "memoire":
+        print(f"⚠️ RATE_LIMIT_BACKEND inconnu ({backend}), backend mémoire utilisé")
+    return LimiteurMemoire(max_cles=RATE_LIMIT_MAX_CLES)
+
+
+def get_limiteur():
+    """Limiteur du processus, créé au premier appel."""
+    global _limiteur
+    if _limiteur is None:
+        with _limiteur_lock:
+            if _limiteur is None:
+                _limiteur = creer_limiteur()
+    return _limiteur
 
-RATE_LIMIT_STORAGE = defaultdict(deque)
 
 def is_rate_limited(key: str, limit: int, window_seconds: int) -> bool:
-    now = time.time()
-    q = RATE_LIMIT_STORAGE[key]
+    try:
+        return get_limiteur().is_rate_limited(key, limit, window_seconds)
+    except Exception as e:
+        print("⚠️ Rate limit indisponible, requête autorisée :", repr(e))
+        return False
+
+
+# =========================================================
+# TESTS
+# =========================================================
+def _compter_acceptes(limiteur, cle, n, limit=10, window=60):
+    return sum(1 for _ in range(n) if not limiteur.is_rate_limited(cle, limit, window))
+
+
+def _processus_sqlite(chemin, n, file):
+    file.put(_compter_acceptes(LimiteurSQLite(chemin), "partagee", n))
+
+
+def test_rate_limit():
+    import multiprocessing
+    import tempfile
+
+    print("=== TEST 1: Mémoire, 10 / fenêtre ===")
+    lim = LimiteurMemoire()
+    assert _compter_acceptes(lim, "ip-a", 15) == 10
+    assert _compter_acceptes(lim, "ip-b", 3) == 3
+    print("✅ OK")
+
+    print("=== TEST 2: Mémoire, recharge et éviction des clés inactives ===")
+    lim = LimiteurMemoire()
+    assert _compter_acceptes(lim, "ip-a", 5, limit=5, window=0.2) == 5
+    assert lim.is_rate_limited("ip-a", 5, 0.2)
+    time.sleep(0.25)
+    assert not lim.is_rate_limited("ip-a", 5, 0.2)
+    time.sleep(0.25)
+    lim.is_rate_limited("ip-b", 5, 0.2)
+    assert len(lim) == 1, len(lim)
+    print("✅ OK")
+
+    print("=== TEST 3: Mémoire, réglages différents évincés indépendamment ===")
+    lim = LimiteurMemoire()
+    lim.is_rate_limited("long", 10, 60)
+    for i in range(100):
+        lim.is_rate_limited(f"court-{i}", 5, 0.1)
+    time.sleep(0.15)
+    lim.is_rate_limited("long", 10, 60)
+    assert len(lim) == 1, len(lim)
+    print("✅ OK")
+
+    print("=== TEST 4: Mémoire bornée ===")
+    lim = LimiteurMemoire(max_cles=1000)
+    for i in range(5000):
+        lim.is_rate_limited(f"ip-{i}", 10, 60)
+    assert len(lim) == 1000
+    print("✅ OK")
 
-    # supprimer les requêtes trop anciennes
-    while q and q[0] <= now - window_seconds:
-        q.popleft()
+    print("=== TEST 5: SQLite partagé entre 4 processus ===")
+    with tempfile.TemporaryDirectory() as d:
+        chemin = os.path.join(d, "rl.sqlite3")
+        LimiteurSQLite(chemin)
+        file = multiprocessing.Queue()
+        procs = [multiprocessing.Process(target=_processus_sqlite, args=(chemin, 10, file)) for _ in range(4)]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join()
+        total = sum(file.get() for _ in procs)
+        assert total == 10, total
+    print("✅ OK")
 
-    # trop de requêtes
-    if len(q) >= limit:
-        return True
 
-    # ajouter la requête actuelle
-    q.append(now)
-    return False
\ No newline at end of file
+if __name__ == "__main__":
+    test_rate_limit()
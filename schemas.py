@@ -1,15 +1,11 @@
-from pydantic import BaseModel, ConfigDict, field_validator
+from pydantic import BaseModel, ConfigDict, field_validator, model_validator
 from typing import Optional
 
 
-class SubmitPayload(BaseModel):
+class ProfilRetraite(BaseModel):
+    """Champs du formulaire qui entrent dans le calcul (sans identité)."""
     model_config = ConfigDict(extra="forbid", str_strip_whitespace=True)
 
-    prenom: str
-    nom: str
-    email: str
-    telephone: Optional[str] = None
-
     statut_civil: str
     statut_pro: str
 
@@ -30,31 +26,6 @@ class SubmitPayload(BaseModel):
     has_3eme_pilier: bool = False
     type_3eme_pilier: Optional[str] = None
 
-    @field_validator("prenom", "nom")
-    @classmethod
-    def validate_name(cls, v: str) -> str:
-        if not v or len(v) < 2 or len(v) > 80:
-            raise ValueError("Longueur invalide")
-        return v
-
-    @field_validator("email")
-    @classmethod
-    def validate_email(cls, v: str) -> str:
-        v = v.strip().lower()
-        if len(v) > 254 or "@" not in v or "." not in v.split("@")[-1]:
-            raise ValueError("Email invalide")
-        return v
-
-    @field_validator("telephone")
-    @classmethod
-    def validate_telephone(cls, v: Optional[str]) -> Optional[str]:
-        if v is None:
-            return v
-        v = v.strip()
-        if len(v) > 30:
-            raise ValueError("Téléphone invalide")
-        return v
-
     @field_validator("statut_civil")
     @classmethod
     def validate_statut_civil(cls, v: str) -> str:
@@ -118,3 +89,147 @@ class SubmitPayload(BaseModel):
         if v not in allowed:
             raise ValueError("type_3eme_pilier invalide")
         return v
+
+
+class SubmitPayload(ProfilRetraite):
+    prenom: str
+    nom: str
+    email: str
+    telephone: Optional[str] = None
+
+    @field_validator("prenom", "nom")
+    @classmethod
+    def validate_name(cls, v: str) -> str:
+        if not v or len(v) < 2 or len(v) > 80:
+            raise ValueError("Longueur invalide")
+        return v
+
+    @field_validator("email")
+    @classmethod
+    def validate_email(cls, v: str) -> str:
+        v = v.strip().lower()
+        if len(v) > 254 or "@" not in v or "." not in v.split("@")[-1]:
+            raise ValueError("Email invalide")
+        return v
+
+    @field_validator("telephone")
+    @classmethod
+    def validate_telephone(cls, v: Optional[str]) -> Optional[str]:
+        if v is None:
+            return v
+        v = v.strip()
+        if len(v) > 30:
+            raise ValueError("Téléphone invalide")
+        return v
+
+
+class BalayageAgePayload(ProfilRetraite):
+    # l'âge choisi dans le formulaire n'est pas utilisé : on balaie la plage
+    age_retraite: int = 65
+    age_min: int = 58
+    age_max: int = 70
+
+    @field_validator("age_min", "age_max")
+    @classmethod
+    def validate_age_plage(cls, v: int) -> int:
+        if v < 18 or v > 80:
+            raise ValueError("Âge de la plage invalide")
+        return v
+
+    @model_validator(mode="after")
+    def validate_plage(self):
+        if self.age_min > self.age_max:
+            raise ValueError("age_min doit être inférieur ou égal à age_max")
+        if max(self.age_min, self.age_actuel) > self.age_max:
+            raise ValueError("Plage entièrement antérieure à age_actuel")
+        return self
+
+
+class MonteCarloPayload(ProfilRetraite):
+    chemins: int = 10000
+    seed: Optional[int] = None
+
+    @field_validator("chemins")
+    @classmethod
+    def validate_chemins(cls, v: int) -> int:
+        if v < 100 or v > 20000:
+            raise ValueError("chemins doit être entre 100 et 20000")
+        return v
+
+    @field_validator("seed")
+    @classmethod
+    def validate_seed(cls, v: Optional[int]) -> Optional[int]:
+        if v is not None and (v < 0 or v >= 2 ** 63):
+            raise ValueError("Seed invalide")
+        return v
+
+
+class ObjectifPayload(ProfilRetraite):
+    cible_mensuelle: float
+    inconnue: str = "rachat"  # "rachat" ou "age_retraite"
+    rachat: float = 0.0  # rachat déjà prévu (recherche de l'âge)
+    age_max: int = 70
+
+    @field_validator("cible_mensuelle")
+    @classmethod
+    def validate_cible(cls, v: float) -> float:
+        if v <= 0 or v > 50000:
+            raise ValueError("Cible mensuelle invalide")
+        return v
+
+    @field_validator("inconnue")
+    @classmethod
+    def validate_inconnue(cls, v: str) -> str:
+        v = v.lower()
+        if v not in ("rachat", "age_retraite"):
+            raise ValueError("inconnue doit être 'rachat' ou 'age_retraite'")
+        return v
+
+    @field_validator("rachat")
+    @classmethod
+    def validate_rachat(cls, v: float) -> float:
+        if v < 0 or v > 5_000_000:
+            raise ValueError("Rachat invalide")
+        return v
+
+    @field_validator("age_max")
+    @classmethod
+    def validate_age_max(cls, v: int) -> int:
+        if v < 18 or v > 80:
+            raise ValueError("Âge maximal invalide")
+        return v
+
+    @model_validator(mode="after")
+    def validate_plage(self):
+        if self.inconnue == "age_retraite" and self.age_actuel > self.age_max:
+            raise ValueError("age_max doit être supérieur ou égal à age_actuel")
+        return self
+
+
+class OptimisationRachatPayload(ProfilRetraite):
+    potentiel_rachat: Optional[float] = None  # None = estimation
+    plafond_annuel: Optional[float] = None  # None = pas de plafond
+    revenu_imposable: Optional[float] = None  # None = salaire_actuel
+    annees_max: int = 10
+    top: int = 5
+
+    @field_validator("potentiel_rachat", "plafond_annuel", "revenu_imposable")
+    @classmethod
+    def validate_montant_optionnel(cls, v: Optional[float]) -> Optional[float]:
+        if v is not None and (v < 0 or v > 5_000_000):
+            raise ValueError("Montant invalide")
+        return v
+
+    @field_validator("annees_max")
+    @classmethod
+    def validate_annees_max(cls, v: int) -> int:
+        if v < 1 or v > 15:
+            raise ValueError("annees_max doit être entre 1 et 15")
+        return v
+
+    @field_validator("top")
+    @classmethod
+    def validate_top(cls, v: int) -> int:
+        if v < 1 or v > 20:
+            raise ValueError("top doit être entre 1 et 20")
+        return v
@@ -1,12 +1,43 @@
+import hashlib
+import json
+import os
 from typing import Dict
-from calculateur_retraite import calculer_retraite_complete
+from calculateur_retraite import calculer_retraite_complete, calculer_lpp, empreinte_config
+from cache_calcul import CacheLRU
 
 # Valeurs utilisées dans ton système actuel
 LPP_REFERENCE_MENSUELLE = 1500
 RENTE_AVS_REFERENCE_CARRIERE_COMPLETE = 2520.0
 
 
-def calcul_complet_retraite(donnees: Dict) -> Dict:
+def projection_lpp_depuis_donnees(donnees: Dict) -> Dict:
+    """
+    Reconstruit, depuis les données du formulaire, la projection LPP
+    détaillée des résultats calculés en mode LPP rapide : capital_history
+    (colonnes {"age": [...], "capital_fin": [...]}) et les totaux arrondis
+    année par année qui vont avec (ceux de la forme fermée sont arrondis
+    globalement et peuvent différer de quelques francs).
+    """
+    statut_pro = (donnees.get("statut_pro") or "salarie").strip().lower()
+    capital_lpp = float(donnees.get("capital_lpp", 0))
+
+    lpp = calculer_lpp(
+        age_actuel=int(donnees.get("age_actuel", 0)),
+        age_retraite=int(donnees.get("age_retraite", 65)),
+        salaire_actuel=float(donnees.get("salaire_actuel", 0)),
+        capital_initial=0.0 if statut_pro == "independant" else capital_lpp,
+    )
+    return {
+        "capital_history": {"age": lpp.projection.age, "capital_fin": lpp.projection.capital_fin},
+        "total_cotisations": lpp.total_cotisations,
+        "total_interets": lpp.total_interets,
+    }
+
+
+def calcul_complet_retraite(donnees: Dict, detail_lpp: bool = True) -> Dict:
+    # detail_lpp=False: LPP en forme fermée, sans projection annuelle.
+    # capital_history est alors vide et reconstruit par le PDF si besoin,
+    # avec les totaux (projection_lpp_depuis_donnees).
     age_actuel = int(donnees.get("age_actuel", 0))
     age_retraite = int(donnees.get("age_retraite", 65))
 
@@ -51,10 +82,12 @@ def calcul_complet_retraite(donnees: Dict) -> Dict:
         capital_lpp=capital_lpp_calc,
         situation_conjoint=situation_conjoint,
         rente_conjoint=rente_conjoint_param,
+        detail_lpp=detail_lpp,
     )
 
     avs = data_calc["avs"]
     lpp = data_calc["lpp"]
+    projection = lpp.get("projection") or {}
 
     rente_avs = float(avs["rente"])
     rente_lpp = float(lpp["rente_mensuelle"])
@@ -130,10 +163,12 @@ def calcul_complet_retraite(donnees: Dict) -> Dict:
             "capital_actuel": capital_lpp,
             "capital_final": lpp.get("capital_final"),
             "rente_mensuelle": lpp.get("rente_mensuelle"),
-            "capital_history": [
-                {"age": p.get("age"), "capital": p.get("capital_fin")}
-                for p in (lpp.get("projection", []) or [])
-            ],
+            # colonnes partagées avec la projection (pas de copie) ;
+            # ancien format (liste de {"age", "capital"}) encore lu par le PDF
+            "capital_history": {
+                "age": projection.get("age", []),
+                "capital_fin": projection.get("capital_fin", []),
+            },
             "salaire_coordonne": lpp.get("salaire_coordonne"),
             "total_cotisations": lpp.get("total_cotisations"),
             "total_interets": lpp.get("total_interets"),
@@ -153,3 +188,52 @@ def calcul_complet_retraite(donnees: Dict) -> Dict:
         "economie_fiscale": round(economie_fiscale, 2),
         "pdf_data": pdf_data
     }
+
+
+# =========================================================
+# MÉMOÏSATION (même formulaire re-soumis, seul prenom/email change…)
+# =========================================================
+CACHE_CALCUL = CacheLRU(
+    taille_max=int(os.getenv("CACHE_CALCUL_TAILLE", "2048")),
+    ttl_secondes=float(os.getenv("CACHE_CALCUL_TTL", "3600")),
+)
+_empreinte_cache = empreinte_config()
+
+
+def cle_calcul(donnees: Dict, detail_lpp: bool = True) -> str:
+    # Uniquement les champs lus par calcul_complet_retraite, normalisés comme lui
+    # (prenom, nom, email, telephone... n'influencent pas le résultat)
+    champs = [
+        int(donnees.get("age_actuel", 0)),
+        int(donnees.get("age_retraite", 65)),
+        float(donnees.get("salaire_actuel", 0)),
+        float(donnees.get("salaire_moyen", 0)),
+        int(donnees.get("annees_cotisees", 0)),
+        int(donnees.get("annees_be", 0)),
+        int(donnees.get("annees_ba", 0)),
+        (donnees.get("statut_civil") or "celibataire").strip().lower(),
+        (donnees.get("statut_pro") or "salarie").strip().lower(),
+        float(donnees.get("capital_lpp", 0)),
+        float(donnees.get("rente_conjoint", 0)),
+        bool(detail_lpp),
+    ]
+    return hashlib.sha256(json.dumps(champs).encode()).hexdigest()
+
+
+def calcul_complet_retraite_memo(donnees: Dict, detail_lpp: bool = True) -> Dict:
+    global _empreinte_cache
+
+    # Invalidation automatique si ConfigAVS / ConfigLPP ont changé
+    empreinte = empreinte_config()
+    if empreinte != _empreinte_cache:
+        CACHE_CALCUL.vider()
+        _empreinte_cache = empreinte
+
+    cle = cle_calcul(donnees, detail_lpp)
+    trouve, resultat = CACHE_CALCUL.get(cle)
+    if trouve:
+        return resultat
+
+    resultat = calcul_complet_retraite(donnees, detail_lpp=detail_lpp)
+    CACHE_CALCUL.set(cle, resultat)
+    return resultat
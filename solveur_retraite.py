@@ -0,0 +1,351 @@
+"""
+Calculateur de Retraite Suisse (AVS/LPP) 2025 — solveur inverse
+« Combien racheter / jusqu'à quel âge travailler pour toucher X CHF par mois ? »
+
+- rachat : recherche par bisection du rachat LPP minimal (versé aujourd'hui,
+  il porte intérêt jusqu'à la retraite) tel que le total mensuel de
+  calculer_retraite_complete atteigne la cible. Le total est strictement
+  croissant en rachat (capital LPP linéaire, AVS inchangée) ; chaque
+  évaluation ne recalcule que le LPP en forme fermée.
+- âge de retraite : balayage vectorisé de tous les âges de la plage
+  (calculer_balayage_age) et premier âge qui atteint la cible. Le total
+  n'est pas strictement monotone en âge (bonifications AVS diluées sur plus
+  d'années) : le balayage complet reste exact et coûte moins d'une
+  milliseconde.
+"""
+
+import math
+import os
+import time
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+from calculateur_retraite import calculer_lpp, calculer_retraite_complete
+from calculateur_batch import calculer_balayage_age, colonnes_depuis_donnees
+
+SOLVEUR_RACHAT_MAX = float(os.getenv("SOLVEUR_RACHAT_MAX", "2000000"))
+SOLVEUR_TOLERANCE = float(os.getenv("SOLVEUR_TOLERANCE", "1"))  # CHF de rachat
+SOLVEUR_EVALUATIONS_MAX = int(os.getenv("SOLVEUR_EVALUATIONS_MAX", "64"))
+
+
+# ============================================================================
+# BISECTION
+# ============================================================================
+
+def _bisection_minimale(
+    f: Callable[[float], float],
+    cible: float,
+    bas: float,
+    haut: float,
+    tolerance: float,
+    evaluations_max: int,
+) -> Dict:
+    """
+    Plus petit x de [bas, haut] tel que f(x) >= cible, f croissante
+
+    Returns:
+        {'x', 'bas', 'valeur', 'atteignable', 'converge', 'evaluations'} ;
+        x est toujours une solution admissible (borne haute de l'intervalle
+        final), bas la dernière borne non admissible
+    """
+    valeur_bas = f(bas)
+    if valeur_bas >= cible:
+        return {'x': bas, 'bas': None, 'valeur': valeur_bas, 'atteignable': True, 'converge': True,
+                'evaluations': 1}
+
+    valeur_haut = f(haut)
+    evaluations = 2
+    if valeur_haut < cible:
+        return {'x': None, 'bas': haut, 'valeur': valeur_haut, 'atteignable': False, 'converge': True,
+                'evaluations': evaluations}
+
+    while haut - bas > tolerance and evaluations < evaluations_max:
+        milieu = (bas + haut) / 2
+        valeur = f(milieu)
+        evaluations += 1
+        if valeur >= cible:
+            haut, valeur_haut = milieu, valeur
+        else:
+            bas = milieu
+
+    return {
+        'x': haut,
+        'bas': bas,
+        'valeur': valeur_haut,
+        'atteignable': True,
+        'converge': haut - bas <= tolerance,
+        'evaluations': evaluations,
+    }
+
+
+# ============================================================================
+# SOLVEURS
+# ============================================================================
+
+def resoudre_rachat(
+    cible_mensuelle: float,
+    age_actuel: int,
+    age_retraite: int,
+    statut_civil: str,
+    salaire_actuel: float,
+    salaire_moyen: float,
+    annees_cotisees: int,
+    annees_bonif_education: int = 0,
+    annees_bonif_assistance: int = 0,
+    capital_lpp: float = 0.0,
+    situation_conjoint: Optional[str] = None,
+    rente_conjoint: Optional[float] = None,
+    rachat_max: float = SOLVEUR_RACHAT_MAX,
+    tolerance: float = SOLVEUR_TOLERANCE,
+    evaluations_max: int = SOLVEUR_EVALUATIONS_MAX,
+) -> Dict:
+    """
+    Rachat LPP minimal pour atteindre `cible_mensuelle` (total AVS + LPP)
+
+    Args:
+        rachat_max: borne haute de la recherche (potentiel de rachat)
+        tolerance: précision du rachat en CHF (le rachat renvoyé est arrondi
+            au franc supérieur et atteint toujours la cible)
+        evaluations_max: budget d'évaluations du total, arrondi au franc
+            compris (au moins 3 : les deux bornes et l'arrondi)
+
+    Returns:
+        {'atteignable', 'rachat', 'total', 'total_sans_rachat', 'converge',
+         'evaluations', 'duree_ms'} ; rachat None si la cible est hors
+        d'atteinte même avec rachat_max
+    """
+    if evaluations_max < 3:
+        raise ValueError("evaluations_max doit être au moins 3")
+
+    debut = time.perf_counter()
+
+    # AVS et plafonnement couple ne dépendent pas du rachat : calculés une fois
+    base = calculer_retraite_complete(
+        age_actuel=age_actuel,
+        age_retraite=age_retraite,
+        statut_civil=statut_civil,
+        salaire_actuel=salaire_actuel,
+        salaire_moyen=salaire_moyen,
+        annees_cotisees=annees_cotisees,
+        annees_bonif_education=annees_bonif_education,
+        annees_bonif_assistance=annees_bonif_assistance,
+        capital_lpp=capital_lpp,
+        situation_conjoint=situation_conjoint,
+        rente_conjoint=rente_conjoint,
+        detail_lpp=False,
+    )
+    rente_avs = base['avs']['rente']
+
+    def total(rachat: float) -> float:
+        lpp = calculer_lpp(age_actuel, age_retraite, salaire_actuel, capital_lpp + rachat, detail=False)
+        return rente_avs + lpp.rente_mensuelle
+
+    # 2 évaluations réservées après la bisection : l'arrondi au franc et le candidat
+    r = _bisection_minimale(total, cible_mensuelle, 0.0, float(rachat_max), tolerance, max(2, evaluations_max - 2))
+
+    rachat = None
+    total_atteint = r['valeur']
+    evaluations = r['evaluations']
+    if r['atteignable']:
+        rachat = float(min(math.ceil(r['x']), rachat_max))
+        if rachat != r['x']:
+            total_atteint = total(rachat)
+            evaluations += 1
+        # franc entier juste au-dessus de la borne non admissible : souvent
+        # déjà suffisant (le total est arrondi au centime)
+        if r['bas'] is not None and math.floor(r['bas']) + 1 < rachat and evaluations < evaluations_max:
+            candidat = float(math.floor(r['bas']) + 1)
+            total_candidat = total(candidat)
+            evaluations += 1
+            if total_candidat >= cible_mensuelle:
+                rachat, total_atteint = candidat, total_candidat
+
+    return {
+        'atteignable': r['atteignable'],
+        'rachat': rachat,
+        'total': round(total_atteint, 2),
+        'total_sans_rachat': round(base['total'], 2),
+        'converge': r['converge'],
+        'evaluations': evaluations,
+        'duree_ms': round((time.perf_counter() - debut) * 1000, 3),
+    }
+
+
+def resoudre_age_retraite(
+    cible_mensuelle: float,
+    age_actuel: int,
+    age_min: int,
+    age_max: int,
+    statut_civil: str,
+    salaire_actuel: float,
+    salaire_moyen: float,
+    annees_cotisees: int,
+    annees_bonif_education: int = 0,
+    annees_bonif_assistance: int = 0,
+    capital_lpp: float = 0.0,
+    rachat: float = 0.0,
+    situation_conjoint: Optional[str] = None,
+    rente_conjoint: float = np.nan,
+) -> Dict:
+    """
+    Âge de retraite minimal (dans [age_min, age_max]) pour atteindre
+    `cible_mensuelle`, avec un éventuel rachat versé aujourd'hui
+
+    Returns:
+        {'atteignable', 'age_retraite', 'total', 'total_age_max',
+         'evaluations', 'duree_ms'} ; age_retraite None si aucun âge de la
+        plage n'atteint la cible
+    """
+    debut = time.perf_counter()
+
+    r = calculer_balayage_age(
+        age_actuel=age_actuel,
+        age_min=age_min,
+        age_max=age_max,
+        statut_civil=statut_civil,
+        salaire_actuel=salaire_actuel,
+        salaire_moyen=salaire_moyen,
+        annees_cotisees=annees_cotisees,
+        annees_bonif_education=annees_bonif_education,
+        annees_bonif_assistance=annees_bonif_assistance,
+        capital_lpp=capital_lpp + rachat,
+        situation_conjoint=situation_conjoint,
+        rente_conjoint=rente_conjoint,
+    )
+    totaux = r['total']
+    atteint = np.flatnonzero(totaux >= cible_mensuelle)
+
+    if atteint.size:
+        i = int(atteint[0])
+        age, total = int(r['age_retraite'][i]), float(totaux[i])
+    else:
+        age, total = None, None
+
+    return {
+        'atteignable': age is not None,
+        'age_retraite': age,
+        'total': round(total, 2) if total is not None else None,
+        'total_age_max': round(float(totaux[-1]), 2),
+        'evaluations': len(totaux),
+        'duree_ms': round((time.perf_counter() - debut) * 1000, 3),
+    }
+
+
+def resoudre_depuis_donnees(
+    donnees: Dict,
+    inconnue: str,
+    cible_mensuelle: float,
+    rachat: float = 0.0,
+    age_max: int = 70,
+    tolerance: float = SOLVEUR_TOLERANCE,
+) -> Dict:
+    """
+    Solveur pour les `donnees` d'un formulaire (mêmes règles que
+    calcul_complet_retraite : indépendant sans capital LPP, rente conjoint)
+
+    Args:
+        inconnue: 'rachat' ou 'age_retraite'
+        rachat: rachat déjà prévu (recherche de l'âge uniquement)
+        age_max: borne haute de la recherche de l'âge
+    """
+    colonnes = colonnes_depuis_donnees([donnees])
+    profil = {k: v[0].item() if hasattr(v[0], 'item') else v[0] for k, v in colonnes.items()}
+
+    if inconnue == 'rachat':
+        rente_conjoint = profil['rente_conjoint']
+        return resoudre_rachat(
+            cible_mensuelle,
+            age_actuel=profil['age_actuel'],
+            age_retraite=profil['age_retraite'],
+            statut_civil=profil['statut_civil'],
+            salaire_actuel=profil['salaire_actuel'],
+            salaire_moyen=profil['salaire_moyen'],
+            annees_cotisees=profil['annees_cotisees'],
+            annees_bonif_education=profil['annees_bonif_education'],
+            annees_bonif_assistance=profil['annees_bonif_assistance'],
+            capital_lpp=profil['capital_lpp'],
+            situation_conjoint=profil['situation_conjoint'],
+            rente_conjoint=None if math.isnan(rente_conjoint) else rente_conjoint,
+            tolerance=tolerance,
+        )
+
+    if inconnue == 'age_retraite':
+        del profil['age_retraite']
+        return resoudre_age_retraite(
+            cible_mensuelle, age_min=profil['age_actuel'], age_max=age_max, rachat=rachat, **profil
+        )
+
+    raise ValueError(f"Inconnue non supportée: {inconnue}")
+
+
+# ============================================================================
+# TESTS (référence = calculer_retraite_complete)
+# ============================================================================
+
+def test_solveur(n: int = 300, seed: int = 2027):
+    rng = np.random.default_rng(seed)
+
+    def profil():
+        marie = rng.random() < 0.4
+        return dict(
+            age_actuel=int(rng.integers(25, 60)),
+            statut_civil='marie' if marie else 'celibataire',
+            salaire_actuel=float(rng.uniform(20000, 180000)),
+            salaire_moyen=float(rng.uniform(20000, 120000)),
+            annees_cotisees=int(rng.integers(0, 35)),
+            annees_bonif_education=int(rng.integers(0, 10)),
+            capital_lpp=float(rng.uniform(0, 300000)),
+            situation_conjoint=('sait' if rng.random() < 0.5 else 'ne_sait_pas') if marie else None,
+        )
+
+    print("=== TEST 1: rachat minimal (atteint la cible, rachat - 1 CHF non) ===")
+    for _ in range(n):
+        p = profil()
+        age_retraite = int(rng.integers(p['age_actuel'] + 1, 71))
+        rente_conjoint = float(rng.uniform(1260, 2520)) if p['situation_conjoint'] == 'sait' else None
+        cible = float(rng.uniform(2000, 6000))
+        r = resoudre_rachat(cible, age_retraite=age_retraite, rente_conjoint=rente_conjoint, **p)
+
+        def total(rachat):
+            q = dict(p, capital_lpp=p['capital_lpp'] + rachat)
+            return calculer_retraite_complete(age_retraite=age_retraite, rente_conjoint=rente_conjoint, **q)['total']
+
+        if not r['atteignable']:
+            assert total(SOLVEUR_RACHAT_MAX) < cible
+            continue
+        assert r['converge'] and r['evaluations'] <= SOLVEUR_EVALUATIONS_MAX, r
+        assert abs(total(r['rachat']) - r['total']) < 1e-6, (r, total(r['rachat']))
+        assert r['total'] >= cible
+        assert r['rachat'] == 0 or total(r['rachat'] - 1) < cible, r
+    print("✅ OK")
+
+    print("=== TEST 2: âge minimal (premier âge du moteur scalaire qui atteint la cible) ===")
+    for _ in range(n):
+        p = profil()
+        cible = float(rng.uniform(2000, 5000))
+        rachat = float(rng.choice([0.0, 50000.0]))
+        r = resoudre_age_retraite(cible, age_min=p['age_actuel'], age_max=70, rachat=rachat, **p)
+
+        attendu = None
+        q = dict(p, capital_lpp=p['capital_lpp'] + rachat)
+        for age in range(p['age_actuel'], 71):
+            if calculer_retraite_complete(age_retraite=age, **q)['total'] >= cible:
+                attendu = age
+                break
+        assert r['age_retraite'] == attendu, (r, attendu, p, cible)
+    print("✅ OK")
+
+    print("=== TEST 3: budget d'évaluations épuisé -> solution admissible, non convergée ===")
+    p = profil()
+    r = resoudre_rachat(8000, age_retraite=65, tolerance=0.01, evaluations_max=6, **p)
+    assert r['atteignable'] and not r['converge'] and r['evaluations'] <= 6 and r['total'] >= 8000, r
+
+    for evaluations_max in (3, 4, 5):
+        r = resoudre_rachat(8000, age_retraite=65, tolerance=0.01, evaluations_max=evaluations_max, **p)
+        assert r['evaluations'] <= evaluations_max and r['total'] >= 8000, (evaluations_max, r)
+    print("✅ OK")
+
+
+if __name__ == "__main__":
+    test_solveur()
@@ -0,0 +1,84 @@
+"""
+Worker de la file de jobs (table jobs).
+
+Lancement séparé du serveur web :
+    python worker.py
+
+Variables :
+- JOB_WORKERS : nombre de jobs traités en parallèle (défaut 4)
+- JOB_POLL_SECONDES : attente quand la file est vide (défaut 2)
+"""
+
+import os
+import signal
+import threading
+import time
+
+from database import SessionLocal
+import job_queue
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_POLL_SECONDES = float(os.getenv("JOB_POLL_SECONDES", "2"))
+
+
+def boucle_worker(handlers: dict, arret: threading.Event, nom: str):
+    """Réclame un job à la fois jusqu'à l'arrêt ; dort quand la file est vide."""
+    while not arret.is_set():
+        try:
+            db = SessionLocal()
+            try:
+                jobs = job_queue.reclamer(db, types=handlers.keys(), limite=1)
+            finally:
+                db.close()
+        except Exception as e:
+            print(f"⚠️ {nom} : réclamation impossible :", repr(e))
+            arret.wait(JOB_POLL_SECONDES)
+            continue
+
+        if not jobs:
+            arret.wait(JOB_POLL_SECONDES)
+            continue
+
+        for job in jobs:
+            job_queue.executer(SessionLocal, job, handlers)
+
+
+def demarrer_workers(handlers: dict, nb: int = JOB_WORKERS, arret: threading.Event = None):
+    """Démarre `nb` threads worker (daemon). Retourne (threads, arret)."""
+    arret = arret or threading.Event()
+    threads = []
+    for i in range(nb):
+        t = threading.Thread(
+            target=boucle_worker,
+            args=(handlers, arret, f"worker-{i}"),
+            name=f"job-worker-{i}",
+            daemon=True,
+        )
+        t.start()
+        threads.append(t)
+
+    print(f"👷 {nb} worker(s) de jobs démarré(s) : {', '.join(handlers)}")
+    return threads, arret
+
+
+if __name__ == "__main__":
+    from main import JOB_HANDLERS
+    from pdf_service import get_service_pdf
+
+    get_service_pdf().prechauffer()
+    threads, arret = demarrer_workers(JOB_HANDLERS)
+
+    def stop(signum, frame):
+        print("🛑 Arrêt demandé, fin des jobs en cours…")
+        arret.set()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    while not arret.is_set():
+        time.sleep(0.5)
+
+    for t in threads:
+        t.join()
+    get_service_pdf().arreter()
+    print("✅ Worker arrêté")